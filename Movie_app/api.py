@@ -1,10 +1,18 @@
 """Данный модуль работает с API The Movie Database для получения,
 обработки и сохранения информации о фильмах и сериалах в базу данных Django"""
 
+import hashlib
+import json
 import logging
+import time
+from datetime import timedelta
 import requests
 from django.conf import settings
-from .models import Genre, Movie, Series, Actor, Director, Country
+from django.db import transaction
+from django.utils import timezone
+from .models import Genre, Movie, Series
+from .ingestion import IngestionBatch, IngestionMetrics
+from .tmdb_cache import get_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +20,17 @@ TMDB_BASE_URL = 'https://api.themoviedb.org/3'
 
 DEFAULT_POSTER_URL = 'https://via.placeholder.com/500x750?text=No+Image'
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+RETRY_BACKOFF = 0.5
+
+RETRY_MAX_DELAY = 10
+
+
+def get_base_url():
+    """Получить базовый URL TMDB API из настроек (например, для локальной заглушки)."""
+    return getattr(settings, 'TMDB_BASE_URL', None) or TMDB_BASE_URL
+
 
 def get_api_key():
     """Получить API-ключ из настроек."""
@@ -21,30 +40,104 @@ def get_api_key():
     return api_key
 
 
+def get_sync_freshness():
+    """Получить окно актуальности данных TMDB из настроек."""
+    hours = getattr(settings, 'TMDB_SYNC_FRESHNESS_HOURS', 24)
+    return timedelta(hours=hours)
+
+
+def to_rating(vote_average):
+    """Переводит оценку TMDB (0-10) в рейтинг контента (0-100)."""
+    return min(100, int((vote_average or 0) * 10))
+
+
+def payload_hash(data):
+    """Вычисляет хэш ответа TMDB для определения изменений."""
+    serialized = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def apply_payload_hash(content_obj, data, batch):
+    """
+    Сравнивает хэш деталей TMDB с сохранённым.
+    Возвращает False, если данные не изменились и объект
+    нужно только отметить как синхронизированный.
+    """
+    digest = payload_hash(data)
+    if content_obj.payload_hash == digest:
+        logger.info(f"Данные TMDB не изменились: {content_obj.title}")
+        batch.mark_synced(content_obj)
+        return False
+    content_obj.payload_hash = digest
+    content_obj.last_synced_at = timezone.now()
+    return True
+
+
 class TMDBClientError(Exception):
     pass
 
 
+def retry_delay(response, attempt):
+    """Возвращает паузу перед повтором: Retry-After или экспоненциальная задержка."""
+    retry_after = response.headers.get('Retry-After')
+    try:
+        delay = float(retry_after)
+    except (TypeError, ValueError):
+        delay = RETRY_BACKOFF * 2 ** attempt
+    return min(delay, RETRY_MAX_DELAY)
+
+
+def send_request(url, params, headers=None):
+    """
+    Выполняет GET-запрос к TMDB, повторяя его при ответе 429
+    (превышение лимита запросов) и ошибках сервера.
+    """
+    retries = getattr(settings, 'TMDB_MAX_RETRIES', 3)
+    for attempt in range(retries + 1):
+        response = requests.get(url, params=params, headers=headers, timeout=10)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        delay = retry_delay(response, attempt)
+        logger.warning(f"TMDB вернул {response.status_code} для {url}, "
+                       f"повтор через {delay} с")
+        time.sleep(delay)
+    return response
+
+
+def request_tmdb(url, params, cached=True, revalidate=False):
+    """
+    Выполняет GET-запрос к TMDB и возвращает разобранный JSON.
+    Если включён кэш ответов, запрос обслуживается через него;
+    revalidate=True перепроверяет даже свежую запись кэша.
+    Ленты изменений и списки популярного (cached=False) всегда читаются из сети:
+    их содержимое меняется без смены URL.
+    """
+    cache = get_response_cache() if cached else None
+    if cache is not None:
+        return cache.fetch(url, params, send_request, revalidate=revalidate)
+    response = send_request(url, params)
+    response.raise_for_status()
+    return response.json()
+
+
 def get_genres_from_tmdb():
     """
     Функция для загрузки жанров из TMDB API и сохранения их в базу данных.
     Жанры общие для фильмов и сериалов.
     """
     api_key = get_api_key()
-    url = f"{TMDB_BASE_URL}/genre/movie/list"
+    url = f"{get_base_url()}/genre/movie/list"
     params = {
         'api_key': api_key,
         'language': 'ru-RU'
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        data = request_tmdb(url, params)
     except requests.exceptions.RequestException as e:
         logger.error(f"Ошибка при запросе жанров: {e}")
         raise TMDBClientError(f"Ошибка при запросе жанров: {e}") from e
 
-    data = response.json()
     genres = data.get('genres', [])
 
     for genre_data in genres:
@@ -64,13 +157,14 @@ def get_genres_from_tmdb():
             logger.error(f"Ошибка при сохранении жанра {name}: {e}")
 
 
-def get_movie_details(tmdb_id, movie_obj):
+def fetch_movie_details(tmdb_id, revalidate=False):
     """
-    Функция для загрузки деталей фильма
-    и обновления объекта Movie.
+    Функция для загрузки деталей фильма (вместе с составом съёмочной группы).
+    Возвращает словарь ответа TMDB или None при ошибке запроса.
+    revalidate=True перепроверяет запись кэша ответов, даже если она свежая.
     """
     api_key = get_api_key()
-    url = f"{TMDB_BASE_URL}/movie/{tmdb_id}"
+    url = f"{get_base_url()}/movie/{tmdb_id}"
     params = {
         'api_key': api_key,
         'language': 'ru-RU',
@@ -78,19 +172,46 @@ def get_movie_details(tmdb_id, movie_obj):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        data = request_tmdb(url, params, revalidate=revalidate)
     except requests.exceptions.RequestException as e:
         logger.error(f"Ошибка при запросе деталей фильма {tmdb_id}: {e}")
-        return
+        return None
+
+    return data
 
-    data = response.json()
-    update_movie_poster(data, movie_obj)
-    countries = retrieve_production__movie_countries(data)
-    directors = retrieve_movie_directors(data)
-    actors = retrieve_movie_actors(data)
 
-    update_movie_relations(movie_obj, countries, directors, actors)
+def get_movie_details(tmdb_id, movie_obj, batch=None, revalidate=False):
+    """
+    Функция для загрузки деталей фильма
+    и обновления объекта Movie.
+    Если передан пакет batch, изменения только добавляются в него,
+    иначе сразу записываются в базу данных.
+    Возвращает False, если детали не удалось загрузить.
+    """
+    data = fetch_movie_details(tmdb_id, revalidate)
+    if data is None:
+        return False
+
+    own_batch = batch is None
+    if own_batch:
+        batch = IngestionBatch()
+    if apply_payload_hash(movie_obj, data, batch):
+        update_movie_fields(data, movie_obj)
+        update_movie_poster(data, movie_obj)
+        batch.add_movie_details(movie_obj, data)
+    if own_batch:
+        batch.flush()
+    return True
+
+
+def update_movie_fields(data, movie_obj):
+    """Обновляет название, описание и рейтинг фильма из деталей TMDB."""
+    if data.get('title'):
+        movie_obj.title = data['title']
+    if data.get('overview'):
+        movie_obj.description = data['overview']
+    if 'vote_average' in data:
+        movie_obj.rating = to_rating(data['vote_average'])
 
 
 def update_movie_poster(data, movie_obj):
@@ -100,93 +221,14 @@ def update_movie_poster(data, movie_obj):
         logger.info(f"Обновлен постер для фильма {movie_obj.title}")
 
 
-def retrieve_production__movie_countries(data):
-    production_countries = data.get('production_countries', [])
-    countries = []
-    for country_data in production_countries:
-        iso_code = country_data.get('iso_3166_1', '')
-        name = country_data.get('name', '')
-        if iso_code and name:
-            try:
-                country, _ = Country.objects.get_or_create(
-                    iso_code=iso_code,
-                    defaults={'name': name}
-                )
-                countries.append(country)
-            except Exception as e:
-                logger.error(f"Ошибка при сохранении страны {name}: {e}")
-    return countries
-
-
-def retrieve_movie_directors(data):
-    credits_data = data.get('credits', {})
-    crew = credits_data.get('crew', [])
-    directors = []
-    for crew_member in crew:
-        if crew_member.get('job') == 'Director':
-            tmdb_id_dir = crew_member['id']
-            name = crew_member['name']
-            try:
-                director, _ = Director.objects.get_or_create(
-                    tmdb_id=tmdb_id_dir,
-                    defaults={'name': name}
-                )
-                directors.append(director)
-            except Exception as e:
-                logger.error(f"Ошибка при сохранении режиссера {name}: {e}")
-    return directors
-
-
-def retrieve_movie_actors(data):
-    credits_data = data.get('credits', {})
-    cast = credits_data.get('cast', [])[:10]
-    actors = []
-    for actor_data in cast:
-        tmdb_id_act = actor_data['id']
-        name = actor_data['name']
-        try:
-            actor, _ = Actor.objects.get_or_create(
-                tmdb_id=tmdb_id_act,
-                defaults={'name': name}
-            )
-            actors.append(actor)
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении актера {name}: {e}")
-    return actors
-
-
-def update_movie_relations(movie_obj, countries, directors, actors):
-    try:
-        if countries:
-            movie_obj.created_in.set(countries)
-        else:
-            logger.warning(f"Нет данных о странах для фильма {movie_obj.title}, "
-                           f"существующие связи не изменены.")
-
-        if directors:
-            movie_obj.director.set(directors)
-        else:
-            logger.warning(f"Нет данных о режиссерах для фильма {movie_obj.title}, "
-                           f"существующие связи не изменены.")
-
-        if actors:
-            movie_obj.actors.set(actors)
-        else:
-            logger.warning(f"Нет данных об актерах для фильма {movie_obj.title}, "
-                           f"существующие связи не изменены.")
-
-        movie_obj.save()
-    except Exception as e:
-        logger.error(f"Ошибка при обновлении фильма {movie_obj.title}: {e}")
-
-
-def get_series_details(tmdb_id, series_obj):
+def fetch_series_details(tmdb_id, revalidate=False):
     """
-    Функция для загрузки деталей сериала
-    и обновления объекта Series.
+    Функция для загрузки деталей сериала (вместе с актёрским составом).
+    Возвращает словарь ответа TMDB или None при ошибке запроса.
+    revalidate=True перепроверяет запись кэша ответов, даже если она свежая.
     """
     api_key = get_api_key()
-    url = f"{TMDB_BASE_URL}/tv/{tmdb_id}"
+    url = f"{get_base_url()}/tv/{tmdb_id}"
     params = {
         'api_key': api_key,
         'language': 'ru-RU',
@@ -194,19 +236,47 @@ def get_series_details(tmdb_id, series_obj):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        data = request_tmdb(url, params, revalidate=revalidate)
     except requests.exceptions.RequestException as e:
         logger.error(f"Ошибка при запросе деталей сериала {tmdb_id}: {e}")
-        return
+        return None
 
-    data = response.json()
-    update_series_poster(series_obj, data)
-    update_seasons_and_episodes(series_obj, data)
-    countries = retrieve_series_production_countries(data)
-    actors = retrieve_series_actors(data)
+    return data
 
-    update_series_relations(series_obj, countries, actors)
+
+def get_series_details(tmdb_id, series_obj, batch=None, revalidate=False):
+    """
+    Функция для загрузки деталей сериала
+    и обновления объекта Series.
+    Если передан пакет batch, изменения только добавляются в него,
+    иначе сразу записываются в базу данных.
+    Возвращает False, если детали не удалось загрузить.
+    """
+    data = fetch_series_details(tmdb_id, revalidate)
+    if data is None:
+        return False
+
+    own_batch = batch is None
+    if own_batch:
+        batch = IngestionBatch()
+    if apply_payload_hash(series_obj, data, batch):
+        update_series_fields(series_obj, data)
+        update_series_poster(series_obj, data)
+        update_seasons_and_episodes(series_obj, data)
+        batch.add_series_details(series_obj, data)
+    if own_batch:
+        batch.flush()
+    return True
+
+
+def update_series_fields(series_obj, data):
+    """Обновляет название, описание и рейтинг сериала из деталей TMDB."""
+    if data.get('name') or data.get('original_name'):
+        series_obj.title = extract_series_title(data)
+    if data.get('overview'):
+        series_obj.description = data['overview']
+    if 'vote_average' in data:
+        series_obj.rating = to_rating(data['vote_average'])
 
 
 def update_series_poster(series_obj, data):
@@ -227,67 +297,67 @@ def update_seasons_and_episodes(series_obj, data):
         logger.info(f"Обновлены эпизоды для сериала {series_obj.title}: {number_of_episodes}")
 
 
-def retrieve_series_production_countries(data):
-    production_countries = data.get('production_countries', [])
-    countries = []
-    for country_data in production_countries:
-        iso_code = country_data.get('iso_3166_1', '')
-        name = country_data.get('name', '')
-        if iso_code and name:
-            try:
-                country, _ = Country.objects.get_or_create(
-                    iso_code=iso_code,
-                    defaults={'name': name}
-                )
-                countries.append(country)
-            except Exception as e:
-                logger.error(f"Ошибка при сохранении страны {name}: {e}")
-    return countries
-
-
-def retrieve_series_actors(data):
-    credits_data = data.get('credits', {})
-    cast = credits_data.get('cast', [])[:10]
-    actors = []
-    for actor_data in cast:
-        tmdb_id_act = actor_data['id']
-        name = actor_data['name']
-        try:
-            actor, _ = Actor.objects.get_or_create(
-                tmdb_id=tmdb_id_act,
-                defaults={'name': name}
-            )
-            actors.append(actor)
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении актера {name}: {e}")
-    return actors
-
+def fetch_changes(media_type, start_date, end_date, page=1):
+    """
+    Функция для загрузки страницы ленты изменений TMDB
+    (/movie/changes или /tv/changes) за период с start_date по end_date.
+    """
+    api_key = get_api_key()
+    url = f"{get_base_url()}/{media_type}/changes"
+    params = {
+        'api_key': api_key,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'page': page
+    }
 
-def update_series_relations(series_obj, countries, actors):
     try:
-        if countries:
-            series_obj.created_in.set(countries)
-        else:
-            logger.warning(f"Нет данных о странах для сериала {series_obj.title}, "
-                           f"существующие связи не изменены.")
-
-        if actors:
-            series_obj.actors.set(actors)
-        else:
-            logger.warning(f"Нет данных об актерах для сериала {series_obj.title}, "
-                           f"существующие связи не изменены.")
+        data = request_tmdb(url, params, cached=False)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Ошибка при запросе изменений {media_type}: {e}")
+        raise TMDBClientError(f"Ошибка при запросе изменений {media_type}: {e}") from e
 
-        series_obj.save()
-    except Exception as e:
-        logger.error(f"Ошибка при обновлении сериала {series_obj.title}: {e}")
+    return data
 
 
-def get_popular_movies_from_tmdb(page=1):
+def write_page(batch, metrics, durations, description):
+    """
+    Записывает пакет страницы в одной транзакции (каждый тайтл — в своей точке
+    сохранения) и учитывает в metrics записанные и незаписанные тайтлы.
+    durations — {tmdb_id: время обработки} тайтлов, подготовленных без ошибок;
+    к времени каждого записанного тайтла добавляется его доля записи страницы.
+    """
+    started = time.perf_counter()
+    try:
+        with transaction.atomic():
+            transaction.on_commit(metrics.record_commit)
+            failures = batch.flush()
+    except Exception as e:
+        logger.error(f"Ошибка при записи {description}: {e}")
+        failures = [(obj, e) for obj in batch.objects.values()]
+        batch.clear()
+    flush_seconds = time.perf_counter() - started
+    metrics.record_flush(flush_seconds)
+    failed = set()
+    for obj, error in failures:
+        metrics.record_failure(obj.pk, obj.title, error)
+        failed.add(obj.pk)
+    written = [duration for tmdb_id, duration in durations.items() if tmdb_id not in failed]
+    for duration in written:
+        metrics.record_title(duration + flush_seconds / len(written))
+
+
+def get_popular_movies_from_tmdb(page=1, force=False, metrics=None):
     """
     Функция для загрузки популярных фильмов из TMDB API и сохранения их в базу данных.
+    Детали уже актуальных фильмов не запрашиваются, если не указан force.
+    Детали загружаются до начала транзакции, затем страница записывается
+    в одной транзакции, каждый фильм — в своей точке сохранения,
+    поэтому ошибка в одном фильме не отменяет остальные.
+    Возвращает метрики загрузки (накапливаются в metrics, если он передан).
     """
     api_key = get_api_key()
-    url = f"{TMDB_BASE_URL}/movie/popular"
+    url = f"{get_base_url()}/movie/popular"
     params = {
         'api_key': api_key,
         'language': 'ru-RU',
@@ -295,77 +365,94 @@ def get_popular_movies_from_tmdb(page=1):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        data = request_tmdb(url, params, cached=False)
     except requests.exceptions.RequestException as e:
         logger.error(f"Ошибка при запросе популярных фильмов: {e}")
         raise TMDBClientError(f"Ошибка при запросе популярных фильмов: {e}") from e
 
-    data = response.json()
     movies = data.get('results', [])
 
+    if metrics is None:
+        metrics = IngestionMetrics()
+    batch = IngestionBatch()
+    durations = {}
     for movie_data in movies:
-        process_movie(movie_data)
+        started = time.perf_counter()
+        if process_movie(movie_data, batch, force=force, metrics=metrics):
+            durations[movie_data['id']] = time.perf_counter() - started
+    write_page(batch, metrics, durations, f"страницы {page} популярных фильмов")
+    metrics.pages += 1
+    return metrics
 
 
-def process_movie(movie_data):
+def process_movie(movie_data, batch=None, force=False, metrics=None):
+    """
+    Функция для подготовки фильма из списка популярных и загрузки его деталей.
+    Фильм и его связи добавляются в пакет batch и записываются при его flush();
+    если пакет не передан, данные записываются сразу.
+    Детали фильма, синхронизированного в пределах окна актуальности,
+    не запрашиваются, если не указан force; с force запись кэша
+    ответов TMDB перепроверяется условным запросом.
+    Возвращает False, если фильм не удалось обработать
+    (он учитывается в metrics как незагруженный).
+    """
+    own_batch = batch is None
+    if own_batch:
+        batch = IngestionBatch()
     tmdb_id = movie_data['id']
     title = movie_data['title']
-    overview = movie_data.get('overview', '')
-    release_date = movie_data.get('release_date', None)
-    poster_path = movie_data.get('poster_path', '')
-    vote_average = movie_data.get('vote_average', 0.0)
-    genre_ids = movie_data.get('genre_ids', [])
-
-    poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" \
-        if poster_path else DEFAULT_POSTER_URL
-
-    genres_objects = get_movie_genres(genre_ids)
 
+    movie = None
     try:
-        movie, created = Movie.objects.get_or_create(
-            tmdb_id=tmdb_id,
-            defaults={
-                'title': title,
-                'description': overview,
-                'release_date': release_date,
-                'poster_url': poster_url,
-                'rating': min(100, int(vote_average * 10)),
-            }
-        )
-        if created:
-            movie.genres.set(genres_objects)
+        movie = Movie.objects.filter(tmdb_id=tmdb_id).first()
+        if movie is None:
+            movie = build_movie(movie_data)
+            batch.add_genres(movie, movie_data.get('genre_ids', []))
             logger.info(f"Добавлен новый фильм: {title}")
+        elif not force and movie.is_fresh(get_sync_freshness()):
+            logger.info(f"Фильм актуален, пропускаем: {title}")
+            return True
         else:
             logger.info(f"Фильм уже существует: {title}")
 
-        get_movie_details(tmdb_id, movie)
+        if not get_movie_details(tmdb_id, movie, batch, revalidate=force):
+            raise TMDBClientError(f"Не удалось загрузить детали фильма {tmdb_id}")
     except Exception as e:
-        logger.error(f"Ошибка при обработке фильма {title}: {e}")
+        logger.error(f"Ошибка при обработке фильма {title} (tmdb_id={tmdb_id}): {e}")
+        if movie is not None:
+            batch.discard(movie)
+        if metrics is not None:
+            metrics.record_failure(tmdb_id, title, e)
+        return False
+    return not own_batch or flush_title(batch, metrics)
 
 
-def get_movie_genres(genre_ids):
-    genres_objects = []
-    for gid in genre_ids:
-        try:
-            genre, created = Genre.objects.get_or_create(
-                tmdb_id=gid,
-                defaults={'name': f'Genre {gid}'}
-            )
-            if created:
-                logger.info(f"Добавлен новый жанр с tmdb_id {gid}: Genre {gid}")
-            genres_objects.append(genre)
-        except Exception as e:
-            logger.error(f"Ошибка при обработке жанра {gid}: {e}")
-    return genres_objects
-
-
-def get_popular_series_from_tmdb(page=1):
+def build_movie(movie_data):
+    """Создаёт несохранённый фильм из записи списка популярных TMDB."""
+    poster_path = movie_data.get('poster_path', '')
+    return Movie(
+        pk=movie_data['id'],
+        tmdb_id=movie_data['id'],
+        title=movie_data['title'],
+        description=movie_data.get('overview', ''),
+        release_date=movie_data.get('release_date', None),
+        poster_url=f"https://image.tmdb.org/t/p/w500{poster_path}"
+        if poster_path else DEFAULT_POSTER_URL,
+        rating=to_rating(movie_data.get('vote_average', 0.0)),
+    )
+
+
+def get_popular_series_from_tmdb(page=1, force=False, metrics=None):
     """
     Функция для загрузки популярных сериалов из TMDB API и сохранения их в базу данных.
+    Детали уже актуальных сериалов не запрашиваются, если не указан force.
+    Детали загружаются до начала транзакции, затем страница записывается
+    в одной транзакции, каждый сериал — в своей точке сохранения,
+    поэтому ошибка в одном сериале не отменяет остальные.
+    Возвращает метрики загрузки (накапливаются в metrics, если он передан).
     """
     api_key = get_api_key()
-    url = f"{TMDB_BASE_URL}/tv/popular"
+    url = f"{get_base_url()}/tv/popular"
     params = {
         'api_key': api_key,
         'language': 'ru-RU',
@@ -373,59 +460,96 @@ def get_popular_series_from_tmdb(page=1):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        data = request_tmdb(url, params, cached=False)
     except requests.exceptions.RequestException as e:
         logger.error(f"Ошибка при запросе популярных сериалов: {e}")
         raise TMDBClientError(f"Ошибка при запросе популярных сериалов: {e}") from e
 
-    data = response.json()
     series_list = data.get('results', [])
 
+    if metrics is None:
+        metrics = IngestionMetrics()
+    batch = IngestionBatch()
+    durations = {}
     for series_data in series_list:
-        process_series(series_data)
+        started = time.perf_counter()
+        if process_series(series_data, batch, force=force, metrics=metrics):
+            durations[series_data['id']] = time.perf_counter() - started
+    write_page(batch, metrics, durations, f"страницы {page} популярных сериалов")
+    metrics.pages += 1
+    return metrics
 
 
-def process_series(series_data):
+def process_series(series_data, batch=None, force=False, metrics=None):
+    """
+    Функция для подготовки сериала из списка популярных и загрузки его деталей.
+    Сериал и его связи добавляются в пакет batch и записываются при его flush();
+    если пакет не передан, данные записываются сразу.
+    Детали сериала, синхронизированного в пределах окна актуальности,
+    не запрашиваются, если не указан force; с force запись кэша
+    ответов TMDB перепроверяется условным запросом.
+    Возвращает False, если сериал не удалось обработать
+    (он учитывается в metrics как незагруженный).
+    """
+    own_batch = batch is None
+    if own_batch:
+        batch = IngestionBatch()
     tmdb_id = series_data['id']
     title = extract_series_title(series_data)
-    overview = series_data.get('overview', '')
-    first_air_date = series_data.get('first_air_date', None)
+
+    series = None
+    try:
+        series = Series.objects.filter(tmdb_id=tmdb_id).first()
+        if series is None:
+            series = build_series(series_data, title)
+            batch.add_genres(series, series_data.get('genre_ids', []))
+            logger.info(f"Добавлен новый сериал: {title}")
+        elif not force and series.is_fresh(get_sync_freshness()):
+            logger.info(f"Сериал актуален, пропускаем: {title}")
+            return True
+        elif update_series_title(series, title):
+            batch.add_object(series)
+
+        if not get_series_details(tmdb_id, series, batch, revalidate=force):
+            raise TMDBClientError(f"Не удалось загрузить детали сериала {tmdb_id}")
+    except Exception as e:
+        logger.error(f"Ошибка при обработке сериала {title} (tmdb_id={tmdb_id}): {e}")
+        if series is not None:
+            batch.discard(series)
+        if metrics is not None:
+            metrics.record_failure(tmdb_id, title, e)
+        return False
+    return not own_batch or flush_title(batch, metrics)
+
+
+def build_series(series_data, title):
+    """Создаёт несохранённый сериал из записи списка популярных TMDB."""
     poster_path = series_data.get('poster_path', '')
-    vote_average = series_data.get('vote_average', 0.0)
-    genre_ids = series_data.get('genre_ids', [])
     number_of_seasons = series_data.get('number_of_seasons', 0)
     number_of_episodes = series_data.get('number_of_episodes', 0)
-
     logger.info(f"Загрузка сериала {title}: seasons={number_of_seasons},"
                 f" episodes={number_of_episodes}")
-
-    poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" \
-        if poster_path else DEFAULT_POSTER_URL
-    genres_objects = get_series_genres(genre_ids)
-
-    try:
-        series, created = Series.objects.get_or_create(
-            tmdb_id=tmdb_id,
-            defaults={
-                'title': title,
-                'description': overview,
-                'release_date': first_air_date,
-                'poster_url': poster_url,
-                'rating': min(100, int(vote_average * 10)),
-                'seasons': number_of_seasons,
-                'episodes': number_of_episodes,
-            }
-        )
-        if created:
-            series.genres.set(genres_objects)
-            logger.info(f"Добавлен новый сериал: {title}")
-        else:
-            update_series_title(series, title)
-
-        get_series_details(tmdb_id, series)
-    except Exception as e:
-        logger.error(f"Ошибка при обработке сериала {title}: {e}")
+    return Series(
+        pk=series_data['id'],
+        tmdb_id=series_data['id'],
+        title=title,
+        description=series_data.get('overview', ''),
+        release_date=series_data.get('first_air_date', None),
+        poster_url=f"https://image.tmdb.org/t/p/w500{poster_path}"
+        if poster_path else DEFAULT_POSTER_URL,
+        rating=to_rating(series_data.get('vote_average', 0.0)),
+        seasons=number_of_seasons,
+        episodes=number_of_episodes,
+    )
+
+
+def flush_title(batch, metrics=None):
+    """Записывает пакет одного тайтла. Возвращает False, если тайтл не записан."""
+    failures = batch.flush()
+    for obj, error in failures:
+        if metrics is not None:
+            metrics.record_failure(obj.pk, obj.title, error)
+    return not failures
 
 
 def extract_series_title(series_data):
@@ -439,24 +563,10 @@ def extract_series_title(series_data):
     return title_ru
 
 
-def get_series_genres(genre_ids):
-    genres_objects = []
-    for gid in genre_ids:
-        try:
-            genre, created = Genre.objects.get_or_create(
-                tmdb_id=gid,
-                defaults={'name': f'Genre {gid}'}
-            )
-            if created:
-                logger.info(f"Добавлен новый жанр с tmdb_id {gid}: Genre {gid}")
-            genres_objects.append(genre)
-        except Exception as e:
-            logger.error(f"Ошибка при обработке жанра {gid}: {e}")
-    return genres_objects
-
-
 def update_series_title(series, new_title):
-    if series.title != new_title:
-        series.title = new_title
-        series.save()
-        logger.info(f"Обновлено название сериала: {new_title}")
+    """Меняет название сериала (без записи в базу). Возвращает True, если оно изменилось."""
+    if series.title == new_title:
+        return False
+    series.title = new_title
+    logger.info(f"Обновлено название сериала: {new_title}")
+    return True
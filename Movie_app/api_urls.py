@@ -0,0 +1,26 @@
+"""
+Этот модуль отвечает за маршрутизацию URL JSON API каталога.
+"""
+from django.urls import path
+from . import api_views
+
+app_name = 'api'
+
+LIST = {'get': 'list'}
+DETAIL = {'get': 'retrieve'}
+
+urlpatterns = [
+    path('actors/', api_views.ActorViewSet.as_view(LIST), name='actor_list'),
+    path('actors/<int:pk>/', api_views.ActorViewSet.as_view(DETAIL), name='actor_detail'),
+    path('content/', api_views.ContentViewSet.as_view(LIST), name='content_list'),
+    path('content/<int:tmdb_id>/', api_views.ContentViewSet.as_view(DETAIL),
+         name='content_detail'),
+    path('countries/', api_views.CountryViewSet.as_view(LIST), name='country_list'),
+    path('countries/<str:pk>/', api_views.CountryViewSet.as_view(DETAIL),
+         name='country_detail'),
+    path('directors/', api_views.DirectorViewSet.as_view(LIST), name='director_list'),
+    path('directors/<int:pk>/', api_views.DirectorViewSet.as_view(DETAIL),
+         name='director_detail'),
+    path('genres/', api_views.GenreViewSet.as_view(LIST), name='genre_list'),
+    path('genres/<int:pk>/', api_views.GenreViewSet.as_view(DETAIL), name='genre_detail'),
+]
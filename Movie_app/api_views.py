@@ -0,0 +1,257 @@
+"""
+Этот модуль отвечает за JSON API каталога только для чтения: контент,
+жанры, актёры, режиссёры и страны. Списки выводятся постранично по ключу
+(KeysetPaginator) с непрозрачным курсором, параметр ?fields= оставляет
+в ответе только нужные поля (и читает из базы только их столбцы),
+а ?include= добавляет связанные сущности, загружаемые пакетом для всей страницы.
+Условные GET-запросы обрабатываются так же, как для HTML-страниц (ETag каталога).
+"""
+from django.db.models import F
+from rest_framework import viewsets
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .conditional import ConditionalResponseMixin, content_etag, content_last_modified
+from .entity_stats import ranked_entities
+from .models import Actor, ContentSummary, Country, Director, Genre, Movie, Series
+from .pagination import InvalidCursor, KeysetPaginator
+from .serializers import (ActorSerializer, ContentSerializer, CountrySerializer,
+                          DirectorSerializer, GenreSerializer)
+from .summaries import entity_summaries, summary_queryset
+
+MAX_PAGE_SIZE = 100
+
+INCLUDED_CONTENT = 20
+
+CONTENT_INCLUDES = {
+    'actors': 'actors',
+    'directors': 'director',
+    'countries': 'created_in',
+}
+
+
+def _linked_entities(relation, by_kind):
+    """
+    Строки (pk контента, id сущности, название) связи relation для контента
+    {модель: [pk]}: один запрос к промежуточной таблице на тип контента.
+    """
+    rows = []
+    for model, pks in by_kind.items():
+        field = next((field for field in model._meta.many_to_many
+                      if field.name == relation), None)
+        if field is None or not pks:
+            continue
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        rows.extend(field.remote_field.through.objects.filter(**{f'{source}_id__in': pks})
+                    .order_by('pk')
+                    .values_list(f'{source}_id', f'{target}_id', f'{target}__name'))
+    return rows
+
+
+def _param_set(request, name):
+    """Значения параметра запроса через запятую или None, если параметра нет."""
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Постраничный вывод API по ключу сортировки представления (keyset_ordering).
+    Размер страницы задаётся параметром ?page_size= (не больше MAX_PAGE_SIZE),
+    общее количество записей не считается.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request, view):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, ''))
+        except ValueError:
+            return view.page_size
+        return max(1, min(page_size, MAX_PAGE_SIZE))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = KeysetPaginator(queryset, self.get_page_size(request, view),
+                                    view.keyset_ordering)
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor as e:
+            raise NotFound(str(e)) from e
+        return list(self.page)
+
+    def _link(self, cursor):
+        url = remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor) if cursor else None
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
+
+
+class CatalogViewSet(ConditionalResponseMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Базовое представление API каталога: разбор ?fields= и ?include=
+    и передача их сериализатору.
+    """
+    pagination_class = KeysetCursorPagination
+    page_size = 20
+    keyset_ordering = None
+    include_options = ()
+
+    def get_fields(self):
+        """Запрошенные поля (None — все) с проверкой имён."""
+        fields = _param_set(self.request, 'fields')
+        if fields is not None:
+            unknown = fields - set(self.serializer_class.field_names())
+            if unknown:
+                raise ValidationError({'fields': f"Неизвестные поля: {', '.join(sorted(unknown))}"})
+        return fields
+
+    def get_include(self):
+        """Запрошенные связанные сущности с проверкой имён."""
+        include = _param_set(self.request, 'include') or set()
+        unknown = include - set(self.include_options)
+        if unknown:
+            raise ValidationError({'include': f"Нельзя включить: {', '.join(sorted(unknown))}"})
+        return include
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.sparse_fields = self.get_fields()
+        self.include = self.get_include()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = getattr(self, 'sparse_fields', None)
+        context['include'] = getattr(self, 'include', set())
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        if args:
+            self.load_included(args[0] if kwargs.get('many') else [args[0]])
+        return super().get_serializer(*args, **kwargs)
+
+    def load_included(self, objects):
+        """Загружает связанные сущности ?include= для объектов страницы."""
+
+
+class ContentViewSet(CatalogViewSet):
+    """
+    Фильмы и сериалы из карточек контента (ContentSummary) по убыванию рейтинга.
+    ?kind=movie|series оставляет только фильмы или сериалы.
+    """
+    serializer_class = ContentSerializer
+    keyset_ordering = ('-rating', '-content_id')
+    lookup_field = 'content_id'
+    lookup_url_kwarg = 'tmdb_id'
+    include_options = ('genres', 'actors', 'directors', 'countries')
+
+    def get_etag(self, request, *args, **kwargs):
+        if 'tmdb_id' in kwargs:
+            return content_etag(request, kwargs['tmdb_id'])
+        return super().get_etag(request, *args, **kwargs)
+
+    def get_last_modified(self, request, *args, **kwargs):
+        if 'tmdb_id' in kwargs:
+            return content_last_modified(request, kwargs['tmdb_id'])
+        return None
+
+    def get_queryset(self):
+        queryset = summary_queryset()
+        kind = self.request.query_params.get('kind')
+        if kind in (ContentSummary.MOVIE, ContentSummary.SERIES):
+            queryset = queryset.filter(kind=kind)
+        if self.sparse_fields is not None:
+            columns = self.sparse_fields - {'id'}
+            if 'genres' in self.include:
+                columns.update(('genre_ids', 'genre_names'))
+            queryset = queryset.only('kind', 'rating', *columns)
+        return queryset
+
+    def load_included(self, objects):
+        """
+        Жанры берутся из самой карточки, остальные связи — одним запросом
+        к промежуточной таблице на связь и тип контента для всей страницы.
+        """
+        if not self.include:
+            return
+        by_kind = {Movie: [], Series: []}
+        for obj in objects:
+            by_kind[Series if obj.is_series else Movie].append(obj.pk)
+            if 'genres' in self.include:
+                obj.genres = [{'id': key, 'name': name}
+                              for key, name in zip(obj.genre_ids, obj.genre_names)]
+        links = {}
+        for include, relation in CONTENT_INCLUDES.items():
+            if include in self.include:
+                for pk, key, name in _linked_entities(relation, by_kind):
+                    links.setdefault((pk, include), []).append({'id': key, 'name': name})
+        for obj in objects:
+            for include in CONTENT_INCLUDES:
+                if include in self.include:
+                    setattr(obj, include, links.get((obj.pk, include), []))
+
+
+class EntityViewSet(CatalogViewSet):
+    """
+    Жанры, актёры, режиссёры или страны вместе с агрегатами по убыванию популярности.
+    На странице одной сущности ?include=content добавляет её самые рейтинговые тайтлы.
+    """
+    model = None
+    content_relation = None
+    include_options = ('content',)
+
+    @property
+    def keyset_ordering(self):
+        return ('-popularity', f'-{self.model._meta.pk.name}')
+
+    def get_queryset(self):
+        return ranked_entities(self.model).annotate(popularity=F('stats__popularity'))
+
+    def list(self, request, *args, **kwargs):
+        if self.include:
+            raise ValidationError({'include': "Связанный контент выводится только "
+                                              "на странице одной сущности."})
+        return super().list(request, *args, **kwargs)
+
+    def load_included(self, objects):
+        if 'content' in self.include:
+            for obj in objects:
+                obj.top_content = list(entity_summaries(obj, self.content_relation)
+                                       .order_by('-rating', '-content_id')[:INCLUDED_CONTENT])
+
+
+class GenreViewSet(EntityViewSet):
+    """Жанры."""
+    model = Genre
+    serializer_class = GenreSerializer
+    content_relation = 'genres'
+
+
+class ActorViewSet(EntityViewSet):
+    """Актёры."""
+    model = Actor
+    serializer_class = ActorSerializer
+    content_relation = 'actors'
+
+
+class DirectorViewSet(EntityViewSet):
+    """Режиссёры."""
+    model = Director
+    serializer_class = DirectorSerializer
+    content_relation = 'director'
+
+
+class CountryViewSet(EntityViewSet):
+    """Страны."""
+    model = Country
+    serializer_class = CountrySerializer
+    content_relation = 'created_in'
@@ -0,0 +1,331 @@
+"""
+Этот модуль отвечает за подсказки при вводе названий фильмов и сериалов,
+имён актёров и режиссёров и названий жанров.
+Для каждого вида сущностей в памяти процесса хранится отсортированный список
+нормализованных ключей (название целиком и его окончания с начала каждого слова),
+поэтому поиск по префиксу сводится к двоичному поиску. Лучшие результаты
+для префиксов с большим числом совпадений вычисляются заранее.
+Индекс строится в фоновом потоке, обновляется при сохранении объектов в этом
+процессе и полностью перестраивается в фоне раз в AUTOCOMPLETE_REFRESH_INTERVAL секунд.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from types import SimpleNamespace
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.urls import reverse
+from .listing import listing_queryset
+from .models import Actor, Director, Genre, Movie, Series
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('content', 'actor', 'director', 'genre')
+
+ENTITY_KINDS = {Actor: 'actor', Director: 'director', Genre: 'genre'}
+
+DETAIL_URLS = {
+    'content': 'Movie_app:content_detail',
+    'actor': 'Movie_app:actor_detail',
+    'director': 'Movie_app:director_detail',
+    'genre': 'Movie_app:genre_detail',
+}
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+
+# Лучших записей префикса хранится с запасом: первой странице справочника
+# (lookups.PAGE_SIZE + 1 вариант) тоже хватает заранее вычисленных.
+TOP_SIZE = 32
+
+SCAN_LIMIT = 256
+
+NORMALIZE_RE = re.compile(r'[\W_]+')
+
+_state = SimpleNamespace(indexes=None, built_at=0.0, rebuilding=False, generation=0)
+_lock = threading.RLock()
+
+
+def normalize(text):
+    """Приводит текст к виду для сравнения: нижний регистр, ё → е, без знаков препинания."""
+    return NORMALIZE_RE.sub(' ', text.lower().replace('ё', 'е')).strip()
+
+
+def entry_keys(label):
+    """Ключи записи: нормализованное название и его окончания с начала каждого слова."""
+    words = normalize(label).split()
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+class PrefixIndex:
+    """Отсортированный индекс префиксов для одного вида сущностей."""
+
+    def __init__(self, entries=()):
+        self.entries = {}
+        self.keys = []
+        self.refs = []
+        self.top = {}
+        self.lock = threading.Lock()
+        pairs = []
+        for ref, label, score in entries:
+            self.entries[ref] = (label, score)
+            pairs.extend((key, ref) for key in entry_keys(label))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.refs = [ref for _, ref in pairs]
+        self._warm()
+
+    def _range(self, prefix, lo=0, hi=None):
+        hi = len(self.keys) if hi is None else hi
+        start = bisect_left(self.keys, prefix, lo, hi)
+        return start, bisect_left(self.keys, prefix + '\uffff', start, hi)
+
+    def _best(self, lo, hi, limit=TOP_SIZE):
+        refs = set(self.refs[lo:hi])
+        return heapq.nsmallest(limit, refs, key=lambda ref: (-self.entries[ref][1],
+                                                             self.entries[ref][0]))
+
+    def _warm(self):
+        """Заранее вычисляет лучшие записи для префиксов с более чем SCAN_LIMIT ключами."""
+        stack = ['']
+        while stack:
+            prefix = stack.pop()
+            lo, hi = self._range(prefix)
+            if hi - lo <= SCAN_LIMIT:
+                continue
+            if prefix:
+                self.top[prefix] = self._best(lo, hi)
+            position = lo
+            while position < hi:
+                key = self.keys[position]
+                if len(key) <= len(prefix):
+                    position += 1
+                    continue
+                child = key[:len(prefix) + 1]
+                stack.append(child)
+                position = self._range(child, position, hi)[1]
+
+    def lookup(self, prefix, limit=DEFAULT_LIMIT, offset=0):
+        """
+        Возвращает до limit пар (ref, название) с ключом, начинающимся с prefix,
+        пропустив первые offset лучших записей.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self.lock:
+            if offset + limit > TOP_SIZE:
+                refs = self._best(*self._range(prefix), limit=offset + limit)
+            else:
+                refs = self.top.get(prefix)
+                if refs is None:
+                    lo, hi = self._range(prefix)
+                    refs = self._best(lo, hi)
+                    if hi - lo > SCAN_LIMIT:
+                        self.top[prefix] = refs
+            return [(ref, self.entries[ref][0]) for ref in refs[offset:offset + limit]]
+
+    def _invalidate(self, keys):
+        for key in keys:
+            for length in range(1, len(key) + 1):
+                self.top.pop(key[:length], None)
+
+    def remove(self, ref):
+        """Удаляет запись ref из индекса."""
+        with self.lock:
+            entry = self.entries.pop(ref, None)
+            if entry is None:
+                return
+            keys = entry_keys(entry[0])
+            for key in keys:
+                lo, hi = self._range(key)
+                for position in range(lo, hi):
+                    if self.keys[position] == key and self.refs[position] == ref:
+                        del self.keys[position]
+                        del self.refs[position]
+                        break
+            self._invalidate(keys)
+
+    def update(self, ref, label, score=None):
+        """Добавляет или обновляет запись ref (без score сохраняется прежняя оценка)."""
+        if score is None:
+            score = self.entries.get(ref, (label, 0))[1]
+        self.remove(ref)
+        with self.lock:
+            self.entries[ref] = (label, score)
+            keys = entry_keys(label)
+            for key in keys:
+                position = bisect_left(self.keys, key)
+                while position < len(self.keys) and self.keys[position] == key \
+                        and self.refs[position] < ref:
+                    position += 1
+                self.keys.insert(position, key)
+                self.refs.insert(position, ref)
+            self._invalidate(keys)
+
+    def rescore(self, ref, score):
+        """Меняет оценку записи ref, если она есть в индексе."""
+        with self.lock:
+            entry = self.entries.get(ref)
+            if entry is None or entry[1] == score:
+                return
+            self.entries[ref] = (entry[0], score)
+            self._invalidate(entry_keys(entry[0]))
+
+
+def _title_counts(relation):
+    """Возвращает {id сущности: количество фильмов и сериалов с ней}."""
+    counts = {}
+    for model in (Movie, Series):
+        field = next((field for field in model._meta.many_to_many
+                      if field.name == relation), None)
+        if field is None:
+            continue
+        target = f"{field.m2m_reverse_field_name()}_id"
+        rows = field.remote_field.through.objects.values(target).annotate(total=Count('pk'))
+        for row in rows:
+            counts[row[target]] = counts.get(row[target], 0) + row['total']
+    return counts
+
+
+def build_autocomplete():
+    """Строит индексы подсказок всех видов фиксированным числом запросов."""
+    contents = listing_queryset().values_list('pk', 'title', 'rating')
+    indexes = {'content': PrefixIndex((pk, title, rating or 0) for pk, title, rating in contents)}
+    for kind, model, relation in (('actor', Actor, 'actors'), ('director', Director, 'director'),
+                                  ('genre', Genre, 'genres')):
+        counts = _title_counts(relation)
+        indexes[kind] = PrefixIndex((pk, name, counts.get(pk, 0))
+                                    for pk, name in model.objects.values_list('pk', 'name'))
+    return indexes
+
+
+def _rebuild(generation):
+    try:
+        indexes = build_autocomplete()
+        with _lock:
+            if generation != _state.generation:
+                return
+            _state.indexes, _state.built_at = indexes, time.monotonic()
+        logger.info("Индекс подсказок перестроен")
+    except Exception as e:
+        logger.error(f"Ошибка перестроения индекса подсказок: {e}")
+    finally:
+        with _lock:
+            if generation == _state.generation:
+                _state.rebuilding = False
+
+
+def _rebuild_in_background(generation):
+    try:
+        _rebuild(generation)
+    finally:
+        connection.close()
+
+
+def _start_rebuild(background=True):
+    """Запускает перестроение индексов (под _lock): в фоновом потоке или сразу."""
+    _state.rebuilding = True
+    if background:
+        threading.Thread(target=_rebuild_in_background, args=(_state.generation,),
+                         daemon=True).start()
+    else:
+        _rebuild(_state.generation)
+
+
+def get_autocomplete(wait=False):
+    """
+    Возвращает индексы подсказок текущего процесса. Первый вызов запускает
+    построение в фоновом потоке (если AUTOCOMPLETE_BUILD_IN_BACKGROUND) и, пока
+    индексы не готовы, возвращает None; wait=True строит их сразу. Устаревшие
+    индексы перестраиваются в фоновом потоке.
+    """
+    with _lock:
+        if _state.indexes is None:
+            background = getattr(settings, 'AUTOCOMPLETE_BUILD_IN_BACKGROUND', True) and not wait
+            if not _state.rebuilding or not background:
+                _start_rebuild(background)
+            return _state.indexes
+        interval = getattr(settings, 'AUTOCOMPLETE_REFRESH_INTERVAL', 15 * 60)
+        if time.monotonic() - _state.built_at > interval and not _state.rebuilding:
+            _start_rebuild()
+        return _state.indexes
+
+
+def reset_autocomplete():
+    """Сбрасывает индексы подсказок текущего процесса."""
+    with _lock:
+        _state.indexes, _state.rebuilding = None, False
+        _state.generation += 1
+
+
+def suggest(query, kinds=KINDS, limit=DEFAULT_LIMIT):
+    """Возвращает подсказки по префиксу query для видов сущностей kinds."""
+    indexes = get_autocomplete() or {}
+    results = []
+    for kind in kinds:
+        for ref, label in indexes[kind].lookup(query, limit) if kind in indexes else ():
+            results.append({'kind': kind, 'id': ref, 'label': label,
+                            'url': reverse(DETAIL_URLS[kind], args=[ref])})
+    return results
+
+
+def match_title(name):
+    """
+    Находит фильм или сериал по введённому названию: точное совпадение
+    нормализованного названия, иначе самый популярный тайтл с таким началом слова.
+    Возвращает tmdb_id или None.
+    """
+    indexes = get_autocomplete()
+    if not indexes:
+        return None
+    matches = indexes['content'].lookup(name, MAX_LIMIT)
+    normalized = normalize(name)
+    for ref, label in matches:
+        if normalize(label) == normalized:
+            return ref
+    return matches[0][0] if matches else None
+
+
+def refresh_entry(kind, ref, label=None, score=None):
+    """
+    Обновляет (или удаляет, если label не задан) запись индекса подсказок
+    этого процесса, если индекс уже построен.
+    """
+    indexes = _state.indexes
+    if indexes is None:
+        return
+    if label is None:
+        indexes[kind].remove(ref)
+    else:
+        indexes[kind].update(ref, label, score)
+
+
+def refresh_entities(model, names):
+    """
+    Добавляет или переименовывает в индексе подсказок этого процесса сущности
+    {pk: название}, записанные пакетом без сигналов post_save.
+    """
+    kind = ENTITY_KINDS.get(model)
+    indexes = _state.indexes
+    if kind is None or indexes is None:
+        return
+    for pk, name in names.items():
+        indexes[kind].update(pk, name)
+
+
+def refresh_scores(model, scores):
+    """
+    Обновляет оценки (число тайтлов) сущностей {pk: оценка} в индексе подсказок
+    этого процесса после пересчёта агрегатов.
+    """
+    kind = ENTITY_KINDS.get(model)
+    indexes = _state.indexes
+    if kind is None or indexes is None:
+        return
+    for pk, score in scores.items():
+        indexes[kind].rescore(pk, score)
@@ -0,0 +1,284 @@
+"""
+Этот модуль отвечает за офлайн-загрузку каталога из JSONL-дампов
+(ежедневные выгрузки ID TMDB или собственные снимки с деталями контента).
+Дамп читается построчно, записи накапливаются в пакеты и загружаются
+через COPY в PostgreSQL или через bulk_create в остальных СУБД.
+"""
+import gzip
+import io
+import json
+import logging
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from .api import to_rating, DEFAULT_POSTER_URL
+from .ingestion import bulk_upsert, parse_actors, parse_countries, parse_directors
+from .models import Actor, Content, Country, Director, Genre, Movie, Series
+from .response_cache import bump_catalog_version
+from .entity_stats import schedule_stats_refresh
+from .facets import mark_dirty
+from .search import schedule_refresh
+from .summaries import schedule_summary_refresh
+from .shelves import invalidate_shelves
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+TITLE_MAX_LENGTH = Content._meta.get_field('title').max_length
+
+
+def open_dump(path):
+    """Открывает дамп в бинарном режиме, распаковывая gzip по расширению .gz."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_dump(path, offset=0):
+    """
+    Построчно читает JSONL-дамп начиная с позиции offset
+    (в байтах распакованного потока).
+    Возвращает пары (запись, позиция после строки).
+    """
+    with open_dump(path) as dump:
+        if offset:
+            dump.seek(offset)
+        for line in iter(dump.readline, b''):
+            position = dump.tell()
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line), position
+            except json.JSONDecodeError as e:
+                logger.error(f"Некорректная строка дампа перед позицией {position}: {e}")
+
+
+def detect_media_type(record, default=None):
+    """Определяет тип записи: 'movie' или 'tv'."""
+    media_type = record.get('media_type') or default
+    if media_type:
+        return 'tv' if media_type in ('tv', 'series') else 'movie'
+    if 'original_name' in record or 'first_air_date' in record:
+        return 'tv'
+    return 'movie'
+
+
+def parse_genres(record):
+    """Возвращает словарь {tmdb_id: name} жанров записи."""
+    genres = {genre['id']: genre['name'] for genre in record.get('genres', [])}
+    for gid in record.get('genre_ids', []):
+        genres.setdefault(gid, f'Genre {gid}')
+    return genres
+
+
+def map_record(record, default_media_type=None):
+    """
+    Преобразует запись дампа в несохранённый объект Movie или Series
+    и словарь его связей. Возвращает None для записей без id или названия.
+    """
+    media_type = detect_media_type(record, default_media_type)
+    if media_type == 'tv':
+        title = record.get('name') or record.get('original_name')
+        release_date = record.get('first_air_date')
+    else:
+        title = record.get('title') or record.get('original_title')
+        release_date = record.get('release_date')
+    if not record.get('id') or not title:
+        return None
+
+    poster_path = record.get('poster_path')
+    fields = {
+        'tmdb_id': record['id'],
+        'title': title[:TITLE_MAX_LENGTH],
+        'description': record.get('overview') or '',
+        'release_date': release_date or None,
+        'poster_url': f"https://image.tmdb.org/t/p/w500{poster_path}"
+        if poster_path else DEFAULT_POSTER_URL,
+        'rating': to_rating(record.get('vote_average')),
+    }
+    if media_type == 'tv':
+        obj = Series(seasons=record.get('number_of_seasons') or 0,
+                     episodes=record.get('number_of_episodes') or 0, **fields)
+    else:
+        obj = Movie(**fields)
+
+    relations = {
+        'genres': parse_genres(record),
+        'created_in': parse_countries(record),
+        'actors': parse_actors(record),
+    }
+    if media_type == 'movie':
+        relations['director'] = parse_directors(record)
+    return obj, relations
+
+
+class CatalogLoader:
+    """
+    Пакетный загрузчик каталога.
+    Уже существующий в базе контент пропускается, поэтому
+    повторная загрузка того же дампа безопасна.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, use_copy=None):
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.pending = {}
+        self.loaded = 0
+        self.skipped = 0
+
+    def add(self, record, default_media_type=None):
+        """Добавляет запись в пакет. Возвращает True, когда пакет заполнен."""
+        mapped = map_record(record, default_media_type)
+        if mapped is None:
+            self.skipped += 1
+        else:
+            self.pending[mapped[0].tmdb_id] = mapped
+        return len(self.pending) >= self.batch_size
+
+    def flush(self):
+        """Загружает накопленный пакет в одной транзакции."""
+        if not self.pending:
+            return 0
+        with transaction.atomic():
+            existing = set(Content.objects.filter(pk__in=list(self.pending))
+                           .values_list('pk', flat=True))
+            batch = [item for tmdb_id, item in self.pending.items() if tmdb_id not in existing]
+            entities = self._load_entities(batch)
+            for model in (Movie, Series):
+                objects = [obj for obj, _ in batch if isinstance(obj, model)]
+                if objects:
+                    self._load_content(model, objects)
+            self._load_links(batch, entities)
+            if batch:
+                loaded = [obj.pk for obj, _ in batch]
+                transaction.on_commit(invalidate_shelves)
+                transaction.on_commit(bump_catalog_version)
+                transaction.on_commit(lambda: mark_dirty(loaded))
+                schedule_refresh(loaded)
+                schedule_summary_refresh(loaded)
+                schedule_stats_refresh(content_pks=loaded)
+        self.skipped += len(existing)
+        self.loaded += len(batch)
+        self.pending = {}
+        return len(batch)
+
+    def _load_entities(self, batch):
+        """Создаёт жанры, страны, режиссёров и актёров пакета."""
+        collected = {'genres': {}, 'created_in': {}, 'director': {}, 'actors': {}}
+        for _, relations in batch:
+            for name, entities in relations.items():
+                collected[name].update(entities)
+        return {
+            Genre: bulk_upsert(Genre, collected['genres']),
+            Country: bulk_upsert(Country, collected['created_in']),
+            Director: bulk_upsert(Director, collected['director']),
+            Actor: bulk_upsert(Actor, collected['actors']),
+        }
+
+    def _load_content(self, model, objects):
+        """
+        Записывает строки базовой таблицы Content и таблицы подкласса.
+        bulk_create не поддерживает модели с многотабличным наследованием,
+        поэтому строки подкласса вставляются отдельным запросом.
+        """
+        ctype = ContentType.objects.get_for_model(model, for_concrete_model=False)
+        parent_fields = Content._meta.local_concrete_fields
+        child_fields = model._meta.local_concrete_fields
+        for obj in objects:
+            obj.polymorphic_ctype_id = ctype.pk
+            obj.content_ptr_id = obj.tmdb_id
+
+        if self.use_copy:
+            _copy_insert(Content, parent_fields, _rows(objects, parent_fields))
+        else:
+            Content.objects.bulk_create([
+                Content(**{field.attname: getattr(obj, field.attname)
+                           for field in parent_fields})
+                for obj in objects
+            ])
+        _insert(model, child_fields, _rows(objects, child_fields), self.use_copy)
+
+    def _load_links(self, batch, entities):
+        """Записывает строки промежуточных таблиц связей многие-ко-многим."""
+        links = {}
+        for obj, relations in batch:
+            for name, keys in relations.items():
+                field = type(obj)._meta.get_field(name)
+                existing = entities[field.related_model]
+                links.setdefault(field, []).extend(
+                    (obj.pk, key) for key in keys if key in existing)
+
+        for field, rows in links.items():
+            through = field.remote_field.through
+            columns = [through._meta.get_field(field.m2m_field_name()),
+                       through._meta.get_field(field.m2m_reverse_field_name())]
+            if self.use_copy:
+                _copy_insert(through, columns, rows)
+            else:
+                through.objects.bulk_create([
+                    through(**{columns[0].attname: source, columns[1].attname: target})
+                    for source, target in rows
+                ], ignore_conflicts=True)
+
+
+def _rows(objects, fields):
+    """Готовит значения полей объектов для вставки в базу данных."""
+    return [
+        [field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields]
+        for obj in objects
+    ]
+
+
+def _insert(model, fields, rows, use_copy):
+    """Вставляет строки в таблицу модели через COPY или executemany."""
+    if use_copy:
+        _copy_insert(model, fields, rows)
+        return
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})",
+            rows,
+        )
+
+
+def _copy_value(value):
+    """Форматирует значение для COPY в формате CSV."""
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_insert(model, fields, rows):
+    """
+    Загружает строки во временную таблицу через COPY и переносит их
+    в таблицу модели, пропуская конфликтующие строки.
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    temp_table = quote(f"tmp_{model._meta.db_table}")
+    columns = ', '.join(quote(field.column) for field in fields)
+    data = ''.join(','.join(_copy_value(value) for value in row) + '\n' for row in rows)
+    copy_sql = f"COPY {temp_table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS "
+                       f"SELECT {columns} FROM {table} WITH NO DATA")
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):
+            raw_cursor.copy_expert(copy_sql, io.StringIO(data))
+        else:
+            with raw_cursor.copy(copy_sql) as copy:
+                copy.write(data)
+        cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} "
+                       f"FROM {temp_table} ON CONFLICT DO NOTHING")
+        cursor.execute(f"DROP TABLE {temp_table}")
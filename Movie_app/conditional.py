@@ -0,0 +1,214 @@
+"""
+Этот модуль отвечает за условные GET-запросы (ETag / Last-Modified).
+Валидаторы вычисляются без обращения к тяжёлым запросам представлений:
+из версии каталога (response_cache), updated_at контента и версии данных
+пользователя (избранное, рекомендации), которая увеличивается сигналами
+приложения recommendations. Версии читаются из хранилища кэша ответов
+при каждом запросе и нигде не запоминаются в процессе, поэтому все воркеры
+и команды загрузки видят одни и те же значения. Если валидатор клиента или nginx совпадает,
+ответ 304 Not Modified возвращается до вызова представления.
+Метрики (полные ответы, ответы 304, отданные и сэкономленные байты)
+хранятся рядом с метриками кэша ответов.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from .models import Content
+from .response_cache import STATS_KEY_PREFIX, VIEWS_KEY, _record, _register, catalog_version, \
+    flush_response_cache_stats, response_cache
+
+logger = logging.getLogger(__name__)
+
+USER_VERSION_PREFIX = 'movie_app:user_version'
+SIZE_KEY_PREFIX = 'movie_app:response_size'
+SIZE_TIMEOUT = 24 * 60 * 60
+
+EVENTS = ('full', 'not_modified', 'bytes_sent', 'bytes_saved')
+
+
+def user_version(user_id):
+    """
+    Версия персональных данных пользователя (избранное, рекомендации).
+    Как и версия каталога, счётчик начинается с текущего времени в миллисекундах.
+    """
+    cache = response_cache()
+    key = f"{USER_VERSION_PREFIX}:{user_id}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1_000_000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    """Увеличивает версию данных пользователя, делая недействительными его ETag."""
+    cache = response_cache()
+    key = f"{USER_VERSION_PREFIX}:{user_id}"
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        user_version(user_id)
+        version = cache.incr(key)
+    logger.debug(f"Версия данных пользователя {user_id} увеличена до {version}")
+    return version
+
+
+def _user_part(request):
+    """
+    Часть ETag, зависящая от посетителя. Для вошедшего пользователя в неё входят
+    его id, версия его данных и хэш CSRF-cookie: после повторного входа токен
+    в форме страницы меняется, и сохранённая браузером копия не должна подойти.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return 'anon'
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    digest = hashlib.sha256(csrf.encode('utf-8')).hexdigest()[:12]
+    return f"u{user.pk}.{user_version(user.pk)}.{digest}"
+
+
+def catalog_etag(request, *args, **kwargs):
+    """ETag страниц каталога: версия каталога и посетитель."""
+    return f"{catalog_version()}-{_user_part(request)}"
+
+
+def _content_updated_at(request, tmdb_id):
+    """updated_at контента одним запросом по первичному ключу (запоминается в request)."""
+    if not hasattr(request, '_content_updated_at'):
+        request._content_updated_at = Content.objects.filter(pk=tmdb_id) \
+            .values_list('updated_at', flat=True).first()
+    return request._content_updated_at
+
+
+def content_etag(request, tmdb_id):
+    """ETag страницы контента или None, если контента нет (ответит само представление)."""
+    updated_at = _content_updated_at(request, tmdb_id)
+    if updated_at is None:
+        return None
+    return f"{tmdb_id}.{updated_at.timestamp():.6f}-{catalog_etag(request)}"
+
+
+def content_last_modified(request, tmdb_id):
+    """
+    Last-Modified страницы контента для анонимных посетителей. Персональные
+    страницы меняются вместе с избранным, поэтому для них используется только ETag.
+    """
+    if request.user.is_authenticated:
+        return None
+    return _content_updated_at(request, tmdb_id)
+
+
+def _size_key(request, etag):
+    digest = hashlib.sha256(f"{request.get_full_path()}:{etag}".encode('utf-8')).hexdigest()
+    return f"{SIZE_KEY_PREFIX}:{digest}"
+
+
+def validated_response(name, request, get_response):
+    """
+    Вызывает get_response() (представление, обёрнутое в condition) и учитывает
+    результат в метриках представления name (по умолчанию — имя маршрута).
+    Для ответа 304 размер сэкономленного тела берётся из размера последнего
+    полного ответа с тем же ETag.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return get_response()
+    name = name or request.resolver_match.url_name
+    _register(name)
+    response = get_response()
+    cache = response_cache()
+
+    if response.status_code == 304:
+        _record(name, 'not_modified')
+        size = cache.get(_size_key(request, response.get('ETag', '')))
+        if size:
+            _record(name, 'bytes_saved', size)
+        return response
+    if response.status_code != 200 or response.streaming or not response.has_header('ETag'):
+        return response
+
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True,
+                            s_maxage=getattr(settings, 'PROXY_CACHE_MAX_AGE', 30))
+    _record(name, 'full')
+
+    def measure(response):
+        size = len(response.content)
+        cache.set(_size_key(request, response['ETag']), size, SIZE_TIMEOUT)
+        _record(name, 'bytes_sent', size)
+
+    if callable(getattr(response, 'render', None)) and not response.is_rendered:
+        response.add_post_render_callback(measure)
+    else:
+        measure(response)
+    return response
+
+
+def conditional_page(etag_func=catalog_etag, last_modified_func=None, name=None):
+    """
+    Декоратор представления-функции: выставляет ETag / Last-Modified
+    и отвечает 304 Not Modified до вызова представления. Должен стоять
+    над cache_response, чтобы совпавший валидатор не доходил даже до кэша ответов.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func,
+                                     last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return validated_response(name, request,
+                                      lambda: conditional_view(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+class ConditionalResponseMixin:
+    """
+    Условные GET-запросы для представления-класса. Валидаторы задаются
+    методами get_etag и get_last_modified (по умолчанию — ETag каталога).
+    Миксин указывается перед CachedResponseMixin.
+    """
+
+    def get_etag(self, request, *args, **kwargs):
+        return catalog_etag(request)
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return None
+
+    def dispatch(self, request, *args, **kwargs):
+        view = condition(etag_func=self.get_etag,
+                         last_modified_func=self.get_last_modified)(super().dispatch)
+        return validated_response(None, request, lambda: view(request, *args, **kwargs))
+
+
+def conditional_stats():
+    """
+    Возвращает {представление: {full, not_modified, bytes_sent, bytes_saved,
+    not_modified_rate}} по всем процессам.
+    """
+    flush_response_cache_stats()
+    cache = response_cache()
+    names = sorted(cache.get(VIEWS_KEY) or ())
+    values = cache.get_many([f"{STATS_KEY_PREFIX}:{name}:{event}"
+                             for name in names for event in EVENTS])
+    stats = {}
+    for name in names:
+        row = {event: values.get(f"{STATS_KEY_PREFIX}:{name}:{event}", 0) for event in EVENTS}
+        if not row['full'] and not row['not_modified']:
+            continue
+        row['not_modified_rate'] = row['not_modified'] / (row['full'] + row['not_modified'])
+        stats[name] = row
+    return stats
+
+
+def reset_conditional_stats():
+    """Обнуляет счётчики условных запросов."""
+    flush_response_cache_stats()
+    cache = response_cache()
+    cache.delete_many([f"{STATS_KEY_PREFIX}:{name}:{event}"
+                       for name in cache.get(VIEWS_KEY) or () for event in EVENTS])
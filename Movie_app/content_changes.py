@@ -0,0 +1,64 @@
+"""
+Этот модуль собирает изменения фильмов и сериалов (сохранение, удаление, связи),
+о которых сообщают сигналы моделей, и обновляет всё, что от них зависит.
+Сразу, ещё внутри транзакции, контент помечается для фасетного индекса,
+увеличивается версия каталога (чтобы не закэшировать незафиксированное
+состояние), а ключи добавляются к очередям пересчёта поисковых документов,
+карточек и агрегатов сущностей. После фиксации один обработчик
+(apply_pending_changes) пересчитывает накопленное за транзакцию, обновляет
+подсказки и полки главной страницы и ещё раз увеличивает версию каталога.
+"""
+import threading
+from types import SimpleNamespace
+from django.db import transaction
+from .autocomplete import refresh_entry
+from .entity_stats import queue_stats_refresh, refresh_pending_stats
+from .facets import mark_dirty
+from .response_cache import bump_catalog_version
+from .search import queue_refresh, refresh_pending_documents
+from .shelves import invalidate_shelves
+from .summaries import queue_summary_refresh, refresh_pending_summaries
+
+_pending = threading.local()
+
+
+def record_change(pks=(), entities=None, titles=None):
+    """
+    Учитывает изменение контента pks и сущностей entities ({модель сущности: ключи}),
+    у которых изменился список контента. titles — {pk: (название, рейтинг)}
+    сохранённого контента или {pk: None} удалённого для подсказок.
+    """
+    pks = list(pks)
+    queue_summary_refresh(pks)
+    queue_refresh(pks)
+    queue_stats_refresh(pks, entities)
+    mark_dirty(pks)
+    bump_catalog_version()
+    changes = getattr(_pending, 'changes', None)
+    if changes is None:
+        changes = _pending.changes = SimpleNamespace(pks=set(), titles={})
+    changes.pks.update(pks)
+    changes.titles.update(titles or {})
+    transaction.on_commit(apply_pending_changes)
+
+
+def apply_pending_changes():
+    """Обрабатывает изменения, накопленные за транзакцию (повторные вызовы ничего не делают)."""
+    changes = getattr(_pending, 'changes', None)
+    if changes is None:
+        return
+    _pending.changes = None
+    refresh_pending_summaries()
+    refresh_pending_documents()
+    refresh_pending_stats()
+    if changes.pks:
+        mark_dirty(list(changes.pks))
+        invalidate_shelves()
+    for pk, entry in changes.titles.items():
+        refresh_entry('content', pk, *(entry or ()))
+    bump_catalog_version()
+
+
+def clear_pending_changes():
+    """Забывает накопленные изменения без обработки."""
+    _pending.changes = None
@@ -0,0 +1,208 @@
+"""
+Этот модуль отвечает за агрегаты жанров, актёров, режиссёров и стран
+(GenreStats, ActorStats, DirectorStats, CountryStats): число фильмов и сериалов,
+средний рейтинг, дату последнего выхода и популярность. Агрегаты считаются
+одним GROUP BY по промежуточной таблице на модель контента для пакета сущностей,
+поэтому списки сущностей сортируются и выводятся постранично прямо
+по индексированным столбцам таблицы агрегатов.
+Сигналы и загрузчики каталога накапливают изменённый контент и сущности
+за транзакцию, а пересчёт выполняется пакетом после фиксации
+(или раньше, при первом чтении агрегатов в том же потоке).
+"""
+import logging
+import threading
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from .autocomplete import refresh_scores
+from .fragments import bump_table_version
+from .models import (Actor, ActorStats, Country, CountryStats, Director, DirectorStats, Genre,
+                     GenreStats, Movie, Series)
+from .response_cache import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH_SIZE = 1000
+
+STATS_MODELS = {
+    Genre: GenreStats,
+    Actor: ActorStats,
+    Director: DirectorStats,
+    Country: CountryStats,
+}
+
+RELATIONS = {
+    Genre: {Movie: 'genres', Series: 'genres'},
+    Actor: {Movie: 'actors', Series: 'actors'},
+    Director: {Movie: 'director'},
+    Country: {Movie: 'created_in', Series: 'created_in'},
+}
+
+STATS_FIELDS = ('title_count', 'average_rating', 'latest_release', 'popularity')
+
+_pending = threading.local()
+
+
+def popularity(title_count, average_rating):
+    """
+    Популярность сущности: сумма рейтингов её тайтлов в долях от 100.
+    Десять тайтлов с рейтингом 70 популярнее одного с рейтингом 90.
+    """
+    return round(title_count * (average_rating or 0) / 100, 4)
+
+
+def _through(entity_model, content_model):
+    """Промежуточная таблица связи и имена её полей (контент, сущность)."""
+    field = content_model._meta.get_field(RELATIONS[entity_model][content_model])
+    return field.remote_field.through, field.m2m_field_name(), field.m2m_reverse_field_name()
+
+
+def _aggregate(entity_model, pks):
+    """
+    Возвращает {pk: (число тайтлов, сумма рейтингов, число оценённых, последний выход)}
+    одним GROUP BY на модель контента.
+    """
+    totals = {}
+    for content_model in RELATIONS[entity_model]:
+        through, source, target = _through(entity_model, content_model)
+        rows = through.objects.filter(**{f'{target}_id__in': pks}) \
+            .values(f'{target}_id').order_by() \
+            .annotate(count=Count('pk'), total=Sum(f'{source}__rating'),
+                      rated=Count(f'{source}__rating'), latest=Max(f'{source}__release_date')) \
+            .values_list(f'{target}_id', 'count', 'total', 'rated', 'latest')
+        for pk, count, total, rated, latest in rows:
+            previous = totals.get(pk, (0, 0, 0, None))
+            totals[pk] = (previous[0] + count, previous[1] + (total or 0), previous[2] + rated,
+                          max(filter(None, (previous[3], latest)), default=None))
+    return totals
+
+
+def build_stats(entity_model, pks):
+    """Строит несохранённые строки агрегатов сущностей entity_model с ключами pks."""
+    stats_model = STATS_MODELS[entity_model]
+    key = stats_model._meta.pk.attname
+    totals = _aggregate(entity_model, pks)
+    stats = []
+    for pk in pks:
+        count, total, rated, latest = totals.get(pk, (0, 0, 0, None))
+        average = round(total / rated, 2) if rated else None
+        stats.append(stats_model(**{key: pk}, title_count=count, average_rating=average,
+                                 latest_release=latest, popularity=popularity(count, average)))
+    return stats
+
+
+def refresh_entity_stats(entity_model, pks=None, batch_size=REFRESH_BATCH_SIZE):
+    """
+    Пересчитывает агрегаты сущностей entity_model с ключами pks (всех, если pks=None)
+    пакетами по batch_size. Записываются только изменившиеся строки, и только тогда
+    сбрасываются кэшированные списки сущностей и страницы.
+    Возвращает количество пересчитанных строк.
+    """
+    stats_model = STATS_MODELS[entity_model]
+    key = stats_model._meta.pk.attname
+    queryset = entity_model.objects.order_by('pk')
+    if pks is not None:
+        queryset = queryset.filter(pk__in=list(pks))
+    pks = list(queryset.values_list('pk', flat=True))
+    changed = False
+    for start in range(0, len(pks), batch_size):
+        batch = pks[start:start + batch_size]
+        current = {row[0]: row[1:] for row in stats_model.objects.filter(**{f'{key}__in': batch})
+                   .values_list(key, *STATS_FIELDS)}
+        stats = [row for row in build_stats(entity_model, batch)
+                 if current.get(row.pk) != tuple(getattr(row, field) for field in STATS_FIELDS)]
+        if not stats:
+            continue
+        stats_model.objects.bulk_create(
+            stats, update_conflicts=True, unique_fields=[stats_model._meta.pk.name],
+            update_fields=[*STATS_FIELDS, 'updated_at'])
+        refresh_scores(entity_model, {row.pk: row.title_count for row in stats})
+        changed = True
+    if changed:
+        bump_table_version(entity_model)
+        bump_catalog_version()
+    return len(pks)
+
+
+def linked_entities(content_pks):
+    """Возвращает {модель сущности: ключи сущностей, связанных с контентом content_pks}."""
+    content_pks = list(content_pks)
+    linked = {}
+    for entity_model, relations in RELATIONS.items():
+        for content_model in relations:
+            through, source, target = _through(entity_model, content_model)
+            linked.setdefault(entity_model, set()).update(
+                through.objects.filter(**{f'{source}_id__in': content_pks})
+                .values_list(f'{target}_id', flat=True))
+    return linked
+
+
+def queue_stats_refresh(content_pks=(), entities=None):
+    """
+    Добавляет изменения к ожидающим пересчёта в refresh_pending_stats.
+    content_pks — изменённый контент (его сущности находятся при пересчёте),
+    entities — {модель сущности: ключи}. Возвращает False, если добавлять нечего.
+    """
+    entities = {model: set(pks) for model, pks in (entities or {}).items() if pks}
+    if not content_pks and not entities:
+        return False
+    if getattr(_pending, 'content', None) is None:
+        clear_pending_stats()
+    _pending.content.update(content_pks)
+    for model, pks in entities.items():
+        _pending.entities.setdefault(model, set()).update(pks)
+    return True
+
+
+def schedule_stats_refresh(content_pks=(), entities=None):
+    """
+    Откладывает пересчёт агрегатов до фиксации текущей транзакции
+    (аргументы — как у queue_stats_refresh). Всё накопленное обрабатывается одним пакетом.
+    """
+    if queue_stats_refresh(content_pks, entities):
+        transaction.on_commit(refresh_pending_stats)
+
+
+def clear_pending_stats():
+    """Забывает накопленные изменения без пересчёта."""
+    _pending.content = set()
+    _pending.entities = {}
+
+
+def refresh_pending_stats():
+    """Пересчитывает накопленные агрегаты (повторные вызовы ничего не делают)."""
+    content = getattr(_pending, 'content', None)
+    entities = getattr(_pending, 'entities', None)
+    if not content and not entities:
+        return
+    clear_pending_stats()
+    try:
+        if content:
+            for model, pks in linked_entities(content).items():
+                entities.setdefault(model, set()).update(pks)
+        for model, pks in entities.items():
+            if pks:
+                refresh_entity_stats(model, sorted(pks))
+    except Exception as e:
+        logger.error(f"Ошибка обновления агрегатов сущностей: {e}")
+
+
+def rebuild_entity_stats(models=None, batch_size=REFRESH_BATCH_SIZE):
+    """Пересчитывает агрегаты всех сущностей. Возвращает {модель: количество строк}."""
+    clear_pending_stats()
+    counts = {}
+    for entity_model in models or STATS_MODELS:
+        counts[entity_model] = refresh_entity_stats(entity_model, batch_size=batch_size)
+        logger.info(f"Агрегаты {entity_model._meta.verbose_name_plural} перестроены: "
+                    f"{counts[entity_model]}")
+    return counts
+
+
+def ranked_entities(entity_model):
+    """
+    Queryset сущностей вместе с агрегатами по убыванию популярности. Порядок
+    задаётся столбцами таблицы агрегатов и читается по её индексу (популярность, ключ).
+    Изменения, ещё не пересчитанные в этом потоке, применяются перед чтением.
+    """
+    refresh_pending_stats()
+    return entity_model.objects.filter(stats__isnull=False).select_related('stats') \
+        .order_by('-stats__popularity', '-pk')
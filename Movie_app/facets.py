@@ -0,0 +1,489 @@
+"""
+Этот модуль отвечает за фасетную фильтрацию контента.
+В памяти процесса для каждого жанра, страны, режиссёра, актёра и диапазона рейтинга
+хранится отсортированный массив позиций контента (построенный по промежуточным
+таблицам), поэтому отфильтрованная выборка и число тайтлов для каждого значения
+фасета вычисляются пересечением массивов без запросов к базе данных.
+Из базы читается только текущая страница. Индекс строится в фоновом потоке;
+контент, изменённый в этом процессе, помечается сигналами, а изменения других
+процессов (воркеров, команд загрузки) обнаруживаются по общей версии каталога
+(не чаще раза в FACETS_SYNC_INTERVAL секунд) и перечитываются по updated_at.
+Перечитывание тоже идёт в фоновом потоке: построенный индекс не изменяется,
+обновлённая копия заменяет его под блокировкой, поэтому запросы читают индекс
+без блокировки. Раз в FACETS_REFRESH_INTERVAL секунд индекс полностью
+перестраивается в фоне.
+"""
+import logging
+import threading
+import time
+from collections.abc import Sequence
+from datetime import timedelta
+from types import SimpleNamespace
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .filters import MATCH_ALL, MATCH_ANY
+from .listing import listing_queryset
+from .models import Actor, Content, Country, Director, Genre, Movie, Series
+from .response_cache import catalog_version
+
+logger = logging.getLogger(__name__)
+
+FACETS = (
+    ('genre', 'genres', Genre, 'genres'),
+    ('country', 'countries', Country, 'created_in'),
+    ('director', 'directors', Director, 'director'),
+    ('actor', 'actors', Actor, 'actors'),
+)
+
+RATING_PARAM = 'ratings'
+
+RATING_BUCKETS = [(str(bucket), f"{bucket * 10}–{bucket * 10 + (10 if bucket == 9 else 9)}")
+                  for bucket in range(9, -1, -1)]
+
+FACET_LIMIT = 20
+
+# Запас при поиске контента, изменённого другими процессами: строка могла получить
+# updated_at раньше, чем её транзакция была зафиксирована.
+SYNC_MARGIN = timedelta(minutes=1)
+
+_state = SimpleNamespace(index=None, built_at=0.0, checked_at=0.0, rebuilding=False,
+                         refreshing=False, generation=0, version=None, synced_at=None,
+                         dirty=set(), dirty_since_rebuild=set())
+_lock = threading.RLock()
+
+
+def rating_bucket(rating):
+    """Номер диапазона рейтинга: 0–9, 10–19, ..., 90–100."""
+    return min(int(rating) // 10, 9)
+
+
+class Dimension:
+    """
+    Значения одного фасета и позиции контента для каждого из них.
+    pairs — пары (pk контента, номер значения), postings — позиции контента,
+    отсортированные по номеру значения (docs, values) и начало каждого значения (offsets).
+    """
+
+    def __init__(self, name, param):
+        self.name = name
+        self.param = param
+        self.keys = []
+        self.labels = []
+        self.key_index = {}
+        self.pairs = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32))
+        self.postings = SimpleNamespace(docs=np.empty(0, dtype=np.int32),
+                                        values=np.empty(0, dtype=np.int32),
+                                        offsets=np.zeros(1, dtype=np.int64))
+
+    def copy(self):
+        """Копия фасета, которую можно дополнять, не меняя исходный."""
+        dimension = Dimension(self.name, self.param)
+        dimension.keys, dimension.labels = list(self.keys), list(self.labels)
+        dimension.key_index = dict(self.key_index)
+        dimension.pairs, dimension.postings = self.pairs, self.postings
+        return dimension
+
+    def add_values(self, items):
+        """Добавляет значения (ключ, название), которых ещё нет в фасете."""
+        for key, label in items:
+            if key not in self.key_index:
+                self.key_index[key] = len(self.keys)
+                self.keys.append(key)
+                self.labels.append(label)
+
+    def set_pairs(self, pairs, replace_pks=None):
+        """
+        Записывает пары (pk контента, ключ значения); если задан replace_pks,
+        заменяет пары только этого контента.
+        """
+        pairs = [(pk, key) for pk, key in pairs if key in self.key_index]
+        pks = np.fromiter((pk for pk, _ in pairs), dtype=np.int64, count=len(pairs))
+        values = np.fromiter((self.key_index[key] for _, key in pairs), dtype=np.int32,
+                             count=len(pairs))
+        if replace_pks is not None:
+            old_pks, old_values = self.pairs
+            keep = ~np.isin(old_pks, replace_pks)
+            pks = np.concatenate([old_pks[keep], pks])
+            values = np.concatenate([old_values[keep], values])
+        self.pairs = (pks, values)
+
+    def compile(self, universe):
+        """Строит массивы позиций контента universe, отсортированные по значению фасета."""
+        pks, values = self.pairs
+        docs = np.searchsorted(universe, pks).astype(np.int32)
+        known = docs < len(universe)
+        known[known] = universe[docs[known]] == pks[known]
+        docs, values = docs[known], values[known]
+        order = np.lexsort((docs, values))
+        values = values[order]
+        self.postings = SimpleNamespace(docs=docs[order], values=values,
+                                        offsets=np.searchsorted(values,
+                                                                np.arange(len(self.keys) + 1)))
+
+    def mask(self, keys, size, match=MATCH_ANY):
+        """
+        Маска контента, у которого есть хотя бы одно из значений keys
+        (или все значения keys, если match=MATCH_ALL).
+        """
+        if match == MATCH_ALL:
+            mask = np.ones(size, dtype=bool)
+            for key in keys:
+                mask &= self.mask([key], size)
+            return mask
+        mask = np.zeros(size, dtype=bool)
+        postings = self.postings
+        for key in keys:
+            position = self.key_index.get(key)
+            if position is not None:
+                mask[postings.docs[postings.offsets[position]:
+                                   postings.offsets[position + 1]]] = True
+        return mask
+
+    def counts(self, base):
+        """Количество контента из маски base для каждого значения фасета."""
+        postings = self.postings
+        return np.bincount(postings.values[base[postings.docs]], minlength=len(self.keys))
+
+
+class FacetPks(Sequence):
+    """
+    Упорядоченные pk результата фасетного поиска. Массив хранится в numpy,
+    а в список Python превращается только запрошенный срез (страница).
+    """
+
+    def __init__(self, pks):
+        self.array = pks
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.array[item].tolist()
+        return int(self.array[item])
+
+
+class FacetResult:
+    """Результат фасетного поиска: упорядоченные pk контента и счётчики фасетов."""
+
+    def __init__(self, pks, facets):
+        self.pks = pks
+        self.facets = facets
+
+
+class FacetIndex:
+    """
+    Фасетный индекс всего контента. Опубликованный индекс не изменяется:
+    изменённый контент перечитывается в копию (updated).
+    """
+
+    def __init__(self):
+        self.universe = np.empty(0, dtype=np.int64)
+        self.ratings = np.empty(0, dtype=np.int16)
+        self.dimensions = {name: Dimension(name, param) for name, param, _, _ in FACETS}
+        self.dimensions['rating'] = Dimension('rating', RATING_PARAM)
+        self.dimensions['rating'].add_values(RATING_BUCKETS)
+        self.unfiltered_facets = None
+
+    def updated(self, pks):
+        """Возвращает копию индекса, в которой перечитан контент pks."""
+        index = FacetIndex()
+        index.universe, index.ratings = self.universe, self.ratings
+        index.dimensions = {name: dimension.copy() for name, dimension in self.dimensions.items()}
+        index.load(pks)
+        return index
+
+    @staticmethod
+    def _pairs(relation, pks=None):
+        """Пары (pk контента, pk сущности) из промежуточных таблиц фильмов и сериалов."""
+        pairs = []
+        for model in (Movie, Series):
+            field = next((field for field in model._meta.many_to_many
+                          if field.name == relation), None)
+            if field is None:
+                continue
+            source = f"{field.m2m_field_name()}_id"
+            rows = field.remote_field.through.objects.values_list(
+                source, f"{field.m2m_reverse_field_name()}_id")
+            if pks is not None:
+                rows = rows.filter(**{f"{source}__in": pks})
+            pairs.extend(rows)
+        return pairs
+
+    def load(self, pks=None):
+        """
+        Читает контент и его связи из базы данных: весь каталог
+        или (если задан pks) только указанный контент.
+        """
+        rows = listing_queryset()
+        if pks is not None:
+            rows = rows.filter(pk__in=pks)
+        rows = list(rows.values_list('pk', 'rating'))
+        universe = np.fromiter((pk for pk, _ in rows), dtype=np.int64, count=len(rows))
+        ratings = np.fromiter((rating or 0 for _, rating in rows), dtype=np.int16,
+                              count=len(rows))
+        replace = None if pks is None else np.fromiter(pks, dtype=np.int64, count=len(pks))
+        if replace is not None:
+            keep = ~np.isin(self.universe, replace)
+            universe = np.concatenate([self.universe[keep], universe])
+            ratings = np.concatenate([self.ratings[keep], ratings])
+        order = np.argsort(universe, kind='stable')
+        self.universe, self.ratings = universe[order], ratings[order]
+
+        for name, _, model, relation in FACETS:
+            dimension = self.dimensions[name]
+            pairs = self._pairs(relation, pks)
+            missing = {key for _, key in pairs if key not in dimension.key_index}
+            if missing:
+                dimension.add_values(model.objects.filter(pk__in=missing)
+                                     .order_by('name').values_list('pk', 'name'))
+            dimension.set_pairs(pairs, replace)
+        self.dimensions['rating'].set_pairs(
+            [(pk, str(rating_bucket(rating))) for pk, rating in rows if rating is not None],
+            replace)
+        for dimension in self.dimensions.values():
+            dimension.compile(self.universe)
+        self.unfiltered_facets = None
+
+    def _masks(self, selection, match):
+        size = len(self.universe)
+        return {name: self.dimensions[name].mask(keys, size,
+                                                 MATCH_ANY if name == 'rating' else match)
+                for name, keys in selection.items() if keys}
+
+    def facets(self, selection, match=MATCH_ANY, masks=None):
+        """
+        Счётчики значений фасетов для выбора selection: счётчик значения фасета
+        учитывает выбор во всех остальных фасетах, а при MATCH_ALL — и в самом фасете.
+        Счётчики без выбора вычисляются один раз после загрузки.
+        """
+        if not any(selection.values()) and self.unfiltered_facets is not None:
+            return self.unfiltered_facets
+        if masks is None:
+            masks = self._masks(selection, match)
+        size = len(self.universe)
+        facets = []
+        for name, dimension in self.dimensions.items():
+            base = np.ones(size, dtype=bool)
+            for other, mask in masks.items():
+                if other != name or (match == MATCH_ALL and name != 'rating'):
+                    base &= mask
+            facets.append(self._facet(dimension, dimension.counts(base),
+                                      set(selection.get(name) or ())))
+        if not masks:
+            self.unfiltered_facets = facets
+        return facets
+
+    @staticmethod
+    def _facet(dimension, counts, selected):
+        """Выбранные значения фасета и до FACET_LIMIT самых частых остальных."""
+        chosen = [dimension.key_index[key] for key in dimension.keys if key in selected] \
+            if selected else []
+        positions = np.flatnonzero(counts)
+        if dimension.name != 'rating' and len(positions) > FACET_LIMIT + len(chosen):
+            top = np.argpartition(-counts[positions], FACET_LIMIT + len(chosen))
+            positions = positions[top[:FACET_LIMIT + len(chosen)]]
+        positions = [int(position) for position in positions if position not in chosen]
+        if dimension.name == 'rating':
+            positions = sorted(chosen + positions)
+        else:
+            positions.sort(key=lambda position: (-counts[position], dimension.labels[position]))
+            positions = chosen + positions[:FACET_LIMIT]
+        return {
+            'name': dimension.name,
+            'param': dimension.param,
+            'values': [{'key': dimension.keys[position],
+                        'label': dimension.labels[position],
+                        'count': int(counts[position]),
+                        'selected': dimension.keys[position] in selected}
+                       for position in positions],
+        }
+
+    def search(self, selection, ordering='-tmdb_id', match=MATCH_ANY):
+        """
+        Возвращает FacetResult для выбранных значений selection ({фасет: [ключи]}).
+        Внутри фасета значения объединяются (или пересекаются при match=MATCH_ALL),
+        между фасетами — пересекаются. Диапазоны рейтинга у тайтла единственны
+        и всегда объединяются.
+        """
+        masks = self._masks(selection, match)
+        result = np.ones(len(self.universe), dtype=bool)
+        for mask in masks.values():
+            result &= mask
+
+        positions = np.flatnonzero(result)
+        if ordering == '-rating':
+            positions = positions[np.lexsort((-self.universe[positions],
+                                              -self.ratings[positions].astype(np.int64)))]
+        else:
+            positions = positions[::-1]
+        return FacetResult(FacetPks(self.universe[positions]),
+                           self.facets(selection, match, masks))
+
+
+def selection_from_form(form):
+    """Возвращает выбранные значения фасетов из ContentFilterForm."""
+    if not form.is_valid():
+        return {}
+    selection = {name: [obj.pk for obj in form.cleaned_data.get(param) or ()]
+                 for name, param, _, _ in FACETS}
+    selection['rating'] = list(form.cleaned_data.get(RATING_PARAM) or ())
+    return {name: keys for name, keys in selection.items() if keys}
+
+
+def match_from_form(form):
+    """Возвращает режим объединения значений фасета из ContentFilterForm."""
+    if not form.is_valid():
+        return MATCH_ANY
+    return form.cleaned_data.get('match') or MATCH_ANY
+
+
+def _mark(pks):
+    """Помечает pks (под _lock); во время перестроения они переживут замену индекса."""
+    _state.dirty.update(pks)
+    if _state.rebuilding:
+        _state.dirty_since_rebuild.update(pks)
+
+
+def _rebuild(generation):
+    try:
+        version, synced_at = catalog_version(), timezone.now()
+        index = FacetIndex()
+        index.load()
+        with _lock:
+            if generation != _state.generation:
+                return
+            _state.index, _state.built_at = index, time.monotonic()
+            _state.version, _state.synced_at = version, synced_at
+            _state.dirty.update(_state.dirty_since_rebuild)
+            _state.dirty_since_rebuild.clear()
+        logger.info(f"Фасетный индекс перестроен: {len(index.universe)} тайтлов")
+    except Exception as e:
+        logger.error(f"Ошибка перестроения фасетного индекса: {e}")
+    finally:
+        with _lock:
+            if generation == _state.generation:
+                _state.rebuilding = False
+
+
+def _sync_with_catalog(generation):
+    """
+    Если общая версия каталога изменилась (в этом или другом процессе), помечает
+    контент, изменённый с прошлой сверки. Возвращает True, если версия изменилась.
+    """
+    version = catalog_version()
+    with _lock:
+        if generation != _state.generation or version == _state.version:
+            return False
+        since = _state.synced_at
+    synced_at = timezone.now()
+    pks = list(Content.objects.filter(updated_at__gte=since - SYNC_MARGIN)
+               .values_list('pk', flat=True))
+    with _lock:
+        if generation != _state.generation:
+            return False
+        _mark(pks)
+        _state.version, _state.synced_at = version, synced_at
+    return True
+
+
+def _refresh(generation):
+    """
+    Сверяется с общей версией каталога, перечитывает помеченный контент в копию
+    индекса и заменяет ею индекс, если его не заменило перестроение.
+    """
+    try:
+        changed = _sync_with_catalog(generation)
+        with _lock:
+            if generation != _state.generation:
+                return
+            index, pks = _state.index, list(_state.dirty)
+            _state.dirty.clear()
+        updated = index.updated(pks) if pks else index
+        deleted = changed and Content.objects.count() != len(updated.universe)
+        with _lock:
+            if generation != _state.generation:
+                return
+            if _state.index is index:
+                _state.index = updated
+            else:
+                _state.dirty.update(pks)
+            if deleted and not _state.rebuilding:
+                _start_rebuild()
+    except Exception as e:
+        logger.error(f"Ошибка обновления фасетного индекса: {e}")
+    finally:
+        with _lock:
+            if generation == _state.generation:
+                _state.refreshing = False
+                _state.checked_at = time.monotonic()
+
+
+def _in_background(target, generation):
+    try:
+        target(generation)
+    finally:
+        connection.close()
+
+
+def _start(target, background):
+    """Запускает target (под _lock): в фоновом потоке или сразу."""
+    if background:
+        threading.Thread(target=_in_background, args=(target, _state.generation),
+                         daemon=True).start()
+    else:
+        target(_state.generation)
+
+
+def _start_rebuild(background=True):
+    """Запускает перестроение индекса (под _lock): в фоновом потоке или сразу."""
+    _state.rebuilding = True
+    _state.dirty_since_rebuild.clear()
+    if _state.index is None:
+        _state.dirty.clear()
+    _start(_rebuild, background)
+
+
+def get_facet_index(wait=False):
+    """
+    Возвращает фасетный индекс текущего процесса. Первый вызов запускает
+    построение в фоновом потоке (если FACETS_BUILD_IN_BACKGROUND) и, пока индекс
+    не готов, возвращает None; wait=True строит его сразу. Помеченный контент
+    и сверка с общей версией каталога (раз в FACETS_SYNC_INTERVAL секунд)
+    обрабатываются так же, в фоне; индекс, в котором пропал удалённый контент
+    или который старше FACETS_REFRESH_INTERVAL, перестраивается в фоне.
+    """
+    background = getattr(settings, 'FACETS_BUILD_IN_BACKGROUND', True) and not wait
+    with _lock:
+        if _state.index is None:
+            if not _state.rebuilding or not background:
+                _start_rebuild(background)
+            return _state.index
+        now = time.monotonic()
+        interval = getattr(settings, 'FACETS_REFRESH_INTERVAL', 15 * 60)
+        if now - _state.built_at > interval and not _state.rebuilding:
+            _start_rebuild()
+        sync_interval = getattr(settings, 'FACETS_SYNC_INTERVAL', 5)
+        if not _state.refreshing and (_state.dirty or now - _state.checked_at >= sync_interval):
+            _state.refreshing = True
+            _start(_refresh, background)
+        return _state.index
+
+
+def mark_dirty(pks):
+    """Помечает контент pks для перечитывания при следующем обращении к индексу."""
+    with _lock:
+        if _state.index is not None or _state.rebuilding:
+            _mark(pks)
+
+
+def reset_facet_index():
+    """Сбрасывает фасетный индекс текущего процесса."""
+    with _lock:
+        _state.index, _state.rebuilding, _state.refreshing = None, False, False
+        _state.version, _state.checked_at = None, 0.0
+        _state.generation += 1
+        _state.dirty.clear()
+        _state.dirty_since_rebuild.clear()
@@ -0,0 +1,82 @@
+"""
+Этот модуль отвечает за компиляцию фильтров контента по жанрам, актёрам,
+режиссёрам и странам в условия EXISTS к промежуточным таблицам.
+В отличие от filter(genres__in=...) такое условие не размножает строки контента
+соединениями, поэтому выборке не нужен DISTINCT по широким полиморфным строкам,
+а каждое условие проверяется по уникальному индексу (контент, сущность)
+промежуточной таблицы. Значения фасета объединяются (любое из выбранных)
+или пересекаются (все выбранные), между фасетами условия всегда пересекаются.
+"""
+from django.db.models import Exists, OuterRef, Q
+from .models import Content, Movie, Series
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+MATCH_CHOICES = [
+    (MATCH_ANY, "Любое из выбранных"),
+    (MATCH_ALL, "Все выбранные"),
+]
+
+FILTER_RELATIONS = {
+    'genre': 'genres',
+    'actor': 'actors',
+    'director': 'director',
+    'country': 'created_in',
+}
+
+
+def _links(model, relation):
+    """
+    Промежуточные таблицы связи relation и имена их полей (контент, сущность):
+    для Content — таблицы фильмов и сериалов, для подкласса — только его таблица.
+    """
+    links = []
+    for content_model in (Movie, Series) if model is Content else (model,):
+        field = next((field for field in content_model._meta.many_to_many
+                      if field.name == relation), None)
+        if field is not None:
+            links.append((field.remote_field.through, field.m2m_field_name(),
+                          field.m2m_reverse_field_name()))
+    return links
+
+
+def relation_exists(model, relation, **lookups):
+    """
+    Условие «у контента model есть связь relation с сущностью, подходящей под lookups»
+    (например, pk__in=[...] или name__icontains='...'). Если у модели нет такой связи
+    (режиссёры сериалов), условие ложно.
+    """
+    condition = Q()
+    for through, source, target in _links(model, relation):
+        condition |= Exists(through.objects.filter(
+            **{f'{source}_id': OuterRef('pk')},
+            **{f'{target}__{lookup}': value for lookup, value in lookups.items()}))
+    return condition if condition else Q(pk__in=[])
+
+
+def facet_condition(model, relation, keys, match=MATCH_ANY):
+    """
+    Условие фасета: одно EXISTS с IN по ключам для «любое из выбранных»
+    или отдельное EXISTS на каждый ключ для «все выбранные».
+    """
+    keys = list(keys)
+    if match != MATCH_ALL:
+        return relation_exists(model, relation, pk__in=keys)
+    condition = Q()
+    for key in keys:
+        condition &= relation_exists(model, relation, pk=key)
+    return condition
+
+
+def apply_filters(queryset, selection, match=MATCH_ANY):
+    """
+    Применяет к queryset контента (Content, Movie или Series) выбранные значения
+    selection ({'genre': [ключи], 'actor': [...], 'director': [...], 'country': [...]}).
+    Остальные ключи selection (например, диапазоны рейтинга) пропускаются.
+    """
+    for name, relation in FILTER_RELATIONS.items():
+        keys = selection.get(name)
+        if keys:
+            queryset = queryset.filter(facet_condition(queryset.model, relation, keys, match))
+    return queryset
@@ -3,7 +3,11 @@
 в приложении Movie_app.
 """
 from django import forms
+from django.urls import reverse_lazy
+from .facets import RATING_BUCKETS
+from .filters import MATCH_ANY, MATCH_CHOICES
 from .models import Content, Actor, Genre, Director, Country
+from .widgets import LookupSelect, LookupSelectMultiple
 
 
 class ContentForm(forms.ModelForm):
@@ -25,14 +29,18 @@ class SearchForm(forms.Form):
         max_length=200,
         required=False,
         widget=forms.TextInput(attrs={"placeholder":
-                                          "Введите название фильма или сериала..."}),
+                                          "Введите название фильма или сериала...",
+                                      "autocomplete": "off",
+                                      "data-autocomplete-url": reverse_lazy(
+                                          "Movie_app:autocomplete")}),
     )
 
 
 class ContentFilterForm(forms.Form):
     """
      Форма для фильтрации контента по
-     жанрам, актерам, режиссерам и странам.
+     жанрам, актерам, режиссерам, странам и рейтингу.
+     Поле match задаёт, нужно ли любое из выбранных значений фасета или все.
      """
     genres = forms.ModelMultipleChoiceField(
         queryset=Genre.objects.all(),
@@ -44,26 +52,52 @@ class ContentFilterForm(forms.Form):
         queryset=Actor.objects.all(),
         required=False,
         label="Актеры",
-        widget=forms.CheckboxSelectMultiple,
+        widget=LookupSelectMultiple('actor'),
     )
     directors = forms.ModelMultipleChoiceField(
         queryset=Director.objects.all(),
         required=False,
         label="Режиссеры",
-        widget=forms.CheckboxSelectMultiple,
+        widget=LookupSelectMultiple('director'),
     )
     countries = forms.ModelMultipleChoiceField(
         queryset=Country.objects.all(),
         required=False,
         label="Страны",
+        widget=LookupSelectMultiple('country'),
+    )
+    ratings = forms.MultipleChoiceField(
+        choices=RATING_BUCKETS,
+        required=False,
+        label="Рейтинг",
         widget=forms.CheckboxSelectMultiple,
     )
+    match = forms.ChoiceField(
+        choices=MATCH_CHOICES,
+        initial=MATCH_ANY,
+        required=False,
+        label="Совпадение",
+        widget=forms.RadioSelect,
+    )
 
 
-class MovieFilterForm(forms.Form):
+class RangeFilterMixin:
+    """Проверяет, что нижние границы диапазонов рейтинга и года не больше верхних."""
+    ranges = (('rating', 'rating_max'), ('year_from', 'year_to'))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for low, high in self.ranges:
+            if cleaned_data.get(low) is not None and cleaned_data.get(high) is not None \
+                    and cleaned_data[low] > cleaned_data[high]:
+                self.add_error(high, "Верхняя граница не может быть меньше нижней.")
+        return cleaned_data
+
+
+class MovieFilterForm(RangeFilterMixin, forms.Form):
     """
-    Форма для фильтрации фильмов по названию, жанрам,
-    рейтингу, актерам, режиссерам и странам.
+    Форма для фильтрации фильмов по началу названия, жанру,
+    диапазонам рейтинга и года выхода, актеру, режиссеру и стране.
     """
     title = forms.CharField(
         required=False,
@@ -79,35 +113,59 @@ class MovieFilterForm(forms.Form):
     )
     rating = forms.DecimalField(
         required=False,
-        label="Рейтинг",
+        label="Рейтинг от",
         min_value=0,
         max_value=100,
         widget=forms.NumberInput(attrs={"placeholder": "000"}),
     )
+    rating_max = forms.DecimalField(
+        required=False,
+        label="Рейтинг до",
+        min_value=0,
+        max_value=100,
+        widget=forms.NumberInput(attrs={"placeholder": "100"}),
+    )
+    year_from = forms.IntegerField(
+        required=False,
+        label="Год выхода от",
+        min_value=1870,
+        max_value=2100,
+        widget=forms.NumberInput(attrs={"placeholder": "1990"}),
+    )
+    year_to = forms.IntegerField(
+        required=False,
+        label="Год выхода до",
+        min_value=1870,
+        max_value=2100,
+        widget=forms.NumberInput(attrs={"placeholder": "2025"}),
+    )
     actor = forms.ModelChoiceField(
         queryset=Actor.objects.all(),
         required=False,
         label="Актеры",
         empty_label="Выберите актера",
+        widget=LookupSelect('actor'),
     )
     director = forms.ModelChoiceField(
         queryset=Director.objects.all(),
         required=False,
         label="Режиссёры",
         empty_label="Выберите режиссёра",
+        widget=LookupSelect('director'),
     )
     country = forms.ModelChoiceField(
         queryset=Country.objects.all(),
         required=False,
         label="Страны",
         empty_label="Выберите страну",
+        widget=LookupSelect('country'),
     )
 
 
-class SeriesFilterForm(forms.Form):
+class SeriesFilterForm(RangeFilterMixin, forms.Form):
     """
-     Форма для фильтрации сериалов по названию,
-     жанрам, рейтингу, актерам и странам.
+     Форма для фильтрации сериалов по началу названия, жанру,
+     диапазонам рейтинга и года выхода, актеру и стране.
      """
     title = forms.CharField(
         required=False,
@@ -123,20 +181,43 @@ class SeriesFilterForm(forms.Form):
     )
     rating = forms.DecimalField(
         required=False,
-        label="Рейтинг",
+        label="Рейтинг от",
         min_value=0,
         max_value=100,
         widget=forms.NumberInput(attrs={"placeholder": "000"}),
     )
+    rating_max = forms.DecimalField(
+        required=False,
+        label="Рейтинг до",
+        min_value=0,
+        max_value=100,
+        widget=forms.NumberInput(attrs={"placeholder": "100"}),
+    )
+    year_from = forms.IntegerField(
+        required=False,
+        label="Год выхода от",
+        min_value=1870,
+        max_value=2100,
+        widget=forms.NumberInput(attrs={"placeholder": "1990"}),
+    )
+    year_to = forms.IntegerField(
+        required=False,
+        label="Год выхода до",
+        min_value=1870,
+        max_value=2100,
+        widget=forms.NumberInput(attrs={"placeholder": "2025"}),
+    )
     actor = forms.ModelChoiceField(
         queryset=Actor.objects.all(),
         required=False,
         label="Актеры",
         empty_label="Выберите актера",
+        widget=LookupSelect('actor'),
     )
     country = forms.ModelChoiceField(
         queryset=Country.objects.all(),
         required=False,
         label="Страны",
         empty_label="Выберите страну",
+        widget=LookupSelect('country'),
     )
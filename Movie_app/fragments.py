@@ -0,0 +1,113 @@
+"""
+Этот модуль отвечает за кэширование фрагментов шаблонов.
+Карточка контента (постер, название, рейтинг, жанры) кэшируется по ключу
+(tmdb_id, updated_at): изменение связей контента и переименование жанра
+обновляют updated_at (сигналы моделей); все карточки страницы читаются
+из кэша одним запросом get_many, а недостающие рендерятся и сохраняются
+одним set_many. Списки сущностей кэшируются по версии своей таблицы,
+которая увеличивается при любом изменении строк этой таблицы.
+"""
+import logging
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from .models import Movie, Series
+
+logger = logging.getLogger(__name__)
+
+CARD_TEMPLATE = 'Movie_app/content_card.html'
+CARD_KEY_PREFIX = 'movie_app:card:v1'
+TABLE_VERSION_PREFIX = 'movie_app:table_version'
+
+
+def fragment_cache():
+    """Хранилище кэша фрагментов шаблонов (алиас template_fragments)."""
+    return caches['template_fragments' if 'template_fragments' in settings.CACHES else 'default']
+
+
+def fragment_timeout():
+    """Время жизни фрагментов в секундах (FRAGMENT_CACHE_TIMEOUT)."""
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def table_version(model):
+    """
+    Версия таблицы модели. Если счётчик отсутствует, он начинается
+    с текущего времени в миллисекундах, чтобы не совпасть с прежними версиями.
+    """
+    cache = fragment_cache()
+    key = f"{TABLE_VERSION_PREFIX}:{model._meta.label_lower}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1_000_000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_table_version(model):
+    """Увеличивает версию таблицы модели, делая недействительными её фрагменты."""
+    cache = fragment_cache()
+    key = f"{TABLE_VERSION_PREFIX}:{model._meta.label_lower}"
+    try:
+        return cache.incr(key)
+    except ValueError:
+        table_version(model)
+        return cache.incr(key)
+
+
+def card_key(content):
+    """Ключ карточки контента или None, если у объекта нет updated_at."""
+    updated_at = getattr(content, 'updated_at', None)
+    if updated_at is None:
+        return None
+    return f"{CARD_KEY_PREFIX}:{content.pk}:{updated_at.timestamp():.6f}"
+
+
+def _load_genre_names(contents):
+    """Добавляет атрибут genre_names объектам без него (по запросу на модель)."""
+    missing = {Movie: {}, Series: {}}
+    for content in contents:
+        if not hasattr(content, 'genre_names'):
+            content.genre_names = []
+            missing[Series if isinstance(content, Series) else Movie][content.pk] = content
+    for model, by_pk in missing.items():
+        if not by_pk:
+            continue
+        field = model._meta.get_field('genres')
+        source = field.m2m_field_name()
+        rows = field.remote_field.through.objects.filter(**{f'{source}_id__in': list(by_pk)}) \
+            .order_by('genre__name').values_list(f'{source}_id', 'genre__name')
+        for pk, name in rows:
+            by_pk[pk].genre_names.append(name)
+
+
+def render_cards(contents):
+    """
+    Возвращает список пар (контент, HTML карточки) в порядке contents.
+    Кэш читается одним get_many; карточки, которых в нём нет, рендерятся
+    (жанры для них подгружаются одним запросом на модель) и сохраняются set_many.
+    """
+    contents = list(contents)
+    if not contents:
+        return []
+    cache = fragment_cache()
+    keys = [card_key(content) for content in contents]
+    cached = cache.get_many([key for key in keys if key])
+
+    missing = [content for content, key in zip(contents, keys) if key not in cached]
+    if missing:
+        _load_genre_names(missing)
+        rendered = {}
+        for content, key in zip(contents, keys):
+            if key in cached:
+                continue
+            if not hasattr(content, 'is_series'):
+                content.is_series = isinstance(content, Series)
+            html = render_to_string(CARD_TEMPLATE, {'content': content})
+            if key:
+                rendered[key] = html
+            cached[key or content.pk] = html
+        cache.set_many(rendered, fragment_timeout())
+        logger.debug(f"Отрендерено карточек: {len(missing)} из {len(contents)}")
+    return [(content, cached[key or content.pk]) for content, key in zip(contents, keys)]
@@ -0,0 +1,259 @@
+"""
+Этот модуль отвечает за пакетную запись данных TMDB в базу данных:
+жанры, актёры, режиссёры и страны целой страницы контента сохраняются
+через bulk_create, а связи многие-ко-многим пишутся напрямую
+в промежуточные таблицы в одной транзакции.
+"""
+import logging
+from django.db import transaction
+from django.utils import timezone
+from .models import Genre, Actor, Director, Country, Content
+from .autocomplete import refresh_entities
+from .facets import mark_dirty
+from .fragments import bump_table_version
+from .response_cache import bump_catalog_version
+from .entity_stats import schedule_stats_refresh
+from .summaries import schedule_summary_refresh
+
+logger = logging.getLogger(__name__)
+
+ACTORS_LIMIT = 10
+
+
+def parse_countries(data):
+    """Возвращает словарь {iso_code: name} стран производства из ответа TMDB."""
+    countries = {}
+    for country_data in data.get('production_countries', []):
+        iso_code = country_data.get('iso_3166_1', '')
+        name = country_data.get('name', '')
+        if iso_code and name:
+            countries[iso_code] = name
+    return countries
+
+
+def parse_directors(data):
+    """Возвращает словарь {tmdb_id: name} режиссёров из ответа TMDB."""
+    crew = data.get('credits', {}).get('crew', [])
+    return {member['id']: member['name']
+            for member in crew if member.get('job') == 'Director'}
+
+
+def parse_actors(data):
+    """Возвращает словарь {tmdb_id: name} первых актёров из ответа TMDB."""
+    cast = data.get('credits', {}).get('cast', [])[:ACTORS_LIMIT]
+    return {actor['id']: actor['name'] for actor in cast}
+
+
+class IngestionMetrics:
+    """
+    Метрики загрузки контента: количество тайтлов, страниц и фиксаций транзакций,
+    время обработки каждого тайтла (вместе с его долей записи страницы),
+    общее время записи страниц и тайтлы, которые не удалось загрузить.
+    """
+
+    def __init__(self):
+        self.titles = 0
+        self.pages = 0
+        self.commits = 0
+        self.flush_seconds = 0.0
+        self.durations = []
+        self.failures = []
+
+    def record_title(self, duration):
+        """Учитывает обработанный тайтл и время его обработки в секундах."""
+        self.titles += 1
+        self.durations.append(duration)
+
+    def record_flush(self, duration):
+        """Учитывает время записи пакета страницы в секундах."""
+        self.flush_seconds += duration
+
+    def record_failure(self, tmdb_id, title, error):
+        """Учитывает тайтл, изменения которого были отменены из-за ошибки."""
+        self.failures.append({'tmdb_id': tmdb_id, 'title': title, 'error': str(error)})
+
+    def record_commit(self):
+        """Учитывает фиксацию транзакции (вызывается через transaction.on_commit)."""
+        self.commits += 1
+
+    def percentile(self, percent):
+        """Возвращает перцентиль времени обработки тайтла в секундах."""
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def report(self):
+        """Возвращает сводку метрик."""
+        return {
+            'titles': self.titles,
+            'pages': self.pages,
+            'commits': self.commits,
+            'failed': len(self.failures),
+            'flush_seconds': round(self.flush_seconds, 3),
+            'p50_title_seconds': self.percentile(50),
+            'p95_title_seconds': self.percentile(95),
+        }
+
+
+class IngestionBatch:
+    """
+    Накопитель данных страницы контента для пакетной записи.
+    Сущности и связи собираются в памяти и записываются методом flush().
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Очищает накопленные данные пакета."""
+        self.genres = {}
+        self.actors = {}
+        self.directors = {}
+        self.countries = {}
+        self.objects = {}
+        self.links = {}
+        self.synced = set()
+
+    def __len__(self):
+        return len(self.objects)
+
+    def _link(self, obj, field_name, entities, storage):
+        """Запоминает сущности и связь объекта с ними."""
+        if not entities:
+            return False
+        for key, name in entities.items():
+            storage.setdefault(key, name)
+        field = type(obj)._meta.get_field(field_name)
+        self.links.setdefault(field, {})[obj.pk] = list(entities)
+        return True
+
+    def add_object(self, obj):
+        """Добавляет объект контента, который нужно сохранить при записи пакета."""
+        self.objects[(type(obj), obj.pk)] = obj
+
+    def discard(self, obj):
+        """Удаляет из пакета объект и его связи (после отката точки сохранения тайтла)."""
+        self.objects.pop((type(obj), obj.pk), None)
+        self.synced.discard(obj.pk)
+        for relations in self.links.values():
+            relations.pop(obj.pk, None)
+
+    def mark_synced(self, obj):
+        """Отмечает контент, детали которого не изменились, как синхронизированный."""
+        self.synced.add(obj.pk)
+
+    def add_genres(self, obj, genre_ids):
+        """Добавляет жанры нового контента (по tmdb_id из списка популярных)."""
+        self.add_object(obj)
+        genres = {gid: f'Genre {gid}' for gid in genre_ids}
+        self._link(obj, 'genres', genres, self.genres)
+
+    def add_movie_details(self, movie_obj, data):
+        """Добавляет страны, режиссёров и актёров фильма из деталей TMDB."""
+        self.add_object(movie_obj)
+        if not self._link(movie_obj, 'created_in', parse_countries(data), self.countries):
+            logger.warning(f"Нет данных о странах для фильма {movie_obj.title}, "
+                           f"существующие связи не изменены.")
+        if not self._link(movie_obj, 'director', parse_directors(data), self.directors):
+            logger.warning(f"Нет данных о режиссерах для фильма {movie_obj.title}, "
+                           f"существующие связи не изменены.")
+        if not self._link(movie_obj, 'actors', parse_actors(data), self.actors):
+            logger.warning(f"Нет данных об актерах для фильма {movie_obj.title}, "
+                           f"существующие связи не изменены.")
+
+    def add_series_details(self, series_obj, data):
+        """Добавляет страны и актёров сериала из деталей TMDB."""
+        self.add_object(series_obj)
+        if not self._link(series_obj, 'created_in', parse_countries(data), self.countries):
+            logger.warning(f"Нет данных о странах для сериала {series_obj.title}, "
+                           f"существующие связи не изменены.")
+        if not self._link(series_obj, 'actors', parse_actors(data), self.actors):
+            logger.warning(f"Нет данных об актерах для сериала {series_obj.title}, "
+                           f"существующие связи не изменены.")
+
+    def flush(self):
+        """
+        Записывает накопленный пакет в одной транзакции:
+        сущности через bulk_create(ignore_conflicts=True), затем каждый объект
+        контента в своей точке сохранения и строки промежуточных таблиц.
+        Объект, который не удалось сохранить, исключается из пакета вместе
+        со связями, остальные записываются. Возвращает список пар (объект, ошибка).
+        """
+        if not self.objects and not self.synced:
+            return []
+        failures = []
+        with transaction.atomic():
+            existing = {
+                Genre: bulk_upsert(Genre, self.genres),
+                Actor: bulk_upsert(Actor, self.actors),
+                Director: bulk_upsert(Director, self.directors),
+                Country: bulk_upsert(Country, self.countries),
+            }
+            for obj in list(self.objects.values()):
+                try:
+                    with transaction.atomic():
+                        obj.save()
+                except Exception as e:
+                    logger.error(f"Ошибка при записи {obj.title} (tmdb_id={obj.pk}): {e}")
+                    failures.append((obj, e))
+                    self.discard(obj)
+            for field, relations in self.links.items():
+                _replace_links(field, relations, existing[field.related_model])
+            if self.synced:
+                Content.objects.filter(pk__in=self.synced).update(
+                    last_synced_at=timezone.now())
+            if self.links:
+                transaction.on_commit(bump_catalog_version)
+                linked = {obj_id for relations in self.links.values() for obj_id in relations}
+                schedule_summary_refresh(linked)
+                schedule_stats_refresh(content_pks=linked)
+                mark_dirty(linked)
+                transaction.on_commit(lambda: mark_dirty(linked))
+        logger.info(f"Записан пакет контента: {len(self.objects)} объектов")
+        self.clear()
+        return failures
+
+
+def bulk_upsert(model, entities):
+    """
+    Создаёт отсутствующие сущности одним запросом и возвращает
+    множество ключей, которые действительно есть в базе.
+    Созданные сущности попадают в подсказки после фиксации транзакции
+    (bulk_create не отправляет сигналы post_save).
+    """
+    if not entities:
+        return set()
+    existing = set(model.objects.filter(pk__in=list(entities))
+                   .values_list('pk', flat=True))
+    missing = [key for key in entities if key not in existing]
+    if missing:
+        model.objects.bulk_create(
+            [model(pk=key, name=entities[key]) for key in missing],
+            ignore_conflicts=True,
+        )
+        created = {key: entities[key] for key in model.objects.filter(pk__in=missing)
+                   .values_list('pk', flat=True)}
+        existing.update(created)
+        if created:
+            transaction.on_commit(lambda: refresh_entities(model, created))
+            transaction.on_commit(lambda: bump_table_version(model))
+    schedule_stats_refresh(entities={model: existing})
+    for key in entities.keys() - existing:
+        logger.error(f"Ошибка при сохранении {model._meta.model_name} "
+                     f"{entities[key]}: конфликт уникальности")
+    return existing
+
+
+def _replace_links(field, relations, existing):
+    """Заменяет связи объектов в промежуточной таблице поля field (аналог set())."""
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    through.objects.filter(**{f'{source}__in': list(relations)}).delete()
+    through.objects.bulk_create([
+        through(**{f'{source}_id': obj_id, f'{target}_id': key})
+        for obj_id, keys in relations.items()
+        for key in keys if key in existing
+    ], ignore_conflicts=True)
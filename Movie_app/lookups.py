@@ -0,0 +1,38 @@
+"""
+Этот модуль отвечает за постраничный поиск актёров, режиссёров, жанров и стран
+для полей выбора, варианты которых загружаются с сервера по мере ввода.
+Ответ имеет формат, который ожидает Select2: {"results": [...], "pagination": {"more": ...}}.
+"""
+from .autocomplete import KINDS, get_autocomplete
+from .models import Actor, Country, Director, Genre
+
+LOOKUP_MODELS = {
+    'actor': Actor,
+    'director': Director,
+    'genre': Genre,
+    'country': Country,
+}
+
+PAGE_SIZE = 20
+
+
+def lookup_page(kind, query='', page=1):
+    """
+    Возвращает страницу вариантов вида kind, подходящих под query.
+    С запросом люди и жанры берутся из индекса подсказок (по популярности),
+    без запроса и для стран — из базы данных по алфавиту.
+    """
+    offset = (page - 1) * PAGE_SIZE
+    query = query.strip()
+    indexes = get_autocomplete() if query and kind in KINDS else None
+    if indexes:
+        items = indexes[kind].lookup(query, PAGE_SIZE + 1, offset)
+    else:
+        queryset = LOOKUP_MODELS[kind].objects.order_by('name')
+        if query:
+            queryset = queryset.filter(name__icontains=query)
+        items = list(queryset.values_list('pk', 'name')[offset:offset + PAGE_SIZE + 1])
+    return {
+        'results': [{'id': pk, 'text': name} for pk, name in items[:PAGE_SIZE]],
+        'pagination': {'more': len(items) > PAGE_SIZE},
+    }
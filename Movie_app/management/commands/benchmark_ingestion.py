@@ -0,0 +1,117 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from Movie_app.api import (get_genres_from_tmdb, get_popular_movies_from_tmdb,
+                           get_popular_series_from_tmdb)
+from Movie_app.ingestion import IngestionMetrics
+from Movie_app.tmdb_stub import StubFaults, TMDBStubServer, RECORDINGS_DIR
+
+
+class QueryCounter:
+    """Считает SQL-запросы, выполненные через соединение Django."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ('Benchmark TMDB ingestion against a local stub server with recorded responses. '
+            'Pages are committed for real; unless --commit is given, the run goes '
+            'into a scratch database that is dropped afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=1,
+                            help='Number of popular pages to import')
+        parser.add_argument('--type', choices=['movies', 'series', 'all'], default='all',
+                            help='Content type to import')
+        parser.add_argument('--synthetic', action='store_true',
+                            help='Serve a generated catalog instead of recorded responses')
+        parser.add_argument('--per-page', type=int, default=20,
+                            help='Titles per page of the synthetic catalog')
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help='Added latency of every stub response, in seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Share of responses replaced with HTTP 500')
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                            help='Share of responses replaced with HTTP 429')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Random seed for failure injection')
+        parser.add_argument('--commit', action='store_true',
+                            help='Keep imported titles in the database')
+
+    def handle(self, *args, **options):
+        stub = TMDBStubServer(
+            recordings_dir=None if options['synthetic'] else RECORDINGS_DIR,
+            faults=StubFaults(latency=options['latency'], error_rate=options['error_rate'],
+                              rate_limit_rate=options['rate_limit_rate'], seed=options['seed']),
+        )
+        if options['synthetic']:
+            stub.add_synthetic_catalog(options['pages'], options['per_page'])
+
+        with stub, override_settings(TMDB_BASE_URL=stub.base_url, TMDB_API_KEY='benchmark',
+                                     TMDB_CACHE_ENABLED=False, TMDB_MAX_RETRIES=5):
+            if options['commit']:
+                report = self._run(options)
+            else:
+                report = self._run_in_scratch_database(options)
+        report.update({
+            'http_requests': len(stub.requests),
+            'injected_errors': stub.injected['errors'],
+            'injected_rate_limits': stub.injected['rate_limited'],
+            'committed': options['commit'],
+        })
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _run_in_scratch_database(self, options):
+        """
+        Выполняет прогон в отдельной базе <NAME>_benchmark, созданной миграциями,
+        и удаляет её после прогона, не трогая данные основной базы.
+        """
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        previous_name = test_settings.get('NAME')
+        database_name = connection.settings_dict['NAME']
+        test_settings['NAME'] = f"{database_name}_benchmark"
+        try:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                return self._run(options)
+            finally:
+                connection.creation.destroy_test_db(database_name, verbosity=0)
+        finally:
+            test_settings['NAME'] = previous_name
+
+    def _run(self, options):
+        """
+        Импортирует страницы в режиме автофиксации: каждая страница фиксируется
+        своей транзакцией, и её обработчики on_commit выполняются внутри замера
+        времени и подсчёта запросов.
+        """
+        metrics = IngestionMetrics()
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            self._import(options, metrics)
+            elapsed = time.perf_counter() - started
+        return {
+            **metrics.report(),
+            'seconds': round(elapsed, 3),
+            'titles_per_second': round(metrics.titles / elapsed, 2) if elapsed else 0.0,
+            'queries': counter.count,
+            'queries_per_title': round(counter.count / metrics.titles, 2)
+            if metrics.titles else 0.0,
+        }
+
+    def _import(self, options, metrics):
+        """Импортирует страницы популярного."""
+        get_genres_from_tmdb()
+        for page in range(1, options['pages'] + 1):
+            if options['type'] in ('movies', 'all'):
+                get_popular_movies_from_tmdb(page, force=True, metrics=metrics)
+            if options['type'] in ('series', 'all'):
+                get_popular_series_from_tmdb(page, force=True, metrics=metrics)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from Movie_app.search import REFRESH_BATCH_SIZE
+from Movie_app.search_index import build_search_index, index_path
+
+
+class Command(BaseCommand):
+    help = ('Build the BM25 search index used when CONTENT_SEARCH_BACKEND is "bm25". '
+            'Rebuilding also compacts the log of incremental updates.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=None,
+                            help='Index directory (defaults to SEARCH_INDEX_PATH)')
+        parser.add_argument('--batch-size', type=int, default=REFRESH_BATCH_SIZE,
+                            help='Number of titles read per batch')
+
+    def handle(self, *args, **options):
+        path = options['path'] or index_path()
+        count = build_search_index(path, batch_size=options['batch_size'])
+        self.stdout.write(f"Indexed {count} titles into {path}.")
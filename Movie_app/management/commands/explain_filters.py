@@ -0,0 +1,195 @@
+import json
+import random
+import re
+from dataclasses import dataclass
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from Movie_app.catalog import CatalogLoader
+from Movie_app.filters import FILTER_RELATIONS, MATCH_ALL, MATCH_ANY, apply_filters
+from Movie_app.listing import listing_queryset
+from Movie_app.models import Content, Movie, Series
+
+MODELS = {'content': Content, 'movie': Movie, 'series': Series}
+
+ORDERING = {
+    Content: ('-tmdb_id',),
+    Movie: ('-rating', '-tmdb_id'),
+    Series: ('-rating', '-tmdb_id'),
+}
+
+SYNTHETIC_ID_BASE = 900_000_000
+
+TIME_PATTERN = re.compile(r'(Planning|Execution) Time: ([\d.]+) ms')
+
+
+def base_queryset(model):
+    """Queryset списка модели в том виде, в каком его читают представления."""
+    if model is Content:
+        return listing_queryset()
+    return model.objects.all()
+
+
+def join_distinct_queryset(model, selection, match):
+    """
+    Прежний способ фильтрации: соединение с промежуточными таблицами
+    на каждый фасет (на каждое значение при MATCH_ALL) и DISTINCT по строкам контента.
+    """
+    queryset = base_queryset(model)
+    subclasses = {'movie__': Movie, 'series__': Series} if model is Content else {'': model}
+    for name, relation in FILTER_RELATIONS.items():
+        keys = selection.get(name)
+        if not keys:
+            continue
+        for group in ([key] for key in keys) if match == MATCH_ALL else [keys]:
+            condition = Q(pk__in=[])
+            for prefix, subclass in subclasses.items():
+                if any(field.name == relation for field in subclass._meta.many_to_many):
+                    condition |= Q(**{f'{prefix}{relation}__in': group})
+            queryset = queryset.filter(condition)
+    return queryset.distinct()
+
+
+@dataclass(frozen=True)
+class SyntheticCatalog:
+    """Размер синтетического каталога: число тайтлов и сущностей каждого вида."""
+    titles: int
+    genres: int = 20
+    actors: int = 20000
+    countries: int = 60
+    directors: int = 5000
+    seed: int = 0
+
+
+def _synthetic_entities(keys, label):
+    """Сущности с ключами keys (по возрастанию) в формате TMDB."""
+    return [{'id': SYNTHETIC_ID_BASE + key, 'name': f"Synthetic {label} {key}"}
+            for key in sorted(keys)]
+
+
+def synthetic_records(catalog):
+    """Генерирует записи каталога SyntheticCatalog со скошенным распределением связей."""
+    rng = random.Random(catalog.seed)
+    genre_weights = [1 / (rank + 1) for rank in range(catalog.genres)]
+    actor_weights = [1 / (rank + 1) for rank in range(catalog.actors)]
+    country_weights = [1 / (rank + 1) ** 2 for rank in range(catalog.countries)]
+    codes = [f"{chr(65 + index // 26 % 26)}{chr(65 + index % 26)}"
+             for index in range(catalog.countries)]
+    for index in range(catalog.titles):
+        is_series = index % 4 == 3
+        genres = set(rng.choices(range(catalog.genres), genre_weights, k=rng.randint(1, 3)))
+        actors = set(rng.choices(range(catalog.actors), actor_weights, k=10))
+        countries = set(rng.choices(range(catalog.countries), country_weights,
+                                    k=rng.randint(1, 2)))
+        director = rng.randrange(catalog.directors)
+        yield {
+            'id': SYNTHETIC_ID_BASE + index,
+            'media_type': 'tv' if is_series else 'movie',
+            'name' if is_series else 'title': f"Synthetic {index}",
+            'vote_average': round(rng.uniform(1, 10), 1),
+            'genres': _synthetic_entities(genres, 'genre'),
+            'production_countries': [{'iso_3166_1': codes[key], 'name': f"Country {codes[key]}"}
+                                     for key in sorted(countries)],
+            'credits': {
+                'cast': _synthetic_entities(actors, 'actor'),
+                'crew': [] if is_series else [{**_synthetic_entities([director], 'director')[0],
+                                               'job': 'Director'}],
+            },
+        }
+
+
+def busiest_selection():
+    """Два самых частых жанра и самая частая страна среди фильмов."""
+    def top(field, limit):
+        through = field.remote_field.through
+        target = f'{field.m2m_reverse_field_name()}_id'
+        return list(through.objects.values(target).annotate(titles=Count('pk'))
+                    .order_by('-titles').values_list(target, flat=True)[:limit])
+    return {'genre': top(Movie._meta.get_field('genres'), 2),
+            'country': top(Movie._meta.get_field('created_in'), 1)}
+
+
+def explain(queryset, repeat):
+    """
+    EXPLAIN ANALYZE запроса: лучшее из repeat (не меньше одного) время выполнения,
+    планирование и план.
+    """
+    runs = []
+    for _ in range(repeat):
+        plan = queryset.explain(analyze=True, buffers=True)
+        times = dict(TIME_PATTERN.findall(plan))
+        runs.append({'execution_ms': float(times.get('Execution', 0)),
+                     'planning_ms': float(times.get('Planning', 0)),
+                     'plan': plan.splitlines()})
+    return min(runs, key=lambda run: run['execution_ms'])
+
+
+class Command(BaseCommand):
+    help = 'Compare EXPLAIN ANALYZE of join + DISTINCT and EXISTS facet filters of list views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(MODELS), default='content',
+                            help='List to filter')
+        parser.add_argument('--match', choices=[MATCH_ANY, MATCH_ALL], default=MATCH_ANY,
+                            help='Require any or all of the selected values of a facet')
+        parser.add_argument('--genre', type=int, action='append', help='Genre id (repeatable)')
+        parser.add_argument('--actor', type=int, action='append', help='Actor id (repeatable)')
+        parser.add_argument('--director', type=int, action='append',
+                            help='Director id (repeatable)')
+        parser.add_argument('--country', action='append', help='Country ISO code (repeatable)')
+        parser.add_argument('--limit', type=int, default=20, help='Page size')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs of each query; the fastest one is reported')
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help='Generate this many titles for the run (rolled back afterwards)')
+        parser.add_argument('--genres', type=int, default=20,
+                            help='Genres of the synthetic catalog')
+        parser.add_argument('--actors', type=int, default=20000,
+                            help='Actors of the synthetic catalog')
+        parser.add_argument('--countries', type=int, default=60,
+                            help='Countries of the synthetic catalog')
+        parser.add_argument('--directors', type=int, default=5000,
+                            help='Directors of the synthetic catalog')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed of the synthetic catalog')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        if connection.vendor != 'postgresql':
+            raise CommandError('EXPLAIN ANALYZE comparison requires PostgreSQL')
+        model = MODELS[options['model']]
+        with transaction.atomic():
+            if options['synthetic']:
+                self._load_synthetic(options)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            selection = {name: options[name] for name in FILTER_RELATIONS if options[name]} \
+                or busiest_selection()
+            report = {'model': options['model'], 'match': options['match'],
+                      'selection': selection, 'titles': Content.objects.count()}
+            variants = {
+                'join_distinct': join_distinct_queryset(model, selection, options['match']),
+                'exists': apply_filters(base_queryset(model), selection, options['match']),
+            }
+            for name, queryset in variants.items():
+                queryset = queryset.order_by(*ORDERING[model])[:options['limit']]
+                report[name] = explain(queryset, options['repeat'])
+                report[name]['rows'] = list(queryset.values_list('pk', flat=True))
+            report['same_rows'] = report['join_distinct']['rows'] == report['exists']['rows']
+            exists_ms = report['exists']['execution_ms']
+            report['speedup'] = round(report['join_distinct']['execution_ms'] / exists_ms, 2) \
+                if exists_ms else None
+            if options['synthetic']:
+                transaction.set_rollback(True)
+        self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+
+    def _load_synthetic(self, options):
+        loader = CatalogLoader()
+        catalog = SyntheticCatalog(options['synthetic'], options['genres'], options['actors'],
+                                   options['countries'], options['directors'], options['seed'])
+        for record in synthetic_records(catalog):
+            if loader.add(record):
+                loader.flush()
+        loader.flush()
+        self.stderr.write(f"Generated {loader.loaded} synthetic titles.")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from Movie_app.posters import get_poster_cache, iter_poster_urls
+
+
+class Command(BaseCommand):
+    help = 'Download poster thumbnails into the local media cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Number of parallel downloads')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Fetch posters of at most this many movies '
+                                 'and series each (by rating)')
+        parser.add_argument('--evict', action='store_true',
+                            help='Only evict least recently used posters over the size limit')
+
+    def handle(self, *args, **options):
+        cache = get_poster_cache()
+        if options['evict']:
+            cache.evict()
+            self.stdout.write(f"Poster cache size: {cache.size()} bytes")
+            return
+
+        count = cache.fetch_many(iter_poster_urls(options['limit']), workers=options['workers'])
+        stats = cache.stats
+        self.stdout.write(f"Processed {count} posters: {stats['downloaded']} downloaded, "
+                          f"{stats['cached']} already cached, {stats['failed']} failed, "
+                          f"{stats['evictions']} evicted.")
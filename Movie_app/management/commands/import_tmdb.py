@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from Movie_app.api import (get_genres_from_tmdb, get_popular_movies_from_tmdb,
+                           get_popular_series_from_tmdb)
+from Movie_app.ingestion import IngestionMetrics
+from Movie_app.posters import get_poster_cache, iter_poster_urls
+from Movie_app.tmdb_cache import get_response_cache
+
+
+class Command(BaseCommand):
+    help = 'Import popular movies and series from TMDB'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=1,
+                            help='Number of popular pages to import')
+        parser.add_argument('--start-page', type=int, default=1,
+                            help='First popular page to import')
+        parser.add_argument('--type', choices=['movies', 'series', 'all'], default='all',
+                            help='Content type to import')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-fetch details even for recently synced titles')
+        parser.add_argument('--posters', action='store_true',
+                            help='Download poster thumbnails into the local media cache')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        pages = range(options['start_page'], options['start_page'] + options['pages'])
+
+        self.stdout.write('Importing genres...')
+        get_genres_from_tmdb()
+
+        metrics = IngestionMetrics()
+        for page in pages:
+            if options['type'] in ('movies', 'all'):
+                self.stdout.write(f'Importing popular movies, page {page}...')
+                get_popular_movies_from_tmdb(page, force=force, metrics=metrics)
+            if options['type'] in ('series', 'all'):
+                self.stdout.write(f'Importing popular series, page {page}...')
+                get_popular_series_from_tmdb(page, force=force, metrics=metrics)
+
+        self.stdout.write(f"Processed {metrics.titles} titles on {metrics.pages} pages "
+                          f"in {metrics.commits} commits")
+        for failure in metrics.failures:
+            self.stderr.write(f"Failed to import {failure['title']} "
+                              f"(tmdb_id={failure['tmdb_id']}): {failure['error']}")
+
+        if options['posters']:
+            self.stdout.write('Fetching posters...')
+            get_poster_cache().fetch_many(iter_poster_urls())
+
+        cache = get_response_cache()
+        if cache is not None:
+            report = cache.report()
+            cache.save_stats()
+            self.stdout.write(f"TMDB cache hit rate: {report['hit_rate']:.1%} "
+                              f"({report['hits']} hits, {report['revalidated']} revalidated, "
+                              f"{report['misses']} misses)")
+
+        self.stdout.write('Import finished successfully.')
@@ -0,0 +1,50 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from Movie_app.catalog import DEFAULT_BATCH_SIZE, CatalogLoader, iter_dump
+from Movie_app.models import SyncState
+
+
+class Command(BaseCommand):
+    help = 'Bulk load movies and series from a (gzipped) JSONL catalog dump'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .jsonl or .jsonl.gz dump')
+        parser.add_argument('--media-type', choices=['movie', 'tv'],
+                            help='Media type of records without media_type '
+                                 '(e.g. TMDB daily ID exports)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Records per transaction')
+        parser.add_argument('--offset', type=int,
+                            help='Start from this uncompressed byte offset')
+        parser.add_argument('--resume', action='store_true',
+                            help='Start from the offset stored by the previous run')
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Use bulk_create even on PostgreSQL')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+
+        state, _ = SyncState.objects.get_or_create(key=f'load_catalog:{path.name}')
+        offset = options['offset']
+        if offset is None:
+            offset = state.offset if options['resume'] else 0
+
+        loader = CatalogLoader(batch_size=options['batch_size'],
+                               use_copy=False if options['no_copy'] else None)
+        self.stdout.write(f'Loading {path} from offset {offset}...')
+
+        position = offset
+        for record, position in iter_dump(path, offset):
+            if loader.add(record, options['media_type']):
+                self._flush(loader, state, position)
+        self._flush(loader, state, position)
+
+        self.stdout.write(f'Loaded {loader.loaded} titles, skipped {loader.skipped}.')
+
+    def _flush(self, loader, state, position):
+        loader.flush()
+        state.offset = position
+        state.save()
+        self.stdout.write(f'Loaded {loader.loaded} titles, offset {position}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from Movie_app import summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized content summaries used by list pages and search results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=summaries.REFRESH_BATCH_SIZE,
+                            help='Number of titles refreshed per batch')
+
+    def handle(self, *args, **options):
+        count = summaries.rebuild_summaries(batch_size=options['batch_size'])
+        self.stdout.write(f"Rebuilt {count} content summaries.")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from Movie_app import entity_stats
+
+MODELS = {model._meta.model_name: model for model in entity_stats.STATS_MODELS}
+
+
+class Command(BaseCommand):
+    help = 'Rebuild aggregate statistics (title count, average rating, latest release, ' \
+           'popularity) of genres, actors, directors and countries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=sorted(MODELS),
+                            help='Rebuild only the given entity type (can be repeated)')
+        parser.add_argument('--batch-size', type=int, default=entity_stats.REFRESH_BATCH_SIZE,
+                            help='Number of entities aggregated per batch')
+
+    def handle(self, *args, **options):
+        models = [MODELS[name] for name in options['model']] if options['model'] else None
+        counts = entity_stats.rebuild_entity_stats(models, batch_size=options['batch_size'])
+        for model, count in counts.items():
+            self.stdout.write(f"Rebuilt statistics of {count} {model._meta.model_name} rows.")
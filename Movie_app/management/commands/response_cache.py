@@ -0,0 +1,28 @@
+import json
+from django.core.management.base import BaseCommand
+from Movie_app.conditional import conditional_stats, reset_conditional_stats
+from Movie_app.response_cache import (bump_catalog_version, catalog_version,
+                                      reset_response_cache_stats, response_cache_stats)
+
+
+class Command(BaseCommand):
+    help = ('Show hit/miss statistics of the page response cache and 304 Not Modified '
+            'statistics of conditional requests, or invalidate the cache')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidate', action='store_true',
+                            help='Bump the catalog version so that all cached pages expire')
+        parser.add_argument('--reset-stats', action='store_true',
+                            help='Reset hit/miss and conditional request counters')
+
+    def handle(self, *args, **options):
+        if options['invalidate']:
+            bump_catalog_version()
+            self.stdout.write('Cached responses invalidated.')
+        report = {'catalog_version': catalog_version(), 'views': response_cache_stats(),
+                  'conditional': conditional_stats()}
+        if options['reset_stats']:
+            reset_response_cache_stats()
+            reset_conditional_stats()
+            self.stdout.write('Statistics reset.')
+        self.stdout.write(json.dumps(report, indent=2))
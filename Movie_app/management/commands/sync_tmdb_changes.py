@@ -0,0 +1,36 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from Movie_app.api import TMDBClientError
+from Movie_app.models import SyncState
+from Movie_app.sync import MEDIA_TYPES, sync_changes
+
+
+class Command(BaseCommand):
+    help = 'Refresh local movies and series changed in TMDB since the stored watermark'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=[*MEDIA_TYPES, 'all'], default='all',
+                            help='Change feed to read')
+        parser.add_argument('--since', type=datetime.fromisoformat,
+                            help='Override the stored watermark (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since is not None and timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        media_types = list(MEDIA_TYPES) if options['type'] == 'all' else [options['type']]
+
+        for media_type in media_types:
+            self.stdout.write(f'Syncing {media_type} changes...')
+            try:
+                updated = sync_changes(media_type, since=since)
+            except TMDBClientError as e:
+                raise CommandError(str(e)) from e
+            self.stdout.write(f'Updated {updated} {media_type} titles.')
+            failed = SyncState.objects.get(key=f'tmdb_changes:{media_type}').failed_ids
+            if failed:
+                self.stdout.write(self.style.WARNING(
+                    f'{len(failed)} {media_type} titles failed and will be retried next run.'))
+
+        self.stdout.write('Sync finished successfully.')
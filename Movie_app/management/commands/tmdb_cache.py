@@ -0,0 +1,33 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from Movie_app.tmdb_cache import get_response_cache
+
+
+class Command(BaseCommand):
+    help = 'Show statistics of the on-disk TMDB response cache, evict or clear it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Remove all cached responses')
+        parser.add_argument('--evict', action='store_true',
+                            help='Evict least recently used entries down to the size limit')
+
+    def handle(self, *args, **options):
+        cache = get_response_cache()
+        if cache is None:
+            raise CommandError('TMDB response cache is disabled (TMDB_CACHE_ENABLED).')
+
+        if options['clear']:
+            cache.clear()
+            self.stdout.write('Cache cleared.')
+        elif options['evict']:
+            cache.evict()
+            self.stdout.write('Cache evicted.')
+
+        totals = cache.save_stats()
+        requests_total = totals.get('hits', 0) + totals.get('misses', 0) \
+            + totals.get('revalidated', 0)
+        served = totals.get('hits', 0) + totals.get('revalidated', 0)
+        report = cache.report()
+        report['total'] = totals
+        report['total_hit_rate'] = served / requests_total if requests_total else 0.0
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from Movie_app import search
+from Movie_app.models import Content
+
+
+class Command(BaseCommand):
+    help = 'Rebuild full-text search documents for all movies and series'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=search.REFRESH_BATCH_SIZE,
+                            help='Number of titles refreshed per batch')
+
+    def handle(self, *args, **options):
+        if not search.full_text_search_enabled():
+            raise CommandError('Full-text search requires PostgreSQL')
+        pks = Content.objects.order_by('pk').values_list('pk', flat=True)
+        count = search.refresh_search_documents(pks, batch_size=options['batch_size'])
+        self.stdout.write(f"Refreshed {count} search documents.")
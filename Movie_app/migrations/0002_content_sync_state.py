@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последняя синхронизация с TMDB'),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='payload_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Хэш данных TMDB'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:57
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0002_content_sync_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('watermark', models.DateTimeField(blank=True, null=True, verbose_name='Синхронизировано до')),
+                ('page', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Последняя обработанная страница')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:59
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0003_syncstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='offset',
+            field=models.BigIntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Позиция в файле'),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+
+NAME_RELATIONS = {
+    'movie': ('genres', 'actors', 'director', 'created_in'),
+    'series': ('genres', 'actors', 'created_in'),
+}
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Устанавливает расширение pg_trgm (если это разрешено) и создаёт
+    триграммный индекс по названию для поиска с опечатками.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SAVEPOINT create_pg_trgm")
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT create_pg_trgm")
+        cursor.execute("RELEASE SAVEPOINT create_pg_trgm")
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is not None:
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS search_document_title_trgm '
+                'ON "Movie_app_searchdocument" USING gin (title gin_trgm_ops)')
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS search_document_title_trgm')
+
+
+def backfill_search_documents(apps, schema_editor):
+    """
+    Строит поисковые документы уже загруженного контента (как update_search_documents),
+    чтобы поиск не остался пустым сразу после migrate (только PostgreSQL).
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    SearchDocument = apps.get_model('Movie_app', 'SearchDocument')
+    config = getattr(settings, 'SEARCH_CONFIG', 'russian')
+    vector = (SearchVector('title', weight='A', config=config)
+              + SearchVector('names', weight='B', config=config)
+              + SearchVector('description', weight='C', config=config))
+    for name, relations in NAME_RELATIONS.items():
+        model = apps.get_model('Movie_app', name)
+        pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), BACKFILL_BATCH_SIZE):
+            batch = pks[start:start + BACKFILL_BATCH_SIZE]
+            names = {}
+            for relation in relations:
+                field = model._meta.get_field(relation)
+                source = field.m2m_field_name()
+                target = field.m2m_reverse_field_name()
+                rows = field.remote_field.through.objects.filter(**{f'{source}_id__in': batch}) \
+                    .values_list(f'{source}_id', f'{target}__name')
+                for pk, entity_name in rows:
+                    names.setdefault(pk, []).append(entity_name)
+            SearchDocument.objects.bulk_create([
+                SearchDocument(content_id=content.pk, title=content.title,
+                               rating=content.rating or 0, description=content.description or '',
+                               names=' '.join(names.get(content.pk, [])))
+                for content in model.objects.filter(pk__in=batch)
+            ], ignore_conflicts=True)
+            SearchDocument.objects.filter(pk__in=batch).update(search_vector=vector)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0004_syncstate_offset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='Movie_app.content')),
+                ('title', models.CharField(max_length=200)),
+                ('rating', models.IntegerField(default=0)),
+                ('description', models.TextField(blank=True)),
+                ('names', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_document_vector_gin')],
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0005_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['rating', 'release_date'], name='movie_rating_release_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['release_date', 'rating'], name='movie_release_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='series',
+            index=models.Index(fields=['rating', 'release_date'], name='series_rating_release_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='series',
+            index=models.Index(fields=['release_date', 'rating'], name='series_release_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0006_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Обновлено'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+
+LINK_RELATIONS = {
+    'movie': ('genres', 'actors', 'director', 'created_in'),
+    'series': ('genres', 'actors', 'created_in'),
+}
+
+
+def create_genre_index(apps, schema_editor):
+    """GIN-индекс по genre_ids для поиска карточек жанра (только PostgreSQL)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS summary_genre_ids_gin '
+        'ON "Movie_app_contentsummary" USING gin (genre_ids jsonb_path_ops)')
+
+
+def drop_genre_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS summary_genre_ids_gin')
+
+
+def backfill_summaries(apps, schema_editor):
+    """
+    Строит карточки уже загруженного контента (как rebuild_content_summaries),
+    чтобы списки не опустели сразу после migrate.
+    """
+    ContentSummary = apps.get_model('Movie_app', 'ContentSummary')
+    actors = getattr(settings, 'CONTENT_SUMMARY_ACTORS', 5)
+    for kind, relations in LINK_RELATIONS.items():
+        model = apps.get_model('Movie_app', kind)
+        pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), BACKFILL_BATCH_SIZE):
+            batch = pks[start:start + BACKFILL_BATCH_SIZE]
+            links = {}
+            for relation in relations:
+                field = model._meta.get_field(relation)
+                source = field.m2m_field_name()
+                target = field.m2m_reverse_field_name()
+                rows = field.remote_field.through.objects.filter(**{f'{source}_id__in': batch}) \
+                    .order_by('pk').values_list(f'{source}_id', f'{target}_id', f'{target}__name')
+                for pk, key, name in rows:
+                    links.setdefault(pk, {}).setdefault(relation, []).append((key, name))
+            summaries = []
+            for content in model.objects.filter(pk__in=batch):
+                related = links.get(content.pk, {})
+                genres = sorted(related.get('genres', []), key=lambda genre: genre[1])
+                directors = related.get('director', [])
+                summaries.append(ContentSummary(
+                    content_id=content.pk, kind=kind, title=content.title,
+                    rating=content.rating, release_date=content.release_date,
+                    description=content.description, poster_url=content.poster_url,
+                    seasons=getattr(content, 'seasons', None),
+                    episodes=getattr(content, 'episodes', None),
+                    genre_ids=[key for key, _ in genres], genre_names=[name for _, name in genres],
+                    actor_names=[name for _, name in related.get('actors', [])[:actors]],
+                    director_name=directors[0][1] if directors else '',
+                    country_names=[name for _, name in related.get('created_in', [])],
+                    updated_at=content.updated_at,
+                ))
+            ContentSummary.objects.bulk_create(summaries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0007_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentSummary',
+            fields=[
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='Movie_app.content')),
+                ('kind', models.CharField(choices=[('movie', 'Фильм'), ('series', 'Сериал')], max_length=6)),
+                ('title', models.CharField(max_length=200)),
+                ('rating', models.IntegerField(blank=True, null=True)),
+                ('release_date', models.DateField(blank=True, null=True)),
+                ('description', models.TextField(blank=True)),
+                ('poster_url', models.URLField(blank=True)),
+                ('seasons', models.IntegerField(blank=True, null=True)),
+                ('episodes', models.IntegerField(blank=True, null=True)),
+                ('genre_ids', models.JSONField(blank=True, default=list)),
+                ('genre_names', models.JSONField(blank=True, default=list)),
+                ('actor_names', models.JSONField(blank=True, default=list)),
+                ('director_name', models.CharField(blank=True, max_length=200)),
+                ('country_names', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-rating', '-content'], name='summary_rating_idx'), models.Index(fields=['kind', '-rating', '-content'], name='summary_kind_rating_idx')],
+            },
+        ),
+        migrations.RunPython(create_genre_index, drop_genre_index),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
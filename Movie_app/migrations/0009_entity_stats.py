@@ -0,0 +1,119 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+BACKFILL_BATCH_SIZE = 1000
+
+STATS_RELATIONS = {
+    ('genre', 'genrestats'): {'movie': 'genres', 'series': 'genres'},
+    ('actor', 'actorstats'): {'movie': 'actors', 'series': 'actors'},
+    ('director', 'directorstats'): {'movie': 'director'},
+    ('country', 'countrystats'): {'movie': 'created_in', 'series': 'created_in'},
+}
+
+
+def backfill_entity_stats(apps, schema_editor):
+    """
+    Считает агрегаты уже загруженных сущностей (как rebuild_entity_stats),
+    чтобы списки сущностей не опустели сразу после migrate.
+    """
+    for (entity_name, stats_name), relations in STATS_RELATIONS.items():
+        entity_model = apps.get_model('Movie_app', entity_name)
+        stats_model = apps.get_model('Movie_app', stats_name)
+        key = stats_model._meta.pk.attname
+        pks = list(entity_model.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), BACKFILL_BATCH_SIZE):
+            batch = pks[start:start + BACKFILL_BATCH_SIZE]
+            totals = {}
+            for content_name, relation in relations.items():
+                field = apps.get_model('Movie_app', content_name)._meta.get_field(relation)
+                source = field.m2m_field_name()
+                target = field.m2m_reverse_field_name()
+                rows = field.remote_field.through.objects.filter(**{f'{target}_id__in': batch}) \
+                    .values(f'{target}_id').order_by() \
+                    .annotate(count=Count('pk'), total=Sum(f'{source}__rating'),
+                              rated=Count(f'{source}__rating'),
+                              latest=Max(f'{source}__release_date')) \
+                    .values_list(f'{target}_id', 'count', 'total', 'rated', 'latest')
+                for pk, count, total, rated, latest in rows:
+                    previous = totals.get(pk, (0, 0, 0, None))
+                    totals[pk] = (previous[0] + count, previous[1] + (total or 0),
+                                  previous[2] + rated,
+                                  max(filter(None, (previous[3], latest)), default=None))
+            stats = []
+            for pk in batch:
+                count, total, rated, latest = totals.get(pk, (0, 0, 0, None))
+                average = round(total / rated, 2) if rated else None
+                stats.append(stats_model(**{key: pk}, title_count=count, average_rating=average,
+                                         latest_release=latest,
+                                         popularity=round(count * (average or 0) / 100, 4)))
+            stats_model.objects.bulk_create(stats, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0008_contentsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActorStats',
+            fields=[
+                ('title_count', models.IntegerField(default=0, verbose_name='Тайтлов')),
+                ('average_rating', models.FloatField(blank=True, null=True, verbose_name='Средний рейтинг')),
+                ('latest_release', models.DateField(blank=True, null=True, verbose_name='Последний выход')),
+                ('popularity', models.FloatField(default=0, verbose_name='Популярность')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('actor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='Movie_app.actor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-popularity', '-actor'], name='actor_stats_popularity_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CountryStats',
+            fields=[
+                ('title_count', models.IntegerField(default=0, verbose_name='Тайтлов')),
+                ('average_rating', models.FloatField(blank=True, null=True, verbose_name='Средний рейтинг')),
+                ('latest_release', models.DateField(blank=True, null=True, verbose_name='Последний выход')),
+                ('popularity', models.FloatField(default=0, verbose_name='Популярность')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('country', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='Movie_app.country')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-popularity', '-country'], name='country_stats_popularity_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DirectorStats',
+            fields=[
+                ('title_count', models.IntegerField(default=0, verbose_name='Тайтлов')),
+                ('average_rating', models.FloatField(blank=True, null=True, verbose_name='Средний рейтинг')),
+                ('latest_release', models.DateField(blank=True, null=True, verbose_name='Последний выход')),
+                ('popularity', models.FloatField(default=0, verbose_name='Популярность')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('director', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='Movie_app.director')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-popularity', '-director'], name='director_stats_popularity_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='GenreStats',
+            fields=[
+                ('title_count', models.IntegerField(default=0, verbose_name='Тайтлов')),
+                ('average_rating', models.FloatField(blank=True, null=True, verbose_name='Средний рейтинг')),
+                ('latest_release', models.DateField(blank=True, null=True, verbose_name='Последний выход')),
+                ('popularity', models.FloatField(default=0, verbose_name='Популярность')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('genre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='Movie_app.genre')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-popularity', '-genre'], name='genre_stats_popularity_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_entity_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0009_entity_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncstate',
+            name='failed_ids',
+            field=models.JSONField(blank=True, default=list, verbose_name='Не обновлённые тайтлы'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:02
+
+import Movie_app.models
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0010_syncstate_failed_ids'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=Movie_app.models.OpClassIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='varchar_pattern_ops'), name='content_title_upper_prefix_idx'),
+        ),
+    ]
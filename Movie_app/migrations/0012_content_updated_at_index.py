@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Movie_app', '0011_content_title_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='content',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Обновлено'),
+        ),
+    ]
@@ -3,7 +3,13 @@
 """
 from datetime import date
 from polymorphic.models import PolymorphicModel
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator, URLValidator
 from django.core.exceptions import ValidationError
 
@@ -86,6 +92,22 @@ class Country(models.Model):
             raise ValidationError("Название страны не может быть пустым.")
 
 
+class OpClassIndex(models.Index):
+    """
+    Индекс по выражениям с классами операторов PostgreSQL (OpClass).
+    На других базах данных (SQLite в тестах) классы операторов не указываются.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        expressions = [expression.get_source_expressions()[0]
+                       if isinstance(expression, OpClass) else expression
+                       for expression in self.expressions]
+        return models.Index(*expressions, name=self.name).create_sql(
+            model, schema_editor, using=using, **kwargs)
+
+
 class Content(PolymorphicModel):
     """
     Модель для представления контента.
@@ -96,6 +118,25 @@ class Content(PolymorphicModel):
         validators=[MinValueValidator(1)])
     title = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
+    last_synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Последняя синхронизация с TMDB"
+    )
+    payload_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="Хэш данных TMDB"
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Обновлено")
+
+    class Meta:
+        # title__istartswith сравнивает UPPER(title) LIKE 'ПРЕФИКС%'; класс операторов
+        # varchar_pattern_ops позволяет использовать индекс для LIKE при любой сортировке базы.
+        indexes = [
+            OpClassIndex(OpClass(Upper('title'), name='varchar_pattern_ops'),
+                         name='content_title_upper_prefix_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -104,6 +145,12 @@ class Content(PolymorphicModel):
         if not self.title.strip():
             raise ValidationError("Название контента не может быть пустым.")
 
+    def is_fresh(self, max_age):
+        """Проверяет, синхронизирован ли контент с TMDB не раньше, чем max_age назад."""
+        if self.last_synced_at is None:
+            return False
+        return timezone.now() - self.last_synced_at < max_age
+
 
 class Movie(Content):
     """
@@ -126,6 +173,12 @@ class Movie(Content):
     description = models.TextField(blank=True, verbose_name="Описание")
     poster_url = models.URLField(blank=True, validators=[URLValidator()])
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['rating', 'release_date'], name='movie_rating_release_idx'),
+            models.Index(fields=['release_date', 'rating'], name='movie_release_rating_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -165,6 +218,12 @@ class Series(Content):
     description = models.TextField(blank=True, verbose_name="Описание")
     poster_url = models.URLField(blank=True, validators=[URLValidator()])
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['rating', 'release_date'], name='series_rating_release_idx'),
+            models.Index(fields=['release_date', 'rating'], name='series_release_rating_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -178,3 +237,339 @@ class Series(Content):
             raise ValidationError("Жанры не могут быть пустыми.")
         if not self.created_in.exists():
             raise ValidationError("Страны производства не могут быть пустыми.")
+
+
+class SyncState(models.Model):
+    """
+    Модель для хранения состояния инкрементальной синхронизации с TMDB.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    watermark = models.DateTimeField(null=True, blank=True,
+                                     verbose_name="Синхронизировано до")
+    page = models.IntegerField(default=0, validators=[MinValueValidator(0)],
+                               verbose_name="Последняя обработанная страница")
+    offset = models.BigIntegerField(default=0, validators=[MinValueValidator(0)],
+                                    verbose_name="Позиция в файле")
+    failed_ids = models.JSONField(default=list, blank=True,
+                                  verbose_name="Не обновлённые тайтлы")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.watermark}"
+
+
+class SearchDocument(models.Model):
+    """
+    Модель поискового документа фильма или сериала: название, описание
+    и имена связанных жанров, актёров, режиссёров и стран вместе с tsvector.
+    """
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='search_document')
+    title = models.CharField(max_length=200)
+    rating = models.IntegerField(default=0)
+    description = models.TextField(blank=True)
+    names = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [GinIndex(fields=['search_vector'], name='search_document_vector_gin')]
+
+    def __str__(self):
+        return self.title
+
+
+class ContentSummary(models.Model):
+    """
+    Денормализованная карточка фильма или сериала для списков и результатов поиска:
+    тип, рейтинг, дата выхода, постер, жанры, первые актёры и режиссёр в одной строке.
+    updated_at копируется из Content и служит ключом кэша карточки.
+    Списки хранятся в JSONField; GIN-индекс по genre_ids создаётся миграцией
+    только в PostgreSQL. Строки пересчитываются модулем summaries.
+    """
+    MOVIE = 'movie'
+    SERIES = 'series'
+    KIND_CHOICES = [(MOVIE, 'Фильм'), (SERIES, 'Сериал')]
+
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='summary')
+    kind = models.CharField(max_length=6, choices=KIND_CHOICES)
+    title = models.CharField(max_length=200)
+    rating = models.IntegerField(null=True, blank=True)
+    release_date = models.DateField(null=True, blank=True)
+    description = models.TextField(blank=True)
+    poster_url = models.URLField(blank=True)
+    seasons = models.IntegerField(null=True, blank=True)
+    episodes = models.IntegerField(null=True, blank=True)
+    genre_ids = models.JSONField(default=list, blank=True)
+    genre_names = models.JSONField(default=list, blank=True)
+    actor_names = models.JSONField(default=list, blank=True)
+    director_name = models.CharField(max_length=200, blank=True)
+    country_names = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rating', '-content'], name='summary_rating_idx'),
+            models.Index(fields=['kind', '-rating', '-content'], name='summary_kind_rating_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def tmdb_id(self):
+        return self.content_id
+
+    @property
+    def is_series(self):
+        return self.kind == self.SERIES
+
+
+class EntityStats(models.Model):
+    """
+    Абстрактная модель агрегатов сущности: число фильмов и сериалов, средний рейтинг,
+    дата последнего выхода и популярность. Строки пересчитываются модулем entity_stats.
+    """
+    title_count = models.IntegerField(default=0, verbose_name="Тайтлов")
+    average_rating = models.FloatField(null=True, blank=True, verbose_name="Средний рейтинг")
+    latest_release = models.DateField(null=True, blank=True, verbose_name="Последний выход")
+    popularity = models.FloatField(default=0, verbose_name="Популярность")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class GenreStats(EntityStats):
+    """Агрегаты жанра."""
+    genre = models.OneToOneField(Genre, on_delete=models.CASCADE, primary_key=True,
+                                 related_name='stats')
+
+    class Meta:
+        indexes = [models.Index(fields=['-popularity', '-genre'],
+                                name='genre_stats_popularity_idx')]
+
+
+class ActorStats(EntityStats):
+    """Агрегаты актёра."""
+    actor = models.OneToOneField(Actor, on_delete=models.CASCADE, primary_key=True,
+                                 related_name='stats')
+
+    class Meta:
+        indexes = [models.Index(fields=['-popularity', '-actor'],
+                                name='actor_stats_popularity_idx')]
+
+
+class DirectorStats(EntityStats):
+    """Агрегаты режиссёра."""
+    director = models.OneToOneField(Director, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='stats')
+
+    class Meta:
+        indexes = [models.Index(fields=['-popularity', '-director'],
+                                name='director_stats_popularity_idx')]
+
+
+class CountryStats(EntityStats):
+    """Агрегаты страны."""
+    country = models.OneToOneField(Country, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='stats')
+
+    class Meta:
+        indexes = [models.Index(fields=['-popularity', '-country'],
+                                name='country_stats_popularity_idx')]
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_save, sender=Series)
+@receiver(pre_delete, sender=Movie)
+@receiver(pre_delete, sender=Series)
+@receiver(post_delete, sender=Movie)
+@receiver(post_delete, sender=Series)
+def record_content_change(sender, instance, **kwargs):
+    """
+    Передаёт сохранение или удаление фильма или сериала в content_changes.
+    Сущности удаляемого контента запоминаются до удаления строк связей.
+    """
+    from .content_changes import record_change
+    from .entity_stats import linked_entities
+    if kwargs['signal'] is pre_delete:
+        record_change(entities=linked_entities([instance.pk]))
+    elif kwargs['signal'] is post_delete:
+        record_change([instance.pk], titles={instance.pk: None})
+    else:
+        record_change([instance.pk],
+                      titles={instance.pk: (instance.title, instance.rating or 0)})
+
+
+def changed_link_content_pks(instance, action, reverse, pk_set):
+    """
+    Первичные ключи контента, связи которого меняет сигнал m2m_changed,
+    или None для действий, которые не нужно обрабатывать.
+    При очистке связей со стороны сущности контент находится до удаления строк.
+    """
+    if reverse and action == 'pre_clear':
+        return [pk for name in ('movie_set', 'series_set') if hasattr(instance, name)
+                for pk in getattr(instance, name).values_list('pk', flat=True)]
+    if action in ('post_add', 'post_remove') or (action == 'post_clear' and not reverse):
+        return list(pk_set or ()) if reverse else [instance.pk]
+    return None
+
+
+def changed_link_entities(sender, instance, action, reverse, **kwargs):
+    """
+    Сущности ({модель: ключи}), у которых сигнал m2m_changed меняет список контента,
+    или None. При очистке связей со стороны контента сущности находятся до удаления строк.
+    """
+    if reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            return {type(instance): [instance.pk]}
+        return None
+    if action in ('post_add', 'post_remove'):
+        return {kwargs['model']: kwargs['pk_set']}
+    if action == 'pre_clear':
+        field = next(field for field in type(instance)._meta.many_to_many
+                     if field.remote_field.through is sender)
+        return {kwargs['model']: list(getattr(instance, field.name).values_list('pk', flat=True))}
+    return None
+
+
+@receiver(m2m_changed, sender=Movie.genres.through)
+@receiver(m2m_changed, sender=Movie.actors.through)
+@receiver(m2m_changed, sender=Movie.director.through)
+@receiver(m2m_changed, sender=Movie.created_in.through)
+@receiver(m2m_changed, sender=Series.genres.through)
+@receiver(m2m_changed, sender=Series.actors.through)
+@receiver(m2m_changed, sender=Series.created_in.through)
+def record_link_change(sender, instance, action, reverse, **kwargs):
+    """
+    Обновляет updated_at контента, у которого изменились связи (ключ кэша карточек),
+    и передаёт изменение в content_changes.
+    """
+    from .content_changes import record_change
+    pks = changed_link_content_pks(instance, action, reverse, kwargs['pk_set'])
+    entities = changed_link_entities(sender, instance, action, reverse, **kwargs)
+    if pks:
+        Content.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    if pks or entities:
+        record_change(pks or (), entities)
+
+
+@receiver(pre_save, sender=Genre)
+@receiver(pre_save, sender=Actor)
+@receiver(pre_save, sender=Director)
+@receiver(pre_save, sender=Country)
+def detect_entity_rename(sender, instance, update_fields=None, **kwargs):
+    """Отмечает в instance.renamed, меняется ли при сохранении название сущности."""
+    instance.renamed = False
+    if instance._state.adding or (update_fields is not None and 'name' not in update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+    instance.renamed = previous is not None and previous != instance.name
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Country)
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Actor)
+@receiver(pre_delete, sender=Director)
+@receiver(pre_delete, sender=Country)
+def update_entity_search_documents(sender, instance, **kwargs):
+    """Пересчитывает поисковые документы контента переименованной или удаляемой сущности."""
+    from .search import schedule_refresh
+    from .summaries import linked_content_pks
+    if kwargs['signal'] is pre_delete or getattr(instance, 'renamed', False):
+        schedule_refresh(linked_content_pks(instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Country)
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Actor)
+@receiver(pre_delete, sender=Director)
+@receiver(pre_delete, sender=Country)
+def update_entity_summaries(sender, instance, created=False, **kwargs):
+    """Пересчитывает карточки контента переименованной или удаляемой сущности."""
+    from .summaries import linked_content_pks, schedule_summary_refresh
+    if not created:
+        schedule_summary_refresh(linked_content_pks(instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Country)
+def create_entity_stats(sender, instance, created, **kwargs):
+    """Создаёт строку агрегатов новой сущности, чтобы она попала в список сущностей."""
+    from .entity_stats import schedule_stats_refresh
+    if created:
+        schedule_stats_refresh(entities={sender: [instance.pk]})
+
+
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=Director)
+@receiver(post_delete, sender=Genre)
+def update_entity_autocomplete(sender, instance, **kwargs):
+    """Обновляет подсказку для актёра, режиссёра или жанра после фиксации изменений."""
+    from .autocomplete import refresh_entry
+    kind = sender.__name__.lower()
+    pk = instance.pk
+    name = None if kwargs['signal'] is post_delete else instance.name
+    transaction.on_commit(lambda: refresh_entry(kind, pk, name))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=Director)
+@receiver(post_delete, sender=Country)
+def invalidate_cached_responses(sender, **kwargs):
+    """
+    Увеличивает версию каталога после изменения сущности, чтобы кэшированные страницы
+    перестали отдаваться (сразу и повторно после фиксации, чтобы не закэшировать
+    незафиксированное состояние). Изменения контента и связей учитывает content_changes.
+    """
+    from .response_cache import bump_catalog_version
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_content(sender, instance, **kwargs):
+    """
+    Обновляет updated_at контента переименованного или удаляемого жанра:
+    название жанра выводится в карточках.
+    """
+    if kwargs.get('created') or instance.pk is None:
+        return
+    if 'created' in kwargs and not getattr(instance, 'renamed', False):
+        return
+    Content.objects.filter(models.Q(movie__genres=instance) | models.Q(series__genres=instance)) \
+        .update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Actor)
+@receiver(post_delete, sender=Director)
+@receiver(post_delete, sender=Country)
+def invalidate_entity_fragments(sender, **kwargs):
+    """Увеличивает версию таблицы сущностей для кэша фрагментов (сразу и после фиксации)."""
+    from .fragments import bump_table_version
+    bump_table_version(sender)
+    transaction.on_commit(lambda: bump_table_version(sender))
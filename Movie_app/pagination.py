@@ -0,0 +1,210 @@
+"""
+Этот модуль отвечает за постраничный вывод списков по ключу (keyset pagination).
+Вместо OFFSET следующая страница выбирается условием по значениям ключа
+сортировки последней записи, поэтому стоимость запроса не зависит от номера страницы.
+Позиция передаётся в непрозрачном курсоре, а общее количество записей оценивается
+по статистике PostgreSQL вместо COUNT(*).
+"""
+import base64
+import json
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.http import Http404
+from django.utils.functional import cached_property
+
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values, number, previous=False):
+    """Кодирует значения ключа сортировки и номер страницы в курсор."""
+    payload = {'v': values, 'n': number}
+    if previous:
+        payload['p'] = 1
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (значения ключа, номер страницы, направление назад) из курсора."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return list(payload['v']), int(payload['n']), bool(payload.get('p'))
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Некорректный курсор: {cursor}") from e
+
+
+def estimate_count(queryset):
+    """
+    Оценивает количество записей queryset.
+    В PostgreSQL используется статистика pg_class (для запросов без фильтров)
+    или оценка планировщика из EXPLAIN; небольшие выборки считаются точно.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                           [connection.ops.quote_name(queryset.model._meta.db_table)])
+        else:
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return queryset.count()
+    if queryset.query.where:
+        plan = json.loads(row[0]) if isinstance(row[0], str) else row[0]
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+    else:
+        estimate = int(row[0])
+    if estimate < EXACT_COUNT_THRESHOLD:
+        return queryset.count()
+    return estimate
+
+
+class KeysetPage:
+    """Страница записей, выбранная по ключу сортировки."""
+
+    def __init__(self, object_list, paginator, number, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.number = number
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод queryset по ключу сортировки ordering,
+    например ('-rating', '-tmdb_id'). Последнее поле ключа должно быть уникальным.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    @cached_property
+    def count(self):
+        """Оценка общего количества записей."""
+        return estimate_count(self.queryset)
+
+    def _fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def _seek(self, values, backwards):
+        """Строит условие выбора записей после (или до) записи с ключом values."""
+        fields = self._fields()
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-') != backwards
+            step = Q(**{f"{fields[index]}__{'lt' if descending else 'gt'}": values[index]})
+            for previous_field, value in zip(fields[:index], values):
+                step &= Q(**{previous_field: value})
+            condition |= step
+        return condition
+
+    def _key(self, obj):
+        return [getattr(obj, field) for field in self._fields()]
+
+    def page(self, cursor=None):
+        """Возвращает страницу, на которую указывает курсор (первую, если курсора нет)."""
+        if cursor:
+            values, number, backwards = decode_cursor(cursor)
+            if len(values) != len(self.ordering):
+                raise InvalidCursor(f"Некорректный курсор: {cursor}")
+        else:
+            values, number, backwards = None, 1, False
+
+        ordering = self.ordering
+        if backwards:
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}'
+                             for field in ordering)
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if backwards:
+            objects.reverse()
+
+        next_cursor = previous_cursor = None
+        if objects:
+            if has_more or backwards:
+                next_cursor = encode_cursor(self._key(objects[-1]), number + 1)
+            if number > 1 and (has_more or not backwards):
+                previous_cursor = encode_cursor(self._key(objects[0]), number - 1,
+                                                previous=True)
+        return KeysetPage(objects, self, number, next_cursor, previous_cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    Подключает постраничный вывод по ключу к ListView.
+    Ключ сортировки задаётся атрибутом keyset_ordering; ссылки со старым
+    параметром ?page= и готовые последовательности (например, pk фасетного
+    поиска) обрабатываются обычной постраничной разбивкой.
+    """
+    keyset_ordering = None
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset_ordering or self.page_kwarg in self.request.GET \
+                or not isinstance(queryset, QuerySet):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor as e:
+            raise Http404(str(e)) from e
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def _page_url(self, name, value):
+        params = self.request.GET.copy()
+        params.pop(self.page_kwarg, None)
+        params.pop(self.cursor_kwarg, None)
+        params[name] = value
+        return f"?{params.urlencode()}"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        context['next_page_url'] = context['previous_page_url'] = None
+        if isinstance(page, KeysetPage):
+            if page.has_next():
+                context['next_page_url'] = self._page_url(self.cursor_kwarg, page.next_cursor)
+            if page.has_previous():
+                context['previous_page_url'] = self._page_url(self.cursor_kwarg,
+                                                              page.previous_cursor)
+        elif page is not None:
+            if page.has_next():
+                context['next_page_url'] = self._page_url(self.page_kwarg,
+                                                          page.next_page_number())
+            if page.has_previous():
+                context['previous_page_url'] = self._page_url(self.page_kwarg,
+                                                              page.previous_page_number())
+        return context
@@ -0,0 +1,210 @@
+"""
+Этот модуль отвечает за локальный кэш постеров.
+Постер каждого контента скачивается один раз в нескольких размерах TMDB
+(w92, w185, w342) и сохраняется в MEDIA_ROOT/posters/<размер>/<файл>,
+откуда его отдаёт nginx по пути /media/.
+Размеры постера записываются и удаляются вместе, поэтому наличие постера
+проверяется одним обращением к диску. Размер каталога ограничен: давно
+не использованные постеры удаляются. После загрузки новых постеров
+обновляется updated_at их контента, чтобы кэш карточек перестроился.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+import requests
+from django.conf import settings
+from django.utils import timezone
+from .models import Content, ContentSummary, Movie, Series
+from .response_cache import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+TMDB_IMAGE_HOST = 'image.tmdb.org'
+
+POSTER_SIZES = ('w92', 'w185', 'w342')
+
+POSTER_WIDTHS = {'w92': 92, 'w185': 185, 'w342': 342}
+
+DEFAULT_POSTER_SIZE = 'w185'
+
+CACHED, DOWNLOADED, FAILED = 'cached', 'downloaded', 'failed'
+
+
+def poster_path_from_url(poster_url):
+    """
+    Возвращает путь постера TMDB (например, '/abc.jpg') из poster_url
+    или None, если постер хранится не на TMDB.
+    """
+    if not poster_url:
+        return None
+    url = urlsplit(poster_url)
+    if url.netloc != TMDB_IMAGE_HOST:
+        return None
+    name = url.path.rsplit('/', 1)[-1]
+    return f'/{name}' if name else None
+
+
+class PosterCache:
+    """
+    Кэш постеров на диске с ограничением общего размера.
+    Один и тот же постер (по пути TMDB) скачивается только один раз.
+    """
+
+    def __init__(self, directory, image_base_url, max_bytes, sizes=POSTER_SIZES):
+        self.directory = Path(directory)
+        self.image_base_url = image_base_url.rstrip('/')
+        self.max_bytes = max_bytes
+        self.sizes = sizes
+        self.stats = {'downloaded': 0, 'cached': 0, 'failed': 0, 'evictions': 0}
+
+    def path(self, poster_path, size):
+        return self.directory / size / poster_path.lstrip('/')
+
+    def is_local(self, poster_path):
+        """Скачан ли постер (проверяется размер, который записывается последним)."""
+        return self.path(poster_path, self.sizes[-1]).exists()
+
+    def fetch(self, poster_path):
+        """
+        Скачивает постер во всех размерах.
+        Возвращает True, если постер есть на диске.
+        """
+        return self._fetch(poster_path) != FAILED
+
+    def _fetch(self, poster_path):
+        """
+        Скачивает все размеры постера и записывает их, только если загрузились все.
+        Возвращает CACHED, DOWNLOADED или FAILED.
+        """
+        if self.is_local(poster_path):
+            for size in self.sizes:
+                self.stats['cached'] += 1
+                os.utime(self.path(poster_path, size))
+            return CACHED
+        images = {}
+        for size in self.sizes:
+            try:
+                response = requests.get(f"{self.image_base_url}/{size}{poster_path}", timeout=10)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Ошибка при загрузке постера {poster_path} ({size}): {e}")
+                self.stats['failed'] += 1
+                continue
+            images[size] = response.content
+        if len(images) < len(self.sizes):
+            return FAILED
+        for size in self.sizes:
+            path = self.path(poster_path, size)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            temp_path.write_bytes(images[size])
+            os.replace(temp_path, path)
+            self.stats['downloaded'] += 1
+        return DOWNLOADED
+
+    def fetch_many(self, poster_urls, workers=8):
+        """
+        Скачивает постеры в несколько потоков, пропуская повторяющиеся
+        и не относящиеся к TMDB, и обновляет контент с новыми постерами.
+        Возвращает количество обработанных постеров.
+        """
+        urls_by_path = {}
+        for poster_url in poster_urls:
+            poster_path = poster_path_from_url(poster_url)
+            if poster_path:
+                urls_by_path.setdefault(poster_path, set()).add(poster_url)
+        poster_paths = sorted(urls_by_path)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._fetch, poster_paths))
+        touch_poster_content({url for poster_path, result in zip(poster_paths, results)
+                              if result == DOWNLOADED for url in urls_by_path[poster_path]})
+        if self.size() > self.max_bytes:
+            self.evict()
+        return len(poster_paths)
+
+    def _entries(self):
+        return [path for size in self.sizes for path in (self.directory / size).glob('*')
+                if path.is_file() and not path.name.endswith('.tmp')]
+
+    def size(self):
+        """Возвращает общий размер постеров на диске в байтах."""
+        return sum(path.stat().st_size for path in self._entries())
+
+    def evict(self, target_bytes=None):
+        """
+        Удаляет давно не использованные постеры (все размеры сразу), пока размер
+        каталога не станет меньше target_bytes (по умолчанию 90% лимита).
+        """
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.9)
+        posters = {}
+        for path in self._entries():
+            posters.setdefault(path.name, []).append((path.stat(), path))
+        entries = sorted(posters.values(),
+                         key=lambda files: max(stat.st_mtime for stat, _ in files))
+        size = sum(stat.st_size for files in entries for stat, _ in files)
+        for files in entries:
+            if size <= target_bytes:
+                break
+            for stat, path in files:
+                path.unlink(missing_ok=True)
+                size -= stat.st_size
+                self.stats['evictions'] += 1
+        logger.info(f"Кэш постеров очищен до {size} байт")
+
+
+def iter_poster_urls(limit=None):
+    """
+    Возвращает poster_url фильмов и сериалов (по убыванию рейтинга).
+    limit ограничивает количество тайтлов каждого типа.
+    """
+    for model in (Movie, Series):
+        poster_urls = model.objects.exclude(poster_url='').order_by('-rating') \
+            .values_list('poster_url', flat=True)
+        if limit is not None:
+            poster_urls = poster_urls[:limit]
+        yield from poster_urls.iterator()
+
+
+def get_poster_cache():
+    """Возвращает кэш постеров согласно настройкам POSTER_CACHE_*."""
+    return PosterCache(
+        getattr(settings, 'POSTER_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'posters')),
+        getattr(settings, 'POSTER_IMAGE_BASE_URL', f'https://{TMDB_IMAGE_HOST}/t/p'),
+        getattr(settings, 'POSTER_CACHE_MAX_BYTES', 1024 * 1024 * 1024),
+    )
+
+
+def touch_poster_content(poster_urls):
+    """
+    Обновляет updated_at контента и его карточки с постерами poster_urls
+    (ключ кэша карточек) и версию каталога для кэша страниц.
+    """
+    if not poster_urls:
+        return
+    now = timezone.now()
+    pks = [pk for model in (Movie, Series)
+           for pk in model.objects.filter(poster_url__in=poster_urls).values_list('pk', flat=True)]
+    Content.objects.filter(pk__in=pks).update(updated_at=now)
+    ContentSummary.objects.filter(content_id__in=pks).update(updated_at=now)
+    bump_catalog_version()
+
+
+def local_poster_urls(poster_url, cache=None):
+    """
+    Возвращает словарь {размер: URL} локальных копий постера
+    или пустой словарь, если постер ещё не скачан.
+    """
+    poster_path = poster_path_from_url(poster_url)
+    if poster_path is None:
+        return {}
+    cache = cache or get_poster_cache()
+    if not cache.is_local(poster_path):
+        return {}
+    urls = {}
+    for size in cache.sizes:
+        relative = os.path.relpath(cache.path(poster_path, size), settings.MEDIA_ROOT)
+        urls[size] = f"{settings.MEDIA_URL}{relative.replace(os.sep, '/')}"
+    return urls
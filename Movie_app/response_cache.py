@@ -0,0 +1,236 @@
+"""
+Этот модуль отвечает за кэширование готовых ответов страниц для анонимных посетителей.
+Ключ ответа строится по имени представления, пути с параметрами запроса
+и глобальной «версии каталога». Любое изменение контента, сущностей или их связей
+(сигналы моделей, пакеты загрузки) увеличивает версию, поэтому все прежние
+ответы перестают находиться без перебора ключей, а затем вытесняются по TTL.
+Хранилище задаётся алиасом RESPONSE_CACHE_ALIAS из CACHES (locmem, файлы
+или Redis-совместимый сервер), время жизни — RESPONSE_CACHE_TIMEOUT
+и RESPONSE_CACHE_TIMEOUTS для отдельных представлений. Счётчики попаданий
+копятся в памяти процесса и переносятся в хранилище не чаще раза
+в RESPONSE_CACHE_STATS_FLUSH_INTERVAL секунд, а не при каждом запросе.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from types import SimpleNamespace
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'movie_app:catalog_version'
+RESPONSE_KEY_PREFIX = 'movie_app:response'
+STATS_KEY_PREFIX = 'movie_app:response_stats'
+VIEWS_KEY = 'movie_app:response_views'
+
+EVENTS = ('hits', 'misses', 'bypassed')
+
+_views = set()
+_stats = SimpleNamespace(pending=Counter(), flushed_at=0.0)
+_stats_lock = threading.Lock()
+
+
+def response_cache():
+    """Хранилище кэша ответов (RESPONSE_CACHE_ALIAS)."""
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def response_timeout(name, default=None):
+    """
+    Время жизни ответов представления name в секундах: RESPONSE_CACHE_TIMEOUTS[name],
+    иначе default, иначе RESPONSE_CACHE_TIMEOUT. 0 отключает кэширование.
+    """
+    if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+        return 0
+    timeouts = getattr(settings, 'RESPONSE_CACHE_TIMEOUTS', {})
+    if name in timeouts:
+        return timeouts[name]
+    if default is not None:
+        return default
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 5 * 60)
+
+
+def catalog_version():
+    """
+    Текущая версия каталога. Если счётчик отсутствует (например, был вытеснен),
+    он начинается с текущего времени в миллисекундах, чтобы не совпасть
+    с версиями уже сохранённых ответов.
+    """
+    cache = response_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns() // 1_000_000, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Увеличивает версию каталога, делая недействительными все кэшированные ответы."""
+    cache = response_cache()
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        catalog_version()
+        version = cache.incr(VERSION_KEY)
+    logger.debug(f"Версия каталога увеличена до {version}")
+    return version
+
+
+def response_key(name, request, version=None):
+    """Ключ ответа представления name для пути и параметров запроса request."""
+    if version is None:
+        version = catalog_version()
+    digest = hashlib.sha256(request.get_full_path().encode('utf-8')).hexdigest()
+    return f"{RESPONSE_KEY_PREFIX}:{version}:{name}:{digest}"
+
+
+def _register(name):
+    """Запоминает имя представления в хранилище, чтобы метрики видели все процессы."""
+    if name not in _views:
+        _views.add(name)
+        cache = response_cache()
+        cache.set(VIEWS_KEY, set(cache.get(VIEWS_KEY) or ()) | _views, timeout=None)
+
+
+def _take_stats():
+    """Забирает накопленные в процессе счётчики (под _stats_lock)."""
+    pending, _stats.pending = _stats.pending, Counter()
+    _stats.flushed_at = time.monotonic()
+    return pending
+
+
+def _write_stats(pending):
+    cache = response_cache()
+    for key, delta in pending.items():
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)
+
+
+def _record(name, event, delta=1):
+    """Учитывает событие в памяти процесса; раз в интервал счётчики переносятся в хранилище."""
+    interval = getattr(settings, 'RESPONSE_CACHE_STATS_FLUSH_INTERVAL', 10)
+    with _stats_lock:
+        _stats.pending[f"{STATS_KEY_PREFIX}:{name}:{event}"] += delta
+        if time.monotonic() - _stats.flushed_at < interval:
+            return
+        pending = _take_stats()
+    _write_stats(pending)
+
+
+def flush_response_cache_stats():
+    """Переносит накопленные в этом процессе счётчики в хранилище."""
+    with _stats_lock:
+        pending = _take_stats()
+    _write_stats(pending)
+
+
+def response_cache_stats():
+    """Возвращает {представление: {hits, misses, bypassed, hit_rate}} по всем процессам."""
+    flush_response_cache_stats()
+    cache = response_cache()
+    names = sorted(cache.get(VIEWS_KEY) or ())
+    values = cache.get_many([f"{STATS_KEY_PREFIX}:{name}:{event}"
+                             for name in names for event in EVENTS])
+    stats = {}
+    for name in names:
+        row = {event: values.get(f"{STATS_KEY_PREFIX}:{name}:{event}", 0) for event in EVENTS}
+        served = row['hits'] + row['misses']
+        row['hit_rate'] = row['hits'] / served if served else 0.0
+        stats[name] = row
+    return stats
+
+
+def reset_response_cache_stats():
+    """Обнуляет счётчики попаданий и промахов."""
+    flush_response_cache_stats()
+    cache = response_cache()
+    cache.delete_many([f"{STATS_KEY_PREFIX}:{name}:{event}"
+                       for name in cache.get(VIEWS_KEY) or () for event in EVENTS])
+
+
+def _cacheable(request, response):
+    """
+    Ответ можно отдавать другим посетителям, только если это обычная страница 200,
+    которая не устанавливает cookie и не содержит CSRF-токен.
+    """
+    return (response.status_code == 200 and not response.streaming
+            and not response.cookies and not request.META.get('CSRF_COOKIE_USED')
+            and 'private' not in response.get('Cache-Control', ''))
+
+
+def cached_response(name, request, get_response, timeout=None):
+    """
+    Возвращает ответ представления name (по умолчанию — имя маршрута) из кэша
+    или вызывает get_response() и сохраняет результат. Запросы, кроме GET и HEAD,
+    и запросы вошедших пользователей всегда обрабатываются представлением.
+    """
+    name = name or request.resolver_match.url_name
+    _register(name)
+    timeout = response_timeout(name, timeout)
+    if not timeout or request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        _record(name, 'bypassed')
+        return get_response()
+
+    cache = response_cache()
+    key = response_key(name, request)
+    response = cache.get(key)
+    if response is not None:
+        _record(name, 'hits')
+        response['X-Cache'] = 'HIT'
+        return response
+
+    _record(name, 'misses')
+    response = get_response()
+
+    def store(response):
+        if _cacheable(request, response):
+            cache.set(key, response, timeout)
+        response['X-Cache'] = 'MISS'
+
+    if callable(getattr(response, 'render', None)) and not response.is_rendered:
+        response.add_post_render_callback(store)
+    else:
+        store(response)
+    return response
+
+
+def cache_response(name=None, timeout=None):
+    """Декоратор представления-функции, кэширующий ответы для анонимных посетителей."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return cached_response(name, request, lambda: view(request, *args, **kwargs),
+                                   timeout)
+        return wrapper
+    return decorator
+
+
+class CachedResponseMixin:
+    """
+    Кэширует ответы представления-класса для анонимных посетителей.
+    Имя в метриках и RESPONSE_CACHE_TIMEOUTS задаётся атрибутом response_cache_name
+    (по умолчанию — имя маршрута), время жизни по умолчанию — response_cache_timeout.
+    """
+    response_cache_name = None
+    response_cache_timeout = None
+
+    def dispatch(self, request, *args, **kwargs):
+        dispatch = super().dispatch
+        return cached_response(self.response_cache_name, request,
+                               lambda: dispatch(request, *args, **kwargs),
+                               self.response_cache_timeout)
+
+
+def clear_response_cache():
+    """Удаляет все кэшированные ответы и метрики из хранилища."""
+    with _stats_lock:
+        _take_stats()
+    response_cache().clear()
+    _views.clear()
@@ -0,0 +1,235 @@
+"""
+Этот модуль отвечает за полнотекстовый поиск контента.
+Для каждого фильма и сериала поддерживается поисковый документ (SearchDocument)
+с названием, описанием и именами жанров, актёров, режиссёров и стран.
+В PostgreSQL по документу строится tsvector с GIN-индексом, результаты
+ранжируются ts_rank, а при наличии расширения pg_trgm находятся и названия
+с опечатками. В остальных СУБД используется индекс BM25 (модуль search_index)
+или поиск через icontains.
+"""
+import logging
+import threading
+from types import SimpleNamespace
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank, SearchVector,
+                                            TrigramSimilarity)
+from django.db import connection, transaction
+from django.db.models import F, Q
+from .filters import FILTER_RELATIONS, relation_exists
+from .listing import listing_queryset, prepare_listing
+from .models import Movie, SearchDocument, Series
+from .summaries import load_summaries
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH_SIZE = 1000
+
+RESULTS_PER_PAGE = 20
+
+NAME_RELATIONS = {
+    Movie: ('genres', 'actors', 'director', 'created_in'),
+    Series: ('genres', 'actors', 'created_in'),
+}
+
+_state = SimpleNamespace(trigram_available=None)
+
+_pending = threading.local()
+
+
+def full_text_search_enabled():
+    """Полнотекстовый поиск доступен только в PostgreSQL."""
+    return connection.vendor == 'postgresql'
+
+
+def trigram_available():
+    """Проверяет (один раз за процесс), установлено ли расширение pg_trgm."""
+    if _state.trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _state.trigram_available = cursor.fetchone() is not None
+    return _state.trigram_available
+
+
+def search_backend():
+    """
+    Возвращает бэкенд поиска контента (CONTENT_SEARCH_BACKEND):
+    'postgres' — полнотекстовый поиск PostgreSQL, 'bm25' — индекс в памяти процесса,
+    'icontains' — поиск подстроки. Без PostgreSQL 'postgres' заменяется на 'icontains'.
+    """
+    backend = getattr(settings, 'CONTENT_SEARCH_BACKEND', 'postgres')
+    if backend == 'postgres' and not full_text_search_enabled():
+        return 'icontains'
+    return backend
+
+
+def search_config():
+    """Конфигурация текстового поиска PostgreSQL (SEARCH_CONFIG)."""
+    return getattr(settings, 'SEARCH_CONFIG', 'russian')
+
+
+def search_vector():
+    """Выражение tsvector документа: название важнее имён, имена важнее описания."""
+    config = search_config()
+    return (SearchVector('title', weight='A', config=config)
+            + SearchVector('names', weight='B', config=config)
+            + SearchVector('description', weight='C', config=config))
+
+
+def _collect_names(pks_by_model):
+    """Возвращает словарь {pk: [имена связанных сущностей]}."""
+    names = {}
+    for model, pks in pks_by_model.items():
+        if not pks:
+            continue
+        for relation in NAME_RELATIONS[model]:
+            field = model._meta.get_field(relation)
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            rows = through.objects.filter(**{f'{source}_id__in': pks}) \
+                .values_list(f'{source}_id', f'{target}__name')
+            for pk, name in rows:
+                names.setdefault(pk, []).append(name)
+    return names
+
+
+def build_documents(pks, batch_size=REFRESH_BATCH_SIZE):
+    """
+    Строит несохранённые поисковые документы контента с первичными ключами pks.
+    Возвращает генератор списков документов по batch_size записей;
+    на каждый список выполняется фиксированное число запросов.
+    """
+    pks = list(pks)
+    for start in range(0, len(pks), batch_size):
+        contents = prepare_listing(listing_queryset().filter(pk__in=pks[start:start + batch_size]))
+        if not contents:
+            continue
+        names = _collect_names({
+            Movie: [obj.pk for obj in contents if not obj.is_series],
+            Series: [obj.pk for obj in contents if obj.is_series],
+        })
+        yield [
+            SearchDocument(content_id=obj.pk, title=obj.title, rating=obj.rating or 0,
+                           description=obj.description or '',
+                           names=' '.join(names.get(obj.pk, [])))
+            for obj in contents
+        ]
+
+
+def refresh_search_documents(pks, batch_size=REFRESH_BATCH_SIZE):
+    """
+    Пересчитывает поисковые документы контента с первичными ключами pks.
+    Возвращает количество обновлённых документов.
+    """
+    if not full_text_search_enabled():
+        return 0
+    updated = 0
+    for documents in build_documents(pks, batch_size):
+        SearchDocument.objects.bulk_create(
+            documents, update_conflicts=True, unique_fields=['content'],
+            update_fields=['title', 'rating', 'description', 'names'])
+        SearchDocument.objects.filter(pk__in=[document.pk for document in documents]) \
+            .update(search_vector=search_vector())
+        updated += len(documents)
+    return updated
+
+
+def queue_refresh(pks):
+    """
+    Добавляет ключи к поисковым документам, ожидающим пересчёта
+    в refresh_pending_documents. Возвращает False, если поиск их не использует.
+    """
+    if not full_text_search_enabled() and search_backend() != 'bm25':
+        return False
+    pending = getattr(_pending, 'pks', None)
+    if pending is None:
+        pending = _pending.pks = set()
+    pending.update(pks)
+    return True
+
+
+def schedule_refresh(pks):
+    """
+    Откладывает пересчёт поисковых документов (и обновление индекса BM25,
+    если он выбран бэкендом поиска) до фиксации текущей транзакции.
+    Ключи, накопленные за транзакцию, обрабатываются одним пакетом.
+    """
+    if queue_refresh(pks):
+        transaction.on_commit(refresh_pending_documents)
+
+
+def refresh_pending_documents():
+    """Пересчитывает накопленные документы (повторные вызовы ничего не делают)."""
+    pks = getattr(_pending, 'pks', None)
+    if not pks:
+        return
+    _pending.pks = set()
+    try:
+        refresh_search_documents(sorted(pks))
+        if search_backend() == 'bm25':
+            from .search_index import update_search_index
+            update_search_index(sorted(pks))
+    except Exception as e:
+        logger.error(f"Ошибка обновления поисковых документов: {e}")
+
+
+def search_documents(query):
+    """
+    Возвращает queryset поисковых документов, подходящих под запрос,
+    упорядоченный по релевантности (ts_rank и сходство названия), затем по рейтингу.
+    """
+    search_query = SearchQuery(query, search_type='websearch', config=search_config())
+    condition = Q(search_vector=search_query)
+    rank = SearchRank(F('search_vector'), search_query)
+    if trigram_available():
+        condition |= Q(title__trigram_similar=query)
+        rank = rank + TrigramSimilarity('title', query)
+    return SearchDocument.objects.filter(condition).annotate(rank=rank) \
+        .order_by('-rank', '-rating', 'pk')
+
+
+def ranked_pks(query):
+    """
+    Возвращает первичные ключи найденного контента в порядке релевантности
+    выбранного бэкенда или None, если нужно использовать поиск через icontains.
+    """
+    backend = search_backend()
+    if backend == 'postgres':
+        return search_documents(query).values_list('pk', flat=True)
+    if backend == 'bm25':
+        from .search_index import get_search_index
+        index = get_search_index()
+        if index is not None:
+            return index.search(query)
+        logger.warning("Поисковый индекс BM25 не построен, используется поиск через icontains")
+    return None
+
+
+def load_results(pks):
+    """
+    Загружает карточки контента (ContentSummary) по списку pks одним запросом,
+    сохраняя порядок списка.
+    """
+    return load_summaries(pks)
+
+
+def _like_condition(model, query):
+    """Условие icontains по названию, описанию и именам связанных сущностей model."""
+    condition = Q(title__icontains=query) | Q(description__icontains=query)
+    for relation in FILTER_RELATIONS.values():
+        condition |= relation_exists(model, relation, name__icontains=query)
+    return condition
+
+
+def search_like(query):
+    """
+    Поиск через icontains по названию, описанию и именам связанных сущностей
+    (используется, если полнотекстовый поиск недоступен). Имена проверяются
+    через EXISTS, поэтому выборке не нужен DISTINCT.
+    """
+    movies = Movie.objects.filter(_like_condition(Movie, query)).order_by("-rating")
+    series = Series.objects.filter(_like_condition(Series, query)).order_by("-rating")
+
+    results = list(movies) + list(series)
+    results.sort(key=lambda x: x.rating, reverse=True)
+    return results
@@ -0,0 +1,342 @@
+"""
+Этот модуль отвечает за переносимый поиск контента, не требующий PostgreSQL:
+инвертированный индекс по названиям, описаниям и именам с ранжированием BM25.
+Индекс строится командой build_search_index и хранится в каталоге SEARCH_INDEX_PATH
+набором файлов .npy, которые каждый процесс открывает через mmap.
+Изменения контента дописываются в журнал delta.jsonl и учитываются
+поверх основного индекса до его следующей перестройки.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+from types import SimpleNamespace
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .models import Content
+from .search import REFRESH_BATCH_SIZE, build_documents
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+
+FIELD_WEIGHTS = {'title': 3, 'names': 2, 'description': 1}
+
+MAX_RESULTS = 1000
+
+ARRAYS = ('term_hashes', 'offsets', 'postings_doc', 'postings_tf',
+          'doc_ids', 'doc_len', 'doc_rating')
+
+META_FILE = 'meta.json'
+DELTA_FILE = 'delta.jsonl'
+
+TOKEN_RE = re.compile(r'\w+')
+
+_state = SimpleNamespace(index=None)
+_index_lock = threading.Lock()
+
+
+def index_path():
+    """Каталог индекса (SEARCH_INDEX_PATH)."""
+    return getattr(settings, 'SEARCH_INDEX_PATH',
+                   os.path.join(settings.BASE_DIR, 'search_index'))
+
+
+def tokenize(text):
+    """Разбивает текст на нормализованные слова (нижний регистр, ё → е)."""
+    return [token for token in TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+            if len(token) > 1]
+
+
+def term_hash(term):
+    """64-битный хэш слова, по которому оно ищется в словаре индекса."""
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(),
+                          'little')
+
+
+def document_terms(document):
+    """
+    Возвращает ({слово: взвешенная частота}, длина документа)
+    для поискового документа с учётом весов полей FIELD_WEIGHTS.
+    """
+    terms = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(getattr(document, field)):
+            terms[token] = terms.get(token, 0) + weight
+    return terms, sum(terms.values())
+
+
+def _bm25(idf, tf, length, avg_length):
+    return idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+
+
+def _collect_postings(batch_size):
+    """
+    Читает документы всего контента по порядку ключей.
+    Возвращает ({хэш слова: (позиции документов, частоты)}, ключи, длины, рейтинги).
+    """
+    postings = {}
+    doc_ids, doc_len, doc_rating = [], [], []
+    pks = Content.objects.order_by('pk').values_list('pk', flat=True)
+    for documents in build_documents(pks, batch_size):
+        for document in sorted(documents, key=lambda item: item.pk):
+            terms, length = document_terms(document)
+            position = len(doc_ids)
+            doc_ids.append(document.pk)
+            doc_len.append(length)
+            doc_rating.append(document.rating)
+            for term, tf in terms.items():
+                docs, tfs = postings.setdefault(term_hash(term), ([], []))
+                docs.append(position)
+                tfs.append(tf)
+    return postings, doc_ids, doc_len, doc_rating
+
+
+def _index_arrays(postings, doc_ids, doc_len, doc_rating):
+    """Упаковывает словарь и списки документов в массивы индекса ARRAYS."""
+    hashes = sorted(postings)
+    offsets = np.zeros(len(hashes) + 1, dtype=np.int64)
+    postings_doc, postings_tf = [], []
+    for position, value in enumerate(hashes):
+        docs, tfs = postings[value]
+        offsets[position + 1] = offsets[position] + len(docs)
+        postings_doc.extend(docs)
+        postings_tf.extend(tfs)
+    return {
+        'term_hashes': np.array(hashes, dtype=np.uint64),
+        'offsets': offsets,
+        'postings_doc': np.array(postings_doc, dtype=np.int32),
+        'postings_tf': np.array(postings_tf, dtype=np.float32),
+        'doc_ids': np.array(doc_ids, dtype=np.int64),
+        'doc_len': np.array(doc_len, dtype=np.float32),
+        'doc_rating': np.array(doc_rating, dtype=np.int16),
+    }
+
+
+def _replace_index(path, arrays, meta, delta_start):
+    """
+    Записывает индекс во временный каталог и атомарно подменяет им path,
+    перенося записи журнала старого индекса начиная с delta_start.
+    """
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+    with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    old_path = f"{path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    old_delta = os.path.join(old_path, DELTA_FILE)
+    if os.path.exists(old_delta):
+        with open(old_delta, 'rb') as source, \
+                open(os.path.join(path, DELTA_FILE), 'ab') as target:
+            source.seek(delta_start)
+            shutil.copyfileobj(source, target)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def build_search_index(path=None, batch_size=REFRESH_BATCH_SIZE):
+    """
+    Строит индекс по всему контенту и атомарно заменяет им каталог path.
+    Записи журнала, добавленные во время построения, переносятся в новый индекс.
+    Возвращает количество проиндексированных документов.
+    """
+    path = path or index_path()
+    old_delta = os.path.join(path, DELTA_FILE)
+    delta_start = os.path.getsize(old_delta) if os.path.exists(old_delta) else 0
+
+    postings, doc_ids, doc_len, doc_rating = _collect_postings(batch_size)
+    meta = {
+        'documents': len(doc_ids),
+        'terms': len(postings),
+        'avg_length': float(np.mean(doc_len)) if doc_len else 0.0,
+        'built_at': timezone.now().isoformat(),
+    }
+    _replace_index(path, _index_arrays(postings, doc_ids, doc_len, doc_rating), meta,
+                   delta_start)
+    logger.info(f"Поисковый индекс построен: {meta['documents']} документов, "
+                f"{meta['terms']} слов")
+    return meta['documents']
+
+
+def update_search_index(pks):
+    """
+    Дописывает в журнал индекса актуальные документы контента pks
+    (и отметки об удалении для отсутствующих). Возвращает количество записей.
+    """
+    path = index_path()
+    if not os.path.exists(os.path.join(path, META_FILE)):
+        logger.debug("Поисковый индекс не построен, обновление пропущено")
+        return 0
+    pks = list(pks)
+    records = []
+    for documents in build_documents(pks):
+        for document in documents:
+            terms, length = document_terms(document)
+            records.append({'pk': document.pk, 'rating': document.rating,
+                            'length': length, 'terms': terms})
+    found = {record['pk'] for record in records}
+    records.extend({'pk': pk, 'deleted': True} for pk in pks if pk not in found)
+    with open(os.path.join(path, DELTA_FILE), 'a', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+    return len(records)
+
+
+def _stamp(path):
+    stat = os.stat(os.path.join(path, META_FILE))
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class SearchIndex:
+    """
+    Индекс, открытый через mmap, вместе с журналом изменений.
+    При чтении журнала заранее вычисляются маска переопределённых документов
+    индекса, количество документов и частоты слов в изменённых документах,
+    поэтому поиск не перебирает журнал целиком.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = _stamp(path)
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+                       for name in ARRAYS}
+        self.delta = {}
+        self.view = SimpleNamespace(overridden=np.zeros(self.meta['documents'], dtype=bool),
+                                    documents=self.meta['documents'], postings={}, offset=0)
+        self.lock = threading.Lock()
+
+    def load_delta(self):
+        """Применяет записи журнала, добавленные после предыдущего чтения."""
+        delta_path = os.path.join(self.path, DELTA_FILE)
+        with self.lock:
+            try:
+                with open(delta_path, 'rb') as f:
+                    f.seek(self.view.offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return
+            end = data.rfind(b'\n') + 1
+            if not end:
+                return
+            for line in data[:end].splitlines():
+                record = json.loads(line)
+                self.delta[record['pk']] = None if record.get('deleted') else record
+            self.view = self._delta_view(self.view.offset + end)
+
+    def _delta_view(self, offset):
+        """
+        Состояние журнала, прочитанного до offset: маска документов индекса,
+        замещённых журналом, общее количество документов
+        и {слово: изменённые документы с этим словом}.
+        """
+        doc_ids = self.arrays['doc_ids']
+        pks = np.fromiter(self.delta, dtype=np.int64, count=len(self.delta))
+        positions = np.searchsorted(doc_ids, pks)
+        inside = positions < len(doc_ids)
+        positions = positions[inside][np.asarray(doc_ids[positions[inside]]) == pks[inside]]
+        overridden = np.zeros(len(doc_ids), dtype=bool)
+        overridden[positions] = True
+        changed = [record for record in self.delta.values() if record]
+        postings = {}
+        for record in changed:
+            for term in record['terms']:
+                postings.setdefault(term, []).append(record)
+        return SimpleNamespace(overridden=overridden, postings=postings, offset=offset,
+                               documents=self.meta['documents'] + len(changed) - len(positions))
+
+    def _postings(self, term):
+        arrays = self.arrays
+        value = np.uint64(term_hash(term))
+        position = int(np.searchsorted(arrays['term_hashes'], value))
+        if position == len(arrays['term_hashes']) or arrays['term_hashes'][position] != value:
+            return None
+        start, end = arrays['offsets'][position], arrays['offsets'][position + 1]
+        return arrays['postings_doc'][start:end], arrays['postings_tf'][start:end]
+
+    def _index_scores(self, view, terms, avg_length):
+        """
+        Оценки документов основного индекса, не замещённых журналом.
+        Возвращает (ключи, оценки, рейтинги, {слово: idf}).
+        """
+        arrays = self.arrays
+        idfs, doc_parts, score_parts = {}, [], []
+        for term in terms:
+            postings = self._postings(term)
+            docs = tf = np.empty(0, dtype=np.int64)
+            if postings is not None:
+                docs, tf = np.asarray(postings[0]), np.asarray(postings[1])
+                keep = ~view.overridden[docs]
+                docs, tf = docs[keep], tf[keep]
+            df = len(docs) + len(view.postings.get(term, ()))
+            if not df:
+                continue
+            idfs[term] = math.log(1 + (view.documents - df + 0.5) / (df + 0.5))
+            if len(docs):
+                doc_parts.append(docs)
+                score_parts.append(_bm25(idfs[term], tf, arrays['doc_len'][docs], avg_length))
+        if not doc_parts:
+            return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64),
+                    np.empty(0, dtype=np.int64), idfs)
+        docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        return (np.asarray(arrays['doc_ids'][docs]),
+                np.bincount(inverse, weights=np.concatenate(score_parts)),
+                np.asarray(arrays['doc_rating'][docs], dtype=np.int64), idfs)
+
+    @staticmethod
+    def _delta_scores(view, idfs, avg_length):
+        """Оценки изменённых документов журнала: [(ключ, оценка, рейтинг)]."""
+        scores = {}
+        for term, idf in idfs.items():
+            for record in view.postings.get(term, ()):
+                score = _bm25(idf, record['terms'][term], record['length'], avg_length)
+                previous = scores.get(record['pk'], (0.0, record['rating']))
+                scores[record['pk']] = (previous[0] + score, record['rating'])
+        return [(pk, score, rating) for pk, (score, rating) in scores.items() if score > 0]
+
+    def search(self, query, limit=MAX_RESULTS):
+        """
+        Возвращает до limit первичных ключей контента, упорядоченных
+        по убыванию оценки BM25, затем по рейтингу.
+        """
+        self.load_delta()
+        view = self.view
+        avg_length = self.meta['avg_length'] or 1.0
+        pks, scores, ratings, idfs = self._index_scores(view, set(tokenize(query)), avg_length)
+        extra = self._delta_scores(view, idfs, avg_length)
+        if extra:
+            pks = np.concatenate([pks, np.array([item[0] for item in extra], dtype=np.int64)])
+            scores = np.concatenate([scores, [item[1] for item in extra]])
+            ratings = np.concatenate([ratings, np.array([item[2] for item in extra],
+                                                        dtype=np.int64)])
+        order = np.lexsort((pks, -ratings, -scores))[:limit]
+        return pks[order].tolist()
+
+
+def get_search_index():
+    """
+    Возвращает индекс текущего процесса, открывая его заново после перестройки.
+    Возвращает None, если индекс ещё не построен.
+    """
+    path = index_path()
+    try:
+        stamp = _stamp(path)
+    except FileNotFoundError:
+        return None
+    with _index_lock:
+        index = _state.index
+        if index is None or index.path != path or index.stamp != stamp:
+            _state.index = SearchIndex(path)
+        return _state.index
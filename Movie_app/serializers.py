@@ -0,0 +1,97 @@
+"""
+Этот модуль содержит сериализаторы API каталога в приложении Movie_app:
+карточки контента (ContentSummary), жанры, актёры, режиссёры и страны
+вместе с их агрегатами.
+"""
+from rest_framework import serializers
+from .models import Actor, ContentSummary, Country, Director, Genre
+
+
+class SparseFieldsetMixin:
+    """
+    Оставляет в ответе только поля из context['fields'] (параметр ?fields=)
+    и связанные сущности из context['include'] (параметр ?include=).
+    Поля связанных сущностей перечислены в Meta.include_fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        include = self.context.get('include') or set()
+        for name in list(self.fields):
+            if name in self.Meta.include_fields:
+                keep = name in include
+            else:
+                keep = fields is None or name in fields
+            if not keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def field_names(cls):
+        """Поля, которые можно запросить в ?fields=."""
+        return [name for name in cls.Meta.fields if name not in cls.Meta.include_fields]
+
+
+class ContentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Сериализатор карточки контента. Связанные сущности (?include=) берутся
+    из атрибутов, которые представление заполняет пакетом для всей страницы.
+    """
+    id = serializers.IntegerField(source='content_id', read_only=True)
+    genres = serializers.ReadOnlyField()
+    actors = serializers.ReadOnlyField()
+    directors = serializers.ReadOnlyField()
+    countries = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ContentSummary
+        fields = ['id', 'kind', 'title', 'rating', 'release_date', 'poster_url', 'description',
+                  'seasons', 'episodes', 'genre_ids', 'genre_names', 'actor_names',
+                  'director_name', 'country_names', 'updated_at',
+                  'genres', 'actors', 'directors', 'countries']
+        include_fields = ('genres', 'actors', 'directors', 'countries')
+        read_only_fields = fields
+
+
+class EntitySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Сериализатор жанра, актёра, режиссёра или страны вместе с агрегатами."""
+    id = serializers.ReadOnlyField(source='pk')
+    title_count = serializers.IntegerField(source='stats.title_count', read_only=True)
+    average_rating = serializers.FloatField(source='stats.average_rating', read_only=True)
+    latest_release = serializers.DateField(source='stats.latest_release', read_only=True)
+    popularity = serializers.FloatField(source='stats.popularity', read_only=True)
+    content = ContentSerializer(source='top_content', many=True, read_only=True)
+
+    class Meta:
+        fields = ['id', 'name', 'title_count', 'average_rating', 'latest_release',
+                  'popularity', 'content']
+        include_fields = ('content',)
+        read_only_fields = fields
+
+
+class GenreSerializer(EntitySerializer):
+    """Сериализатор жанра."""
+
+    class Meta(EntitySerializer.Meta):
+        model = Genre
+
+
+class ActorSerializer(EntitySerializer):
+    """Сериализатор актёра."""
+
+    class Meta(EntitySerializer.Meta):
+        model = Actor
+
+
+class DirectorSerializer(EntitySerializer):
+    """Сериализатор режиссёра."""
+
+    class Meta(EntitySerializer.Meta):
+        model = Director
+
+
+class CountrySerializer(EntitySerializer):
+    """Сериализатор страны."""
+
+    class Meta(EntitySerializer.Meta):
+        model = Country
@@ -0,0 +1,72 @@
+"""
+Этот модуль отвечает за подборки («полки») главной страницы:
+лучшие по рейтингу, новинки и лучшие в самых популярных жанрах.
+Каждая полка ограничена SHELF_SIZE тайтлами, а готовый набор полок
+хранится в кэше и сбрасывается при изменении контента.
+"""
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import Genre, Movie, Series
+
+logger = logging.getLogger(__name__)
+
+SHELVES_CACHE_KEY = 'movie_app:home_shelves'
+
+SHELF_SIZE = 12
+
+GENRE_SHELVES = 3
+
+
+def _top(queryset_filter, ordering, limit=SHELF_SIZE):
+    """
+    Возвращает не более limit фильмов и сериалов, отобранных фильтром
+    и отсортированных по убыванию полей ordering.
+    Каждая модель читается одним запросом.
+    """
+    contents = []
+    for model in (Movie, Series):
+        objects = model.objects.filter(queryset_filter).order_by(*ordering)[:limit]
+        for obj in objects:
+            obj.is_series = model is Series
+            contents.append(obj)
+    fields = [field.lstrip('-') for field in ordering]
+    contents.sort(key=lambda obj: [getattr(obj, field) for field in fields], reverse=True)
+    return contents[:limit]
+
+
+def build_shelves():
+    """Строит полки главной страницы фиксированным числом запросов."""
+    shelves = [
+        {'key': 'top_rated', 'title': 'Лучшие по рейтингу',
+         'contents': _top(Q(), ('-rating', '-tmdb_id'))},
+        {'key': 'newest', 'title': 'Новинки',
+         'contents': _top(Q(release_date__lte=timezone.now().date()),
+                          ('-release_date', '-tmdb_id'))},
+    ]
+    genres = Genre.objects.annotate(
+        total=Count('movie', distinct=True) + Count('series', distinct=True)
+    ).filter(total__gt=0).order_by('-total', 'name')[:GENRE_SHELVES]
+    for genre in genres:
+        shelves.append({'key': f'genre_{genre.tmdb_id}', 'title': genre.name,
+                        'genre': genre,
+                        'contents': _top(Q(genres=genre), ('-rating', '-tmdb_id'))})
+    return [shelf for shelf in shelves if shelf['contents']]
+
+
+def get_shelves():
+    """Возвращает полки главной страницы из кэша, при необходимости перестраивая их."""
+    shelves = cache.get(SHELVES_CACHE_KEY)
+    if shelves is None:
+        shelves = build_shelves()
+        cache.set(SHELVES_CACHE_KEY, shelves,
+                  getattr(settings, 'HOME_SHELVES_TIMEOUT', 60 * 60))
+        logger.info("Полки главной страницы перестроены")
+    return shelves
+
+
+def invalidate_shelves():
+    """Сбрасывает кэш полок главной страницы."""
+    cache.delete(SHELVES_CACHE_KEY)
@@ -0,0 +1,233 @@
+"""
+Этот модуль отвечает за денормализованные карточки контента (ContentSummary).
+Строка карточки содержит всё, что нужно спискам и результатам поиска:
+тип, рейтинг, дату выхода, постер, жанры (id и названия), первых актёров,
+режиссёра и страны. Поэтому страница списка читается одним запросом
+к одной таблице без полиморфного соединения и дополнительных запросов.
+Карточки пересчитываются пакетами: сигналы моделей и загрузчики каталога
+накапливают ключи за транзакцию, а пересчёт выполняется после фиксации
+(или раньше, при первом чтении карточек в том же потоке).
+"""
+import logging
+import threading
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from .listing import listing_queryset, series_ctype_id
+from .models import Actor, Content, ContentSummary, Country, Director, Genre, Movie, Series
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH_SIZE = 1000
+
+LINK_RELATIONS = {
+    Movie: ('genres', 'actors', 'director', 'created_in'),
+    Series: ('genres', 'actors', 'created_in'),
+}
+
+ENTITY_RELATIONS = {
+    Genre: 'genres',
+    Actor: 'actors',
+    Director: 'director',
+    Country: 'created_in',
+}
+
+SUMMARY_FIELDS = ('kind', 'title', 'rating', 'release_date', 'description', 'poster_url',
+                  'seasons', 'episodes', 'genre_ids', 'genre_names', 'actor_names',
+                  'director_name', 'country_names', 'updated_at')
+
+_pending = threading.local()
+
+
+def top_actors():
+    """Сколько актёров хранится в карточке (CONTENT_SUMMARY_ACTORS)."""
+    return getattr(settings, 'CONTENT_SUMMARY_ACTORS', 5)
+
+
+def _collect_links(pks_by_model):
+    """
+    Возвращает словарь {pk: {связь: [(id, имя), ...]}}; связи каждого тайтла
+    идут в порядке добавления (для актёров это порядок в титрах TMDB).
+    """
+    links = {}
+    for model, pks in pks_by_model.items():
+        if not pks:
+            continue
+        for relation in LINK_RELATIONS[model]:
+            field = model._meta.get_field(relation)
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            rows = through.objects.filter(**{f'{source}_id__in': pks}).order_by('pk') \
+                .values_list(f'{source}_id', f'{target}_id', f'{target}__name')
+            for pk, key, name in rows:
+                links.setdefault(pk, {}).setdefault(relation, []).append((key, name))
+    return links
+
+
+def build_summaries(pks):
+    """
+    Строит несохранённые карточки контента с первичными ключами pks
+    фиксированным числом запросов (один к контенту и по одному на связь).
+    """
+    rows = list(listing_queryset().filter(pk__in=list(pks)).values(
+        'tmdb_id', 'polymorphic_ctype_id', 'title', 'updated_at', 'rating', 'release_date',
+        'description', 'poster_url', 'seasons', 'episodes'))
+    if not rows:
+        return []
+    series_ctype = series_ctype_id()
+    links = _collect_links({
+        Movie: [row['tmdb_id'] for row in rows if row['polymorphic_ctype_id'] != series_ctype],
+        Series: [row['tmdb_id'] for row in rows if row['polymorphic_ctype_id'] == series_ctype],
+    })
+    summaries = []
+    for row in rows:
+        related = links.get(row['tmdb_id'], {})
+        genres = sorted(related.get('genres', []), key=lambda genre: genre[1])
+        directors = related.get('director', [])
+        is_series = row['polymorphic_ctype_id'] == series_ctype
+        summaries.append(ContentSummary(
+            content_id=row['tmdb_id'],
+            kind=ContentSummary.SERIES if is_series else ContentSummary.MOVIE,
+            title=row['title'], rating=row['rating'], release_date=row['release_date'],
+            description=row['description'] or '', poster_url=row['poster_url'] or '',
+            seasons=row['seasons'], episodes=row['episodes'],
+            genre_ids=[key for key, _ in genres], genre_names=[name for _, name in genres],
+            actor_names=[name for _, name in related.get('actors', [])[:top_actors()]],
+            director_name=directors[0][1] if directors else '',
+            country_names=[name for _, name in related.get('created_in', [])],
+            updated_at=row['updated_at'],
+        ))
+    return summaries
+
+
+def refresh_summaries(pks, batch_size=REFRESH_BATCH_SIZE):
+    """
+    Пересчитывает карточки контента с первичными ключами pks пакетами
+    по batch_size и удаляет карточки контента, которого больше нет.
+    Возвращает количество обновлённых карточек.
+    """
+    pks = list(pks)
+    updated = 0
+    for start in range(0, len(pks), batch_size):
+        batch = pks[start:start + batch_size]
+        summaries = build_summaries(batch)
+        if summaries:
+            ContentSummary.objects.bulk_create(
+                summaries, update_conflicts=True, unique_fields=['content'],
+                update_fields=list(SUMMARY_FIELDS))
+        found = {summary.pk for summary in summaries}
+        stale = [pk for pk in batch if pk not in found]
+        if stale:
+            ContentSummary.objects.filter(pk__in=stale).delete()
+        updated += len(summaries)
+    return updated
+
+
+def rebuild_summaries(batch_size=REFRESH_BATCH_SIZE):
+    """Пересчитывает карточки всего каталога. Возвращает количество карточек."""
+    clear_pending_summaries()
+    pks = Content.objects.order_by('pk').values_list('pk', flat=True)
+    count = refresh_summaries(pks, batch_size)
+    ContentSummary.objects.exclude(content__in=Content.objects.all()).delete()
+    logger.info(f"Карточки контента перестроены: {count}")
+    return count
+
+
+def linked_content_pks(entity):
+    """Первичные ключи контента, связанного с жанром, актёром, режиссёром или страной."""
+    relation = ENTITY_RELATIONS[type(entity)]
+    pks = set()
+    for model, relations in LINK_RELATIONS.items():
+        if relation not in relations:
+            continue
+        field = model._meta.get_field(relation)
+        through = field.remote_field.through
+        pks.update(through.objects.filter(**{field.m2m_reverse_field_name(): entity})
+                   .values_list(f'{field.m2m_field_name()}_id', flat=True))
+    return pks
+
+
+def queue_summary_refresh(pks):
+    """
+    Добавляет ключи к карточкам, ожидающим пересчёта в refresh_pending_summaries.
+    Возвращает False, если добавлять нечего.
+    """
+    pks = set(pks)
+    if not pks:
+        return False
+    pending = getattr(_pending, 'pks', None)
+    if pending is None:
+        pending = _pending.pks = set()
+    pending.update(pks)
+    return True
+
+
+def schedule_summary_refresh(pks):
+    """
+    Откладывает пересчёт карточек до фиксации текущей транзакции.
+    Ключи, накопленные за транзакцию, обрабатываются одним пакетом.
+    """
+    if queue_summary_refresh(pks):
+        transaction.on_commit(refresh_pending_summaries)
+
+
+def refresh_pending_summaries():
+    """Пересчитывает накопленные карточки (повторные вызовы ничего не делают)."""
+    pks = getattr(_pending, 'pks', None)
+    if not pks:
+        return
+    _pending.pks = set()
+    try:
+        refresh_summaries(sorted(pks))
+    except Exception as e:
+        logger.error(f"Ошибка обновления карточек контента: {e}")
+
+
+def clear_pending_summaries():
+    """Забывает накопленные ключи карточек без пересчёта."""
+    _pending.pks = set()
+
+
+def summary_queryset():
+    """
+    Queryset карточек контента. Изменения, ещё не пересчитанные в этом потоке
+    (например, внутри незафиксированной транзакции), применяются перед чтением.
+    """
+    refresh_pending_summaries()
+    return ContentSummary.objects.all()
+
+
+def entity_summaries(entity, relation, content_models=('movie', 'series')):
+    """
+    Карточки контента, связанного с entity полем relation, одним запросом:
+    жанр в PostgreSQL ищется по GIN-индексу genre_ids, остальные связи
+    (и жанр в других базах) — подзапросом к промежуточным таблицам.
+    """
+    queryset = summary_queryset()
+    if len(content_models) == 1:
+        queryset = queryset.filter(kind=content_models[0])
+    if relation == 'genres' and connection.vendor == 'postgresql':
+        return queryset.filter(genre_ids__contains=[entity.pk])
+    condition = Q()
+    for name in content_models:
+        field = (Movie if name == 'movie' else Series)._meta.get_field(relation)
+        through = field.remote_field.through
+        condition |= Q(content__in=through.objects
+                       .filter(**{field.m2m_reverse_field_name(): entity})
+                       .values(f'{field.m2m_field_name()}_id'))
+    return queryset.filter(condition)
+
+
+def load_summaries(pks):
+    """
+    Загружает карточки по списку pks, сохраняя порядок списка. Недостающие
+    карточки (например, до первого запуска rebuild_content_summaries) строятся на месте.
+    """
+    pks = list(pks)
+    summaries = {summary.pk: summary for summary in summary_queryset().filter(pk__in=pks)}
+    missing = [pk for pk in pks if pk not in summaries]
+    if missing and refresh_summaries(missing):
+        summaries.update((summary.pk, summary)
+                         for summary in ContentSummary.objects.filter(pk__in=missing))
+    return [summaries[pk] for pk in pks if pk in summaries]
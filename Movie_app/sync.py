@@ -0,0 +1,95 @@
+"""
+Этот модуль отвечает за инкрементальную синхронизацию контента
+с TMDB по лентам изменений /movie/changes и /tv/changes.
+"""
+import logging
+from datetime import timedelta
+from django.utils import timezone
+from .api import fetch_changes, get_movie_details, get_series_details
+from .ingestion import IngestionBatch
+from .models import Movie, Series, SyncState
+
+logger = logging.getLogger(__name__)
+
+CHANGES_WINDOW_DAYS = 14
+
+MEDIA_TYPES = {
+    'movie': (Movie, get_movie_details),
+    'tv': (Series, get_series_details),
+}
+
+
+def refresh_changed(media_type, tmdb_ids):
+    """
+    Повторно загружает детали изменившегося контента,
+    который уже есть в базе, и записывает их одним пакетом.
+    Записи кэша ответов TMDB для этих тайтлов перепроверяются условным запросом.
+    Возвращает количество обновлённых объектов и список tmdb_id,
+    детали которых не удалось загрузить или записать.
+    """
+    model, get_details = MEDIA_TYPES[media_type]
+    objects = model.objects.in_bulk(tmdb_ids)
+    batch = IngestionBatch()
+    failed = [tmdb_id for tmdb_id, obj in objects.items()
+              if not get_details(tmdb_id, obj, batch, revalidate=True)]
+    failed.extend(obj.pk for obj, _ in batch.flush())
+    return len(objects) - len(failed), failed
+
+
+def retry_failed(media_type, state):
+    """
+    Повторяет загрузку деталей контента, не обновлённого при прошлых запусках.
+    Оставшиеся ошибки снова сохраняются в состоянии синхронизации.
+    Возвращает количество обновлённых объектов.
+    """
+    if not state.failed_ids:
+        return 0
+    updated, failed = refresh_changed(media_type, state.failed_ids)
+    if failed:
+        logger.warning(f"Изменения {media_type}: не удалось обновить {len(failed)} тайтлов, "
+                       f"повтор при следующем запуске")
+    state.failed_ids = failed
+    state.save()
+    return updated
+
+
+def sync_changes(media_type, since=None, until=None):
+    """
+    Синхронизирует контент типа media_type ('movie' или 'tv'),
+    изменившийся в TMDB с момента сохранённой отметки.
+    Отметка и номер страницы сохраняются после каждой успешно записанной страницы,
+    поэтому прерванная синхронизация продолжается с того же места.
+    Тайтлы, детали которых не удалось загрузить, сохраняются в failed_ids
+    и повторяются в начале следующего запуска.
+    """
+    state, _ = SyncState.objects.get_or_create(key=f'tmdb_changes:{media_type}')
+    until = until or timezone.now()
+    if since is not None:
+        state.watermark, state.page = since, 0
+    start = state.watermark or until - timedelta(days=1)
+    updated = retry_failed(media_type, state)
+
+    while start < until:
+        end = min(start + timedelta(days=CHANGES_WINDOW_DAYS), until)
+        page = state.page + 1
+        while True:
+            data = fetch_changes(media_type, start.date(), end.date(), page)
+            tmdb_ids = [item['id'] for item in data.get('results', [])]
+            refreshed, failed = refresh_changed(media_type, tmdb_ids)
+            updated += refreshed
+            state.failed_ids = sorted({*state.failed_ids, *failed})
+            state.watermark, state.page = start, page
+            state.save()
+            logger.info(f"Изменения {media_type}: обработана страница {page} "
+                        f"за {start.date()} - {end.date()}")
+            if failed:
+                logger.warning(f"Изменения {media_type}: не удалось обновить "
+                               f"{', '.join(map(str, failed))}")
+            if page >= data.get('total_pages', 1):
+                break
+            page += 1
+        state.watermark, state.page = end, 0
+        state.save()
+        start = end
+
+    return updated
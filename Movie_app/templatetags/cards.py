@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+from Movie_app.fragments import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def content_cards(contents):
+    """
+    Возвращает пары (контент, HTML карточки) для списка контента;
+    карточки читаются из кэша фрагментов одним запросом.
+    Использование: {% content_cards contents as cards %}.
+    """
+    return [(content, mark_safe(html)) for content, html in render_cards(contents)]
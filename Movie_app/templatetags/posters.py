@@ -0,0 +1,29 @@
+from django import template
+from django.utils.html import format_html
+from Movie_app.api import DEFAULT_POSTER_URL
+from Movie_app.posters import DEFAULT_POSTER_SIZE, POSTER_WIDTHS, local_poster_urls
+
+register = template.Library()
+
+ERROR_POSTER_URL = 'https://via.placeholder.com/500x750?text=Image+Error'
+
+
+@register.simple_tag
+def poster_img(content, css_class='card-img-top', sizes='(max-width: 576px) 50vw, 18rem'):
+    """
+    Выводит тег <img> постера контента.
+    Если постер уже скачан в локальный кэш, используются локальные копии
+    разных размеров через srcset, иначе — исходный poster_url.
+    """
+    poster_url = content.poster_url or DEFAULT_POSTER_URL
+    local_urls = local_poster_urls(content.poster_url)
+    if not local_urls:
+        return format_html(
+            '<img src="{}" class="{}" alt="{}" loading="lazy" onerror="this.src=\'{}\'">',
+            poster_url, css_class, content.title, ERROR_POSTER_URL)
+    src = local_urls.get(DEFAULT_POSTER_SIZE) or next(iter(local_urls.values()))
+    srcset = ', '.join(f"{url} {POSTER_WIDTHS[size]}w" for size, url in local_urls.items())
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" class="{}" alt="{}" loading="lazy" '
+        'onerror="this.onerror=null;this.srcset=\'\';this.src=\'{}\'">',
+        src, srcset, sizes, css_class, content.title, poster_url)
@@ -1,11 +1,12 @@
 import datetime
+from datetime import timedelta
 from unittest.mock import patch
 import pytest
 from django.conf import settings
-from Movie_app.models import Genre, Movie, Actor, Director, Country, Series
+from django.utils import timezone
+from Movie_app.models import Genre, Movie, Series
 from Movie_app.api import (get_api_key, get_genres_from_tmdb, process_movie,
-                           get_movie_details, update_movie_relations,  get_series_details,
-                           update_series_relations)
+                           get_movie_details, get_series_details, payload_hash)
 
 
 @pytest.fixture
@@ -87,21 +88,6 @@ def test_get_movie_details(mock_get, movie_data):
     assert movie.poster_url == "https://image.tmdb.org/t/p/w500/path/to/poster.jpg"
 
 
-@pytest.mark.django_db
-def test_update_movie_relations(movie_data):
-    """Тест для обновления связей фильма."""
-    movie = Movie.objects.create(tmdb_id=movie_data["id"], title="Test Movie")
-    country = Country.objects.create(iso_code='US', name='United States')
-    director = Director.objects.create(tmdb_id=1, name='Director Test')
-    actor = Actor.objects.create(tmdb_id=1, name='Actor Test')
-
-    update_movie_relations(movie, [country], [director], [actor])
-
-    assert list(movie.created_in.all()) == [country]
-    assert list(movie.director.all()) == [director]
-    assert list(movie.actors.all()) == [actor]
-
-
 @pytest.fixture
 def series_data():
     return {
@@ -130,13 +116,59 @@ def test_get_series_details(mock_get, series_data):
 
 
 @pytest.mark.django_db
-def test_update_series_relations(series_data):
-    """Тест для обновления связей сериала."""
-    series = Series.objects.create(tmdb_id=series_data["id"], title="Game of Thrones")
-    country = Country.objects.create(iso_code='US', name='United States')
-    actor = Actor.objects.create(tmdb_id=1, name='Peter Dinklage')
+@patch('requests.get')
+def test_process_movie_skips_fresh_movie(mock_get, api_key, movie_data):
+    """Тест пропуска деталей недавно синхронизированного фильма."""
+    Movie.objects.create(tmdb_id=movie_data["id"], title="Test Movie",
+                         last_synced_at=timezone.now())
+
+    process_movie(movie_data)
+
+    mock_get.assert_not_called()
+
+
+@pytest.mark.django_db
+@patch('requests.get')
+def test_process_movie_force_refetches_fresh_movie(mock_get, api_key, movie_data):
+    """Тест принудительной загрузки деталей актуального фильма."""
+    Movie.objects.create(tmdb_id=movie_data["id"], title="Test Movie",
+                         last_synced_at=timezone.now())
+    mock_get.return_value.json.return_value = movie_data
+    mock_get.return_value.status_code = 200
+
+    process_movie(movie_data, force=True)
 
-    update_series_relations(series, [country], [actor])
+    mock_get.assert_called_once()
+    assert Movie.objects.get(tmdb_id=movie_data["id"]).payload_hash == payload_hash(movie_data)
+
+
+@pytest.mark.django_db
+@patch('requests.get')
+def test_process_movie_refetches_stale_movie(mock_get, api_key, movie_data):
+    """Тест загрузки деталей устаревшего фильма."""
+    Movie.objects.create(tmdb_id=movie_data["id"], title="Test Movie",
+                         last_synced_at=timezone.now() - timedelta(days=30))
+    mock_get.return_value.json.return_value = movie_data
+    mock_get.return_value.status_code = 200
+
+    process_movie(movie_data)
+
+    mock_get.assert_called_once()
+    movie = Movie.objects.get(tmdb_id=movie_data["id"])
+    assert movie.is_fresh(timedelta(hours=1))
+
+
+@pytest.mark.django_db
+@patch('requests.get')
+def test_get_movie_details_unchanged_payload_not_written(mock_get, api_key, movie_data):
+    """Тест того, что неизменившиеся детали фильма не перезаписываются."""
+    movie = Movie.objects.create(tmdb_id=movie_data["id"], title="Test Movie",
+                                 payload_hash=payload_hash(movie_data))
+    mock_get.return_value.json.return_value = movie_data
+    mock_get.return_value.status_code = 200
+
+    get_movie_details(movie_data["id"], movie)
 
-    assert list(series.created_in.all()) == [country]
-    assert list(series.actors.all()) == [actor]
+    movie.refresh_from_db()
+    assert movie.poster_url == ""
+    assert movie.last_synced_at is not None
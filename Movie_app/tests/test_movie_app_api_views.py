@@ -0,0 +1,129 @@
+from datetime import date
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app.entity_stats import refresh_pending_stats
+from Movie_app.models import Actor, Country, Director, Genre, Movie, Series
+from Movie_app.summaries import refresh_pending_summaries
+
+
+@pytest.fixture
+def api_catalog(settings):
+    settings.RESPONSE_CACHE_ENABLED = False
+    drama = Genre.objects.create(tmdb_id=18, name="Драма")
+    comedy = Genre.objects.create(tmdb_id=35, name="Комедия")
+    usa = Country.objects.create(iso_code="US", name="США")
+    for tmdb_id in range(1, 13):
+        model = Series if tmdb_id % 3 == 0 else Movie
+        content = model.objects.create(tmdb_id=tmdb_id, title=f"Тайтл {tmdb_id}",
+                                       rating=tmdb_id * 5, release_date=date(2000 + tmdb_id, 1, 1),
+                                       description="Описание " * 20)
+        content.genres.add(drama if tmdb_id % 2 else comedy)
+        content.created_in.add(usa)
+        content.actors.add(Actor.objects.create(tmdb_id=tmdb_id, name=f"Актёр {tmdb_id}"))
+        if model is Movie:
+            content.director.add(Director.objects.create(tmdb_id=tmdb_id,
+                                                         name=f"Режиссёр {tmdb_id}"))
+    refresh_pending_summaries()
+    refresh_pending_stats()
+
+
+def get_page(client, url, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+def test_content_list_cursor_pagination_in_one_query(client, api_catalog):
+    """Тест списка контента: страницы по курсору, каждая одним запросом."""
+    url = reverse('api:content_list')
+    response, queries = get_page(client, url, page_size=5, fields='id,title,rating')
+    assert queries == 1
+    page = response.json()
+    assert [item['id'] for item in page['results']] == [12, 11, 10, 9, 8]
+    assert set(page['results'][0]) == {'id', 'title', 'rating'}
+    assert page['previous'] is None
+
+    second, queries = get_page(client, page['next'])
+    assert queries == 1
+    assert [item['id'] for item in second.json()['results']] == [7, 6, 5, 4, 3]
+    assert 'fields=id%2Ctitle%2Crating' in page['next']
+
+    series, _ = get_page(client, url, kind='series')
+    assert [item['id'] for item in series.json()['results']] == [12, 9, 6, 3]
+    assert client.get(url, {'fields': 'id,secret'}).status_code == 400
+    assert client.get(url, {'cursor': 'broken'}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_content_include_is_batched_per_page(client, api_catalog):
+    """Тест ?include=: число запросов не зависит от размера страницы."""
+    url = reverse('api:content_list')
+    include = 'genres,actors,directors,countries'
+    small, small_queries = get_page(client, url, page_size=2, include=include)
+    large, large_queries = get_page(client, url, page_size=12, include=include)
+
+    assert small_queries == large_queries == 6
+    item = next(item for item in large.json()['results'] if item['id'] == 11)
+    assert item['genres'] == [{'id': 18, 'name': "Драма"}]
+    assert item['actors'] == [{'id': 11, 'name': "Актёр 11"}]
+    assert item['directors'] == [{'id': 11, 'name': "Режиссёр 11"}]
+    assert item['countries'] == [{'id': 'US', 'name': "США"}]
+    assert 'genres' not in client.get(url).json()['results'][0]
+    assert client.get(url, {'include': 'reviews'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_payload_is_a_fraction_of_html(client, api_catalog):
+    """Тест: JSON страницы контента в несколько раз меньше HTML той же страницы."""
+    api, _ = get_page(client, reverse('api:content_list'),
+                      fields='id,title,rating,poster_url,genre_names')
+    html = client.get(reverse('Movie_app:content_list'))
+
+    assert len(api.json()['results']) == 12
+    assert len(api.content) * 5 < len(html.content)
+
+
+@pytest.mark.django_db
+def test_content_detail_answers_conditional_requests(client, api_catalog):
+    """Тест ETag и Last-Modified страницы контента API."""
+    url = reverse('api:content_detail', kwargs={'tmdb_id': 3})
+    response, _ = get_page(client, url)
+    assert response.json()['kind'] == 'series'
+    assert 'Last-Modified' in response
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert cached.status_code == 304
+    assert len(queries) == 1
+
+    Series.objects.get(pk=3).save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 200
+    assert client.get(reverse('api:content_detail', kwargs={'tmdb_id': 999})).status_code == 404
+
+
+@pytest.mark.django_db
+def test_entity_lists_sorted_by_popularity_with_stats(client, api_catalog):
+    """Тест списков сущностей: агрегаты и сортировка по популярности одним запросом."""
+    response, queries = get_page(client, reverse('api:genre_list'))
+    assert queries == 1
+    genres = response.json()['results']
+    assert [genre['id'] for genre in genres] == [35, 18]
+    assert genres[0]['title_count'] == 6
+    assert 'content' not in genres[0]
+
+    actors, queries = get_page(client, reverse('api:actor_list'), page_size=3,
+                               fields='id,popularity')
+    assert queries == 1
+    assert actors.json()['results'] == [{'id': 12, 'popularity': 0.6},
+                                        {'id': 11, 'popularity': 0.55},
+                                        {'id': 10, 'popularity': 0.5}]
+    assert client.get(reverse('api:country_list'), {'include': 'content'}).status_code == 400
+
+    country, queries = get_page(client, reverse('api:country_detail', kwargs={'pk': 'US'}),
+                                include='content')
+    assert queries == 2
+    assert [item['id'] for item in country.json()['content']][:3] == [12, 11, 10]
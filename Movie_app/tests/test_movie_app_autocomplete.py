@@ -0,0 +1,151 @@
+import random
+from unittest import mock
+import pytest
+from django.urls import reverse
+from Movie_app import autocomplete
+from Movie_app.autocomplete import PrefixIndex, match_title, normalize, suggest
+from Movie_app.models import Actor, Director, Genre, Movie, Series
+
+
+@pytest.fixture
+def autocomplete_catalog():
+    genre = Genre.objects.create(tmdb_id=1, name="Фантастика")
+    keanu = Actor.objects.create(tmdb_id=1, name="Киану Ривз")
+    carrie = Actor.objects.create(tmdb_id=2, name="Кэрри-Энн Мосс")
+    director = Director.objects.create(tmdb_id=1, name="Лана Вачовски")
+    matrix = Movie.objects.create(tmdb_id=1, title="Матрица", rating=87)
+    matrix.genres.add(genre)
+    matrix.actors.add(keanu, carrie)
+    matrix.director.add(director)
+    reloaded = Movie.objects.create(tmdb_id=2, title="Матрица: Перезагрузка", rating=72)
+    reloaded.actors.add(keanu)
+    Series.objects.create(tmdb_id=3, title="Материя", rating=90)
+
+
+def test_normalize_strips_case_and_punctuation():
+    """Тест нормализации: регистр, ё и знаки препинания не учитываются."""
+    assert normalize("  Ёлки: Новые!  ") == "елки новые"
+
+
+def test_prefix_index_ranks_by_score_and_matches_words():
+    """Тест поиска по началу любого слова с ранжированием по оценке."""
+    index = PrefixIndex([(1, "Матрица", 87), (2, "Матрица: Перезагрузка", 72),
+                         (3, "Тёмная материя", 90), (4, "Начало", 88)])
+
+    assert [ref for ref, _ in index.lookup("мат")] == [3, 1, 2]
+    assert [ref for ref, _ in index.lookup("перез")] == [2]
+    assert [ref for ref, _ in index.lookup("темн")] == [3]
+    assert index.lookup("матрица", limit=1) == [(1, "Матрица")]
+    assert index.lookup("") == []
+
+
+def test_prefix_index_incremental_update_and_remove():
+    """Тест обновления и удаления записей без перестройки индекса."""
+    index = PrefixIndex([(ref, f"Фильм {ref}", ref) for ref in range(1, 600)])
+    assert index.lookup("фильм", limit=1) == [(599, "Фильм 599")]
+
+    index.update(1000, "Фильм 1000", 1000)
+    index.update(599, "Кино 599")
+    index.remove(598)
+
+    assert [ref for ref, _ in index.lookup("фильм", limit=2)] == [1000, 597]
+    assert index.lookup("кино") == [(599, "Кино 599")]
+
+
+def test_prefix_index_lookup_scans_bounded_ranges():
+    """
+    Тест сложности подсказки на 50 тысячах записей: префиксы с большим числом
+    совпадений отдаются из заранее вычисленных лучших, остальные просматривают
+    не больше SCAN_LIMIT ключей.
+    """
+    rng = random.Random(1)
+    words = ["звездные", "войны", "матрица", "начало", "темный", "рыцарь", "властелин",
+             "колец", "гарри", "поттер", "остров", "проклятых", "побег", "шоушенка"]
+    index = PrefixIndex((ref, ' '.join(rng.sample(words, 3)) + f" {ref}", rng.randint(0, 100))
+                        for ref in range(50_000))
+    prefixes = [word[:length] for word in words for length in range(1, len(word) + 1)]
+
+    scanned = []
+    best = index._best
+    index._best = lambda lo, hi, limit=autocomplete.TOP_SIZE: \
+        scanned.append(hi - lo) or best(lo, hi, limit)
+    for prefix in prefixes:
+        assert len(index.lookup(prefix)) == autocomplete.DEFAULT_LIMIT
+
+    assert all(prefix in index.top for prefix in prefixes)
+    assert not scanned
+    index.lookup("гарри поттер 4")
+    assert max(scanned) <= autocomplete.SCAN_LIMIT
+
+
+@pytest.mark.django_db
+def test_suggest_returns_all_kinds(autocomplete_catalog):
+    """Тест подсказок для контента, актёров, режиссёров и жанров."""
+    results = suggest("м")
+    assert [(item['kind'], item['id']) for item in results] == [
+        ('content', 3), ('content', 1), ('content', 2), ('actor', 2)]
+    assert results[0]['url'] == reverse('Movie_app:content_detail', args=[3])
+
+    assert [item['id'] for item in suggest("ривз", kinds=['actor'])] == [1]
+    assert [item['kind'] for item in suggest("фант")] == ['genre']
+    assert [item['kind'] for item in suggest("вач")] == ['director']
+
+
+@pytest.mark.django_db
+def test_autocomplete_updated_after_commit(autocomplete_catalog,
+                                           django_capture_on_commit_callbacks):
+    """Тест обновления индекса подсказок после сохранения и удаления контента."""
+    assert [item['id'] for item in suggest("матр", kinds=['content'])] == [1, 2]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Movie.objects.create(tmdb_id=4, title="Матрица: Воскрешение", rating=95)
+        Movie.objects.get(tmdb_id=2).delete()
+
+    assert [item['id'] for item in suggest("матр", kinds=['content'])] == [4, 1]
+
+
+@pytest.mark.django_db
+def test_match_title_prefers_exact_title(autocomplete_catalog):
+    """Тест выбора тайтла по введённому названию."""
+    assert match_title("матрица") == 1
+    assert match_title("Перезагрузка") == 2
+    assert match_title("Мате") == 3
+    assert match_title("Аватар") is None
+
+
+@pytest.mark.django_db
+def test_autocomplete_view(autocomplete_catalog, client, django_assert_max_num_queries):
+    """Тест JSON-ответа подсказок; после построения индекса запросов к базе нет."""
+    url = reverse('Movie_app:autocomplete')
+    client.get(url, {'q': 'м'})
+
+    with django_assert_max_num_queries(0):
+        response = client.get(url, {'q': 'матр', 'kind': 'content', 'limit': '1'})
+
+    assert response.status_code == 200
+    assert response.json() == {'query': 'матр', 'results': [
+        {'kind': 'content', 'id': 1, 'label': 'Матрица',
+         'url': reverse('Movie_app:content_detail', args=[1])}]}
+
+
+@pytest.mark.django_db
+def test_autocomplete_view_ignores_bad_params(autocomplete_catalog, client):
+    """Тест обработки неизвестного вида и некорректного лимита."""
+    response = client.get(reverse('Movie_app:autocomplete'),
+                          {'q': 'ривз', 'kind': 'unknown', 'limit': 'many'})
+
+    assert [item['kind'] for item in response.json()['results']] == ['actor']
+    assert autocomplete.get_autocomplete() is not None
+
+
+@pytest.mark.django_db
+def test_first_build_runs_in_background_and_lookup_falls_back_to_sql(autocomplete_catalog, client,
+                                                                     settings):
+    """Тест: первое обращение не строит индекс в запросе, справочник читается из базы."""
+    settings.AUTOCOMPLETE_BUILD_IN_BACKGROUND = True
+    with mock.patch.object(autocomplete.threading, 'Thread') as thread:
+        assert not suggest("матр")
+        response = client.get(reverse('Movie_app:lookup', args=['actor']), {'q': 'Ривз'})
+
+    thread.return_value.start.assert_called_once()
+    assert response.json()['results'] == [{'id': 1, 'text': "Киану Ривз"}]
@@ -0,0 +1,121 @@
+import gzip
+import json
+import pytest
+from django.core.management import call_command
+from Movie_app.catalog import CatalogLoader, iter_dump, map_record
+from Movie_app.models import Actor, Content, Genre, Movie, Series, SyncState
+
+
+def movie_record(tmdb_id, title="Movie"):
+    return {
+        "id": tmdb_id,
+        "title": f"{title} {tmdb_id}",
+        "overview": "Описание с \"кавычками\", запятыми\nи переводом строки",
+        "release_date": "1999-10-15",
+        "vote_average": 7.3,
+        "poster_path": "/poster.jpg",
+        "genres": [{"id": 18, "name": "драма"}],
+        "production_countries": [{"iso_3166_1": "US", "name": "United States of America"}],
+        "credits": {
+            "cast": [{"id": 1000 + tmdb_id, "name": f"Actor {tmdb_id}"}, {"id": 1, "name": "Star"}],
+            "crew": [{"id": 2000 + tmdb_id, "name": f"Director {tmdb_id}", "job": "Director"}],
+        },
+    }
+
+
+def series_record(tmdb_id):
+    return {
+        "id": tmdb_id,
+        "name": f"Series {tmdb_id}",
+        "first_air_date": "2011-04-17",
+        "number_of_seasons": 3,
+        "number_of_episodes": 30,
+        "genre_ids": [10765],
+    }
+
+
+@pytest.fixture
+def dump_path(tmp_path):
+    path = tmp_path / "catalog.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as dump:
+        for tmdb_id in range(1, 6):
+            dump.write(json.dumps(movie_record(tmdb_id), ensure_ascii=False) + "\n")
+        dump.write("\n")
+        dump.write(json.dumps(series_record(100)) + "\n")
+    return path
+
+
+def test_map_record_daily_export_line():
+    """Тест преобразования строки ежедневной выгрузки ID TMDB."""
+    obj, relations = map_record({"id": 3924, "original_title": "Blondie", "popularity": 2.8})
+    assert isinstance(obj, Movie)
+    assert obj.title == "Blondie"
+    assert relations["actors"] == {}
+
+
+def test_map_record_tv_export_line():
+    """Тест определения сериала по полю original_name."""
+    obj, _ = map_record({"id": 1399, "original_name": "Game of Thrones"})
+    assert isinstance(obj, Series)
+
+
+def test_iter_dump_resumes_from_offset(dump_path):
+    """Тест чтения дампа с сохранённой позиции."""
+    records = list(iter_dump(dump_path))
+    _, offset = records[2]
+
+    resumed = [record["id"] for record, _ in iter_dump(dump_path, offset)]
+
+    assert resumed == [4, 5, 100]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_copy", [True, False])
+def test_loader_loads_content_and_relations(dump_path, use_copy):
+    """Тест загрузки контента и связей через COPY и через bulk_create."""
+    loader = CatalogLoader(batch_size=2, use_copy=use_copy)
+    for record, _ in iter_dump(dump_path):
+        if loader.add(record):
+            loader.flush()
+    loader.flush()
+
+    assert loader.loaded == 6
+    assert Movie.objects.count() == 5
+    movie = Movie.objects.get(tmdb_id=3)
+    assert movie.rating == 73
+    assert "\"кавычками\"" in movie.description
+    assert movie.director.get().name == "Director 3"
+    assert movie.actors.count() == 2
+    assert Actor.objects.get(tmdb_id=1).name == "Star"
+    series = Series.objects.get(tmdb_id=100)
+    assert series.seasons == 3
+    assert list(series.genres.values_list("name", flat=True)) == ["Genre 10765"]
+    assert isinstance(Content.objects.get(tmdb_id=100), Series)
+
+
+@pytest.mark.django_db
+def test_loader_skips_existing_content(dump_path):
+    """Тест пропуска уже существующего контента."""
+    Movie.objects.create(tmdb_id=1, title="Existing")
+    loader = CatalogLoader()
+    for record, _ in iter_dump(dump_path):
+        loader.add(record)
+    loader.flush()
+
+    assert Movie.objects.get(tmdb_id=1).title == "Existing"
+    assert loader.loaded == 5
+    assert loader.skipped == 1
+
+
+@pytest.mark.django_db
+def test_load_catalog_command_stores_offset(dump_path):
+    """Тест сохранения позиции и продолжения загрузки командой."""
+    call_command("load_catalog", str(dump_path), "--batch-size", "2")
+
+    state = SyncState.objects.get(key="load_catalog:catalog.jsonl.gz")
+    assert state.offset > 0
+    assert Content.objects.count() == 6
+    assert Genre.objects.filter(tmdb_id=18).exists()
+
+    call_command("load_catalog", str(dump_path), "--resume")
+    assert Content.objects.count() == 6
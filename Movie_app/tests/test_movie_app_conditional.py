@@ -0,0 +1,130 @@
+import json
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from Movie_app.conditional import conditional_stats
+from Movie_app.models import Movie
+from Movie_app.response_cache import VERSION_KEY
+
+
+@pytest.fixture
+def movie():
+    return Movie.objects.create(tmdb_id=1, title="Первый фильм", rating=80)
+
+
+@pytest.fixture
+def viewer(client):
+    user = User.objects.create_user(username='viewer', password='secret')
+    client.force_login(user)
+    return user
+
+
+@pytest.mark.django_db
+def test_matching_etag_answers_not_modified_without_queries(client, movie):
+    """Тест: совпавший ETag списка даёт 304 без запросов к базе данных."""
+    url = reverse('Movie_app:movie_list')
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first['Cache-Control'] == 'public, max-age=0, must-revalidate, s-maxage=30'
+
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    assert second.status_code == 304
+    assert second['ETag'] == first['ETag']
+    assert second.content == b''
+    assert len(queries) == 0
+
+    movie.title = "Новое название"
+    movie.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code == 200
+
+
+@pytest.mark.django_db
+def test_etag_follows_version_bumped_by_another_process(client, settings, tmp_path, movie):
+    """
+    Тест: ETag строится из версии каталога в общем хранилище, поэтому
+    увеличение версии другим процессом (своим экземпляром кэша) сбрасывает его.
+    """
+    settings.CACHES = {**settings.CACHES, 'responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path)}}
+    url = reverse('Movie_app:movie_list')
+    detail = reverse('Movie_app:content_detail', args=[movie.tmdb_id])
+    first = client.get(url)
+    first_detail = client.get(detail)
+    assert client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
+
+    FileBasedCache(str(tmp_path), {}).incr(VERSION_KEY)
+
+    second = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+    assert second.status_code == 200
+    assert second['ETag'] != first['ETag']
+    assert client.get(detail, HTTP_IF_NONE_MATCH=first_detail['ETag']).status_code == 200
+
+
+@pytest.mark.django_db
+def test_content_detail_last_modified_follows_updated_at(client, movie):
+    """Тест: Last-Modified страницы контента берётся из updated_at и меняется с ним."""
+    url = reverse('Movie_app:content_detail', args=[movie.tmdb_id])
+    response = client.get(url)
+    assert response['Last-Modified'] == http_date(movie.updated_at.timestamp())
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+    assert cached.status_code == 304
+    assert len(queries) == 1
+
+    Movie.objects.filter(pk=movie.pk).update(updated_at=movie.updated_at.replace(year=2100))
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code == 200
+    assert client.get(reverse('Movie_app:content_detail', args=[999])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_personal_etag_changes_with_favorites(client, movie, viewer):
+    """Тест: ETag страниц пользователя меняется при изменении его избранного."""
+    url = reverse('recommendations:get_favorites')
+    first = client.get(url)
+    assert 'private' in first['Cache-Control']
+    assert client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code == 304
+    detail = client.get(reverse('Movie_app:content_detail', args=[movie.tmdb_id]))
+    assert 'Last-Modified' not in detail
+
+    viewer.preferences.favorite_content.add(movie)
+    second = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+    assert second.status_code == 200
+    assert "Первый фильм" in second.content.decode()
+
+    movie.favorites_by_user.clear()
+    assert client.get(url, HTTP_IF_NONE_MATCH=second['ETag']).status_code == 200
+
+    other = User.objects.create_user(username='other', password='secret')
+    client.force_login(other)
+    assert client.get(url)['ETag'] != second['ETag']
+
+
+@pytest.mark.django_db
+def test_not_modified_ratio_and_saved_bytes_in_metrics(client, movie, capsys):
+    """Тест метрик: доля ответов 304 и сэкономленные байты видны в команде response_cache."""
+    url = reverse('Movie_app:movie_list')
+    first = client.get(url)
+    client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+    client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+    client.get(url, HTTP_IF_NONE_MATCH='"stale"')
+
+    stats = conditional_stats()['movie_list']
+    assert stats['full'] == 2
+    assert stats['not_modified'] == 2
+    assert stats['not_modified_rate'] == 0.5
+    assert stats['bytes_sent'] == 2 * len(first.content)
+    assert stats['bytes_saved'] == 2 * len(first.content)
+
+    call_command('response_cache', '--reset-stats')
+    report = json.loads(capsys.readouterr().out.split('\n', 1)[1])
+    assert report['conditional']['movie_list']['not_modified'] == 2
+    assert not conditional_stats()
@@ -0,0 +1,39 @@
+import pytest
+from Movie_app import autocomplete
+from Movie_app.content_changes import apply_pending_changes
+from Movie_app.facets import get_facet_index
+from Movie_app.models import Genre, Movie, SearchDocument, Series
+from Movie_app.response_cache import catalog_version
+from Movie_app.search import full_text_search_enabled
+from Movie_app.summaries import summary_queryset
+
+
+@pytest.mark.django_db
+def test_content_changes_use_one_commit_callback(django_capture_on_commit_callbacks):
+    """Тест: сохранение, связи и удаление контента регистрируют один обработчик после фиксации."""
+    drama = Genre.objects.create(tmdb_id=18, name="Драма")
+    with django_capture_on_commit_callbacks() as callbacks:
+        movie = Movie.objects.create(tmdb_id=1, title="Первый", rating=80)
+        movie.genres.add(drama)
+        Series.objects.create(tmdb_id=2, title="Второй", rating=60).delete()
+
+    assert set(callbacks) == {apply_pending_changes}
+
+
+@pytest.mark.django_db
+def test_committed_changes_reach_every_consumer(django_capture_on_commit_callbacks):
+    """Тест: после фиксации обновляются карточки, поиск, фасеты, подсказки и версия каталога."""
+    drama = Genre.objects.create(tmdb_id=18, name="Драма")
+    get_facet_index(wait=True)
+    autocomplete.get_autocomplete(wait=True)
+    version = catalog_version()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        movie = Movie.objects.create(tmdb_id=1, title="Матрица", rating=80)
+        movie.genres.add(drama)
+
+    assert catalog_version() > version
+    assert summary_queryset().get(pk=1).genre_names == ["Драма"]
+    assert list(get_facet_index().search({'genre': [18]}).pks) == [1]
+    assert [item['id'] for item in autocomplete.suggest("матр")] == [1]
+    assert SearchDocument.objects.filter(pk=1).exists() == full_text_search_enabled()
@@ -0,0 +1,129 @@
+import importlib
+from datetime import date
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from Movie_app import entity_stats
+from Movie_app.ingestion import IngestionBatch
+from Movie_app.models import (Actor, ActorStats, Director, DirectorStats, Genre, GenreStats, Movie,
+                              Series)
+
+
+@pytest.fixture
+def stats_catalog():
+    drama = Genre.objects.create(tmdb_id=18, name="Драма")
+    comedy = Genre.objects.create(tmdb_id=35, name="Комедия")
+    Genre.objects.create(tmdb_id=99, name="Документальный")
+    first = Movie.objects.create(tmdb_id=1, title="Первый", rating=90,
+                                 release_date=date(2001, 1, 1))
+    second = Movie.objects.create(tmdb_id=2, title="Второй", rating=70,
+                                  release_date=date(2010, 1, 1))
+    third = Series.objects.create(tmdb_id=3, title="Третий", rating=50,
+                                  release_date=date(2020, 1, 1))
+    fourth = Movie.objects.create(tmdb_id=4, title="Четвёртый", rating=30)
+    first.genres.add(comedy)
+    for content in (second, third, fourth):
+        content.genres.add(drama)
+    return {'drama': drama, 'comedy': comedy}
+
+
+@pytest.mark.django_db
+def test_stats_aggregate_movies_and_series(stats_catalog):
+    """Тест агрегатов: число тайтлов, средний рейтинг, последний выход и популярность."""
+    entity_stats.refresh_entity_stats(Genre)
+
+    drama = GenreStats.objects.get(pk=18)
+    assert drama.title_count == 3
+    assert drama.average_rating == 50
+    assert drama.latest_release == date(2020, 1, 1)
+    assert drama.popularity == 1.5
+    empty = GenreStats.objects.get(pk=99)
+    assert (empty.title_count, empty.average_rating, empty.popularity) == (0, None, 0)
+
+
+@pytest.mark.django_db
+def test_stats_follow_content_and_link_changes(stats_catalog):
+    """Тест инкрементального пересчёта после изменения рейтинга, связей и удаления."""
+    entity_stats.refresh_pending_stats()
+
+    Movie.objects.filter(pk=2).update(rating=10)
+    Movie.objects.get(pk=2).save()
+    stats_catalog['comedy'].movie_set.add(Movie.objects.get(pk=4))
+    Movie.objects.get(pk=1).genres.clear()
+    entity_stats.refresh_pending_stats()
+    assert GenreStats.objects.get(pk=18).average_rating == 30
+    assert GenreStats.objects.get(pk=35).title_count == 1
+
+    Series.objects.get(pk=3).delete()
+    entity_stats.refresh_pending_stats()
+    assert GenreStats.objects.get(pk=18).title_count == 2
+
+
+@pytest.mark.django_db
+def test_stats_refreshed_after_ingestion_batch(django_capture_on_commit_callbacks):
+    """Тест пересчёта агрегатов пакетом после фиксации загрузки."""
+    movie = Movie.objects.create(tmdb_id=10, title="Загруженный", rating=80)
+    batch = IngestionBatch()
+    batch.add_movie_details(movie, {
+        'credits': {'cast': [{'id': 5, 'name': "Актёр"}],
+                    'crew': [{'id': 6, 'name': "Режиссёр", 'job': 'Director'}]},
+        'production_countries': [{'iso_3166_1': 'US', 'name': "США"}],
+    })
+    with django_capture_on_commit_callbacks(execute=True):
+        batch.flush()
+
+    assert ActorStats.objects.get(pk=5).title_count == 1
+    assert Director.objects.get(pk=6).stats.average_rating == 80
+
+
+@pytest.mark.django_db
+def test_genre_list_sorted_by_popularity(client, settings, stats_catalog, capsys):
+    """Тест списка жанров: сортировка по популярности и вывод агрегатов без доп. запросов."""
+    settings.RESPONSE_CACHE_ENABLED = False
+    GenreStats.objects.all().delete()
+    call_command('rebuild_entity_stats', '--model', 'genre')
+    assert "Rebuilt statistics of 3 genre rows." in capsys.readouterr().out
+
+    response = client.get(reverse('Movie_app:genre_list'))
+
+    assert [genre.pk for genre in response.context['genres']] == [18, 35, 99]
+    assert "Тайтлов: 3, средний рейтинг: 50,0, последний выход: 2020" in \
+        response.content.decode()
+
+
+@pytest.mark.django_db
+def test_entity_list_plan_uses_stats_index():
+    """Тест плана: страница актёров читается по индексу популярности таблицы агрегатов."""
+    Actor.objects.bulk_create([Actor(tmdb_id=pk, name=f"Актёр {pk}") for pk in range(1, 301)])
+    entity_stats.refresh_entity_stats(Actor)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE "Movie_app_actor", "Movie_app_actorstats"')
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('SET LOCAL enable_sort = off')
+    plan = entity_stats.ranked_entities(Actor)[:20].explain()
+
+    assert 'actor_stats_popularity_idx' in plan
+
+
+@pytest.mark.django_db
+def test_migration_backfills_existing_entities(client, settings, stats_catalog):
+    """Тест миграции агрегатов: уже загруженные сущности сразу видны в списках после migrate."""
+    settings.RESPONSE_CACHE_ENABLED = False
+    Series.objects.get(pk=3).actors.add(Actor.objects.create(tmdb_id=7, name="Актёр"))
+    Movie.objects.get(pk=1).director.add(Director.objects.create(tmdb_id=8, name="Режиссёр"))
+    entity_stats.rebuild_entity_stats()
+    expected = {model: sorted(model.objects.values_list(*entity_stats.STATS_FIELDS))
+                for model in (GenreStats, ActorStats, DirectorStats)}
+    for model in entity_stats.STATS_MODELS.values():
+        model.objects.all().delete()
+    assert client.get(reverse('api:genre_list')).json()['results'] == []
+
+    migration = importlib.import_module('Movie_app.migrations.0009_entity_stats')
+    migration.backfill_entity_stats(apps, None)
+
+    assert {model: sorted(model.objects.values_list(*entity_stats.STATS_FIELDS))
+            for model in expected} == expected
+    genres = client.get(reverse('api:genre_list')).json()['results']
+    assert [genre['id'] for genre in genres] == [18, 35, 99]
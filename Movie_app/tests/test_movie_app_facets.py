@@ -0,0 +1,218 @@
+from unittest import mock
+import numpy as np
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app import content_changes, facets
+from Movie_app.facets import FacetIndex, get_facet_index, mark_dirty
+from Movie_app.models import Actor, Country, Director, Genre, Movie, Series
+from Movie_app.response_cache import bump_catalog_version
+from Movie_app.summaries import refresh_pending_summaries
+
+
+@pytest.fixture
+def facet_catalog():
+    drama = Genre.objects.create(tmdb_id=18, name="Драма")
+    comedy = Genre.objects.create(tmdb_id=35, name="Комедия")
+    usa = Country.objects.create(iso_code="US", name="США")
+    france = Country.objects.create(iso_code="FR", name="Франция")
+    director = Director.objects.create(tmdb_id=1, name="Режиссёр")
+    actor = Actor.objects.create(tmdb_id=1, name="Актёр")
+
+    first = Movie.objects.create(tmdb_id=1, title="Первый", rating=95)
+    first.genres.add(drama)
+    first.created_in.add(usa)
+    first.director.add(director)
+    first.actors.add(actor)
+    second = Movie.objects.create(tmdb_id=2, title="Второй", rating=75)
+    second.genres.add(drama, comedy)
+    second.created_in.add(france)
+    third = Series.objects.create(tmdb_id=3, title="Третий", rating=55)
+    third.genres.add(comedy)
+    third.created_in.add(usa)
+    third.actors.add(actor)
+    return {'drama': drama, 'comedy': comedy, 'usa': usa, 'france': france}
+
+
+def facet_counts(result, name):
+    facet = next(facet for facet in result.facets if facet['name'] == name)
+    return {value['key']: value['count'] for value in facet['values']}
+
+
+@pytest.mark.django_db
+def test_facet_search_or_within_and_across_facets(facet_catalog):
+    """Тест выборки: значения одного фасета объединяются, разных фасетов — пересекаются."""
+    index = FacetIndex()
+    index.load()
+
+    assert list(index.search({'genre': [18, 35]}).pks) == [3, 2, 1]
+    assert list(index.search({'genre': [35], 'country': ['US']}).pks) == [3]
+    assert list(index.search({'genre': [18]}, ordering='-rating').pks) == [1, 2]
+    assert list(index.search({'rating': ['7', '9']}).pks) == [2, 1]
+    assert list(index.search({}).pks) == [3, 2, 1]
+
+
+@pytest.mark.django_db
+def test_facet_counts_ignore_own_selection(facet_catalog):
+    """Тест счётчиков: фасет считается с учётом выбора во всех остальных фасетах."""
+    index = FacetIndex()
+    index.load()
+
+    result = index.search({'genre': [18], 'country': ['US']})
+
+    assert facet_counts(result, 'genre') == {18: 1, 35: 1}
+    assert facet_counts(result, 'country') == {'US': 1, 'FR': 1}
+    assert facet_counts(result, 'director') == {1: 1}
+    assert facet_counts(result, 'rating') == {'9': 1}
+    selected = [value['key'] for facet in result.facets for value in facet['values']
+                if value['selected']]
+    assert selected == [18, 'US']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_facet_index_reloads_changed_content(facet_catalog):
+    """Тест инкрементального обновления индекса после сохранения контента и связей."""
+    index = get_facet_index()
+    assert list(index.search({'genre': [35]}).pks) == [3, 2]
+
+    fourth = Movie.objects.create(tmdb_id=4, title="Четвёртый", rating=15)
+    fourth.genres.add(facet_catalog['comedy'])
+    Movie.objects.get(pk=1).genres.add(facet_catalog['comedy'])
+    Series.objects.filter(pk=3).delete()
+
+    index = get_facet_index()
+    assert list(index.search({'genre': [35]}).pks) == [4, 2, 1]
+    assert facet_counts(index.search({}), 'rating') == {'9': 1, '7': 1, '1': 1}
+
+
+@pytest.mark.django_db
+def test_content_list_shows_facets_and_loads_only_page(client, facet_catalog):
+    """Тест списка контента: фасеты со счётчиками и загрузка из базы только страницы."""
+    get_facet_index(wait=True)
+    refresh_pending_summaries()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('Movie_app:content_list'), {'genres': [35]})
+
+    assert response.status_code == 200
+    assert [obj.pk for obj in response.context['contents']] == [3, 2]
+    genre_facet = next(facet for facet in response.context['facets']
+                       if facet['name'] == 'genre')
+    assert genre_facet['label'] == "Жанры"
+    assert {value['key']: value['count'] for value in genre_facet['values']} == {18: 2, 35: 2}
+    assert 'Комедия <span class="text-muted">(2)</span>' in response.content.decode()
+    assert len(queries) <= 6
+
+
+@pytest.mark.django_db
+def test_unfiltered_content_list_pages_by_cursor_in_sql(client, facet_catalog):
+    """
+    Тест списка без фасетов: страница выбирается из базы по ключу,
+    фасетный поиск не выполняется, счётчики без выбора берутся из индекса.
+    """
+    get_facet_index(wait=True)
+    with mock.patch.object(FacetIndex, 'search', side_effect=AssertionError):
+        response = client.get(reverse('Movie_app:content_list'))
+    assert [obj.pk for obj in response.context['contents']] == [3, 2, 1]
+    genre_facet = next(facet for facet in response.context['facets']
+                       if facet['name'] == 'genre')
+    assert {value['key']: value['count'] for value in genre_facet['values']} == {18: 2, 35: 2}
+    assert get_facet_index().facets({}) is get_facet_index().facets({})
+
+
+def test_facet_result_materialises_only_requested_page():
+    """Тест: pk результата превращаются в список только для запрошенного среза."""
+    index = FacetIndex()
+    index.universe = np.arange(1, 100_001, dtype=np.int64)
+    index.ratings = np.zeros(100_000, dtype=np.int16)
+    for dimension in index.dimensions.values():
+        dimension.compile(index.universe)
+
+    pks = index.search({}).pks
+    assert isinstance(pks, facets.FacetPks)
+    assert len(pks) == 100_000
+    assert pks[20:23] == [99_980, 99_979, 99_978]
+
+
+@pytest.mark.django_db
+def test_first_build_runs_in_background_and_list_falls_back_to_sql(client, settings,
+                                                                   facet_catalog):
+    """Тест: первое обращение не строит индекс в запросе, список фильтруется в базе."""
+    settings.FACETS_BUILD_IN_BACKGROUND = True
+    with mock.patch.object(facets.threading, 'Thread') as thread:
+        assert get_facet_index() is None
+        response = client.get(reverse('Movie_app:content_list'),
+                              {'genres': [35], 'ratings': ['7']})
+
+    thread.return_value.start.assert_called_once()
+    assert [obj.pk for obj in response.context['contents']] == [2]
+    assert response.context['facets'] == []
+
+
+@pytest.mark.django_db
+def test_changes_marked_during_rebuild_survive_swap(facet_catalog):
+    """Тест: контент, помеченный во время фонового перестроения, перечитывается новым индексом."""
+    get_facet_index(wait=True)
+    Movie.objects.filter(pk=1).update(rating=15)
+    original_load = FacetIndex.load
+
+    def load_then_change(index, pks=None):
+        original_load(index, pks)
+        if pks is None:
+            Movie.objects.filter(pk=2).update(rating=25)
+            mark_dirty([2])
+            get_facet_index()
+
+    with mock.patch.object(facets, 'time') as clock, \
+            mock.patch.object(facets.threading, 'Thread') as thread, \
+            mock.patch.object(FacetIndex, 'load', load_then_change):
+        clock.monotonic.return_value = 10 ** 9
+        get_facet_index()
+        target, generation = thread.call_args.kwargs['args']
+        target(generation)
+
+    assert list(get_facet_index().search({'rating': ['2']}).pks) == [2]
+    assert list(get_facet_index().search({'rating': ['1']}).pks) == [1]
+
+
+@pytest.mark.django_db
+def test_index_follows_changes_of_other_processes(facet_catalog):
+    """
+    Тест: изменения без сигналов этого процесса (другой воркер или команда загрузки)
+    находятся по общей версии каталога и updated_at, удаления — по числу тайтлов.
+    """
+    get_facet_index(wait=True)
+    with mock.patch.object(content_changes, 'mark_dirty'):
+        Movie.objects.get(pk=2).genres.remove(facet_catalog['comedy'])
+    bump_catalog_version()
+    assert list(get_facet_index().search({'genre': [35]}).pks) == [3]
+
+    with mock.patch.object(content_changes, 'mark_dirty'), \
+            mock.patch.object(facets.threading, 'Thread') as thread:
+        Series.objects.filter(pk=3).delete()
+        bump_catalog_version()
+        get_facet_index()
+    thread.return_value.start.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_refresh_runs_in_background_and_swaps_a_copy(settings, facet_catalog):
+    """
+    Тест: помеченный контент перечитывается в фоновом потоке в копию индекса,
+    а индекс, который уже читают запросы, не изменяется.
+    """
+    index = get_facet_index(wait=True)
+    Movie.objects.get(pk=2).genres.remove(facet_catalog['comedy'])
+    mark_dirty([2])
+
+    settings.FACETS_BUILD_IN_BACKGROUND = True
+    with mock.patch.object(facets.threading, 'Thread') as thread:
+        assert get_facet_index() is index
+    thread.return_value.start.assert_called_once()
+    target, generation = thread.call_args.kwargs['args']
+    target(generation)
+    settings.FACETS_BUILD_IN_BACKGROUND = False
+
+    assert get_facet_index() is not index
+    assert list(get_facet_index().search({'genre': [35]}).pks) == [3]
+    assert list(index.search({'genre': [35]}).pks) == [3, 2]
@@ -0,0 +1,104 @@
+import json
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app.facets import FacetIndex
+from Movie_app.filters import MATCH_ALL, apply_filters
+from Movie_app.listing import listing_queryset
+from Movie_app.models import Actor, Content, Country, Director, Genre, Movie, Series
+from Movie_app.search import search_like
+
+
+@pytest.fixture
+def filter_catalog():
+    drama = Genre.objects.create(tmdb_id=18, name="Драма")
+    comedy = Genre.objects.create(tmdb_id=35, name="Комедия")
+    usa = Country.objects.create(iso_code="US", name="США")
+    actor = Actor.objects.create(tmdb_id=1, name="Актёр")
+    director = Director.objects.create(tmdb_id=1, name="Режиссёр")
+
+    first = Movie.objects.create(tmdb_id=1, title="Первый", rating=90)
+    first.genres.add(drama, comedy)
+    first.created_in.add(usa)
+    first.actors.add(actor)
+    first.director.add(director)
+    second = Movie.objects.create(tmdb_id=2, title="Второй", rating=70)
+    second.genres.add(drama)
+    second.created_in.add(usa)
+    third = Series.objects.create(tmdb_id=3, title="Третий", rating=50)
+    third.genres.add(drama, comedy)
+    third.actors.add(actor)
+
+
+@pytest.mark.django_db
+def test_any_and_all_compile_to_exists_without_distinct(filter_catalog):
+    """Тест: «любое» и «все» значения фасета проверяются через EXISTS без DISTINCT."""
+    selection = {'genre': [18, 35], 'country': ['US']}
+    queryset = apply_filters(listing_queryset(), selection).order_by('-tmdb_id')
+    assert list(queryset.values_list('pk', flat=True)) == [2, 1]
+
+    sql = str(queryset.query)
+    assert sql.count('EXISTS') == 4
+    assert 'DISTINCT' not in sql
+    assert '"Movie_app_movie_genres"' not in sql.split('WHERE', maxsplit=1)[0]
+
+    matching_all = apply_filters(Content.objects.non_polymorphic(), {'genre': [18, 35]},
+                                 MATCH_ALL)
+    assert sorted(matching_all.values_list('pk', flat=True)) == [1, 3]
+    assert not apply_filters(Series.objects.all(), {'director': [1]}).exists()
+
+
+@pytest.mark.django_db
+def test_movie_list_and_search_do_not_duplicate_rows(client, filter_catalog):
+    """Тест списка фильмов и поиска icontains: связи проверяются через EXISTS без дублей."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('Movie_app:movie_list'), {'genre': 18, 'actor': 1})
+    assert [movie.pk for movie in response.context['movies']] == [1]
+    listing = next(query['sql'] for query in queries
+                   if 'Movie_app_movie_actors' in query['sql'])
+    assert 'EXISTS' in listing and 'DISTINCT' not in listing
+
+    assert [content.pk for content in search_like("Комедия")] == [1, 3]
+    assert [content.pk for content in search_like("р")] == [1, 2, 3]
+
+
+@pytest.mark.django_db
+def test_facet_index_and_content_list_match_all(client, filter_catalog):
+    """Тест фасетного поиска «все выбранные»: пересечение значений и счётчики."""
+    index = FacetIndex()
+    index.load()
+    result = index.search({'genre': [18, 35]}, match=MATCH_ALL)
+    assert list(result.pks) == [3, 1]
+    genre_facet = next(facet for facet in result.facets if facet['name'] == 'genre')
+    assert {value['key']: value['count'] for value in genre_facet['values']} == {18: 2, 35: 2}
+    assert list(index.search({'genre': [18, 35]}).pks) == [3, 2, 1]
+
+    response = client.get(reverse('Movie_app:content_list'),
+                          {'genres': [18, 35], 'match': 'all'})
+    assert [content.pk for content in response.context['contents']] == [3, 1]
+    assert response.context['match'] == MATCH_ALL
+
+
+@pytest.mark.django_db
+def test_explain_filters_compares_plans_on_synthetic_catalog(capsys):
+    """Тест команды сравнения планов: одинаковые строки и откат синтетического каталога."""
+    call_command('explain_filters', '--synthetic', '300', '--genres', '5', '--actors', '50',
+                 '--countries', '4', '--directors', '20', '--repeat', '1', '--match', 'all')
+
+    report = json.loads(capsys.readouterr().out)
+    assert report['titles'] == 300
+    assert len(report['selection']['genre']) == 2
+    assert report['same_rows'] and report['exists']['rows']
+    assert any('Unique' in line or 'HashAggregate' in line
+               for line in report['join_distinct']['plan'])
+    assert report['exists']['execution_ms'] > 0
+    assert not Content.objects.exists()
+
+
+@pytest.mark.django_db
+def test_explain_filters_rejects_zero_repeats():
+    """Тест команды сравнения планов: --repeat 0 не даёт отчёта без замеров."""
+    with pytest.raises(CommandError, match='--repeat'):
+        call_command('explain_filters', '--repeat', '0')
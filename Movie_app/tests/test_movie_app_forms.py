@@ -1,5 +1,6 @@
 import pytest
 from django import forms
+from django.urls import reverse
 from Movie_app.forms import (
     ContentForm,
     SearchForm,
@@ -7,6 +8,8 @@ from Movie_app.forms import (
     MovieFilterForm,
     SeriesFilterForm
 )
+from Movie_app.models import Actor
+from Movie_app.widgets import LookupSelectMultiple
 
 pytestmark = pytest.mark.django_db
 
@@ -72,10 +75,36 @@ class TestContentFilterForm:
             assert field in form.fields
 
     def test_widget_type(self):
-        """Проверка, что используется чекбокс"""
+        """Проверка, что жанры выводятся чекбоксами, а люди и страны загружаются с сервера"""
         form = ContentFilterForm()
         assert isinstance(form.fields['genres'].widget, forms.CheckboxSelectMultiple)
-        assert isinstance(form.fields['actors'].widget, forms.CheckboxSelectMultiple)
+        assert isinstance(form.fields['actors'].widget, LookupSelectMultiple)
+        assert isinstance(form.fields['countries'].widget, LookupSelectMultiple)
+
+    def test_renders_only_selected_people(self, django_assert_num_queries):
+        """Проверка, что в HTML выводятся только выбранные актёры"""
+        actors = [Actor.objects.create(tmdb_id=tmdb_id, name=f"Актёр {tmdb_id}")
+                  for tmdb_id in range(1, 51)]
+        form = ContentFilterForm(data={'actors': [actors[0].pk, actors[1].pk]})
+        assert form.is_valid()
+
+        with django_assert_num_queries(1):
+            html = str(form['actors'])
+
+        assert html.count('<option') == 2
+        assert 'selected' in html
+        assert reverse('Movie_app:lookup', args=['actor']) in html
+
+    def test_validates_only_submitted_ids(self, django_assert_num_queries):
+        """Проверка, что при валидации запрашиваются только отправленные ID"""
+        actor = Actor.objects.create(tmdb_id=1, name="Актёр 1")
+
+        form = ContentFilterForm(data={'actors': [actor.pk]})
+        with django_assert_num_queries(1):
+            assert form.is_valid()
+        assert list(form.cleaned_data['actors']) == [actor]
+
+        assert not ContentFilterForm(data={'actors': ['999']}).is_valid()
 
     def test_required_attributes(self):
         """Проверка, что все поля не обязательны для заполнения"""
@@ -90,7 +119,8 @@ class TestMovieFilterForm:
     def test_fields_list(self):
         """Проверка наличия всех ожидаемых полей"""
         form = MovieFilterForm()
-        expected_fields = ['title', 'genre', 'rating', 'actor', 'director', 'country']
+        expected_fields = ['title', 'genre', 'rating', 'rating_max', 'year_from', 'year_to',
+                           'actor', 'director', 'country']
         assert set(form.fields.keys()) == set(expected_fields)
 
     def test_rating_constraints(self):
@@ -116,6 +146,13 @@ class TestMovieFilterForm:
         form = MovieFilterForm(data={'rating': '8.5'})
         assert form.is_valid()
 
+    def test_inverted_ranges_are_invalid(self):
+        """Нижняя граница рейтинга и года не может быть больше верхней"""
+        form = MovieFilterForm(data={'rating': 80, 'rating_max': 20,
+                                     'year_from': 2020, 'year_to': 2010})
+        assert not form.is_valid()
+        assert set(form.errors) == {'rating_max', 'year_to'}
+
 
 class TestSeriesFilterForm:
     """Тесты для формы SeriesFilterForm"""
@@ -125,7 +162,8 @@ class TestSeriesFilterForm:
         form = SeriesFilterForm()
         fields = list(form.fields.keys())
 
-        expected = ['title', 'genre', 'rating', 'actor', 'country']
+        expected = ['title', 'genre', 'rating', 'rating_max', 'year_from', 'year_to',
+                    'actor', 'country']
         assert fields == expected
         assert 'director' not in fields
 
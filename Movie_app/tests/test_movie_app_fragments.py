@@ -0,0 +1,129 @@
+from unittest import mock
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app import fragments
+from Movie_app.entity_stats import refresh_entity_stats
+from Movie_app.fragments import fragment_cache, render_cards
+from Movie_app.ingestion import bulk_upsert
+from Movie_app.listing import listing_queryset, prepare_listing
+from Movie_app.models import Actor, Genre, Movie, Series
+
+
+@pytest.fixture
+def cards_catalog():
+    drama = Genre.objects.create(tmdb_id=18, name="Драма")
+    for tmdb_id in range(1, 21):
+        model = Series if tmdb_id % 4 == 0 else Movie
+        content = model.objects.create(tmdb_id=tmdb_id, title=f"Тайтл {tmdb_id}",
+                                       rating=tmdb_id, description="Описание " * 30,
+                                       poster_url=f"https://image.tmdb.org/t/p/w500/{tmdb_id}.jpg")
+        content.genres.add(drama)
+    return drama
+
+
+def page():
+    return prepare_listing(listing_queryset().order_by('-tmdb_id'))
+
+
+@pytest.mark.django_db
+def test_cards_are_read_with_one_get_many(cards_catalog):
+    """Тест: повторный рендер страницы читает все карточки одним get_many без запросов к БД."""
+    contents = page()
+    cold = render_cards(contents)
+    cache = fragment_cache()
+
+    with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many, \
+            mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many, \
+            CaptureQueriesContext(connection) as queries:
+        warm = render_cards(contents)
+
+    assert [html for _, html in warm] == [html for _, html in cold]
+    assert get_many.call_count == 1
+    assert set_many.call_count == 0
+    assert len(queries) == 0
+    assert "Драма" in warm[0][1]
+    assert "Сезонов" in warm[0][1]
+
+
+@pytest.mark.django_db
+def test_cards_load_genres_for_plain_objects(cards_catalog):
+    """Тест: для объектов без genre_names жанры подгружаются одним запросом на модель."""
+    movies = list(Movie.objects.order_by('pk')[:3])
+
+    with CaptureQueriesContext(connection) as queries:
+        cards = render_cards(movies)
+
+    assert len(queries) == 1
+    assert all("Драма" in html for _, html in cards)
+
+
+@pytest.mark.django_db
+def test_card_is_rerendered_after_changes(cards_catalog):
+    """Тест: изменение контента, его жанров или названия жанра обновляет карточку."""
+    render_cards(page())
+
+    movie = Movie.objects.get(pk=1)
+    movie.title = "Новое название"
+    movie.save()
+    assert "Новое название" in render_cards(page())[-1][1]
+
+    comedy = Genre.objects.create(tmdb_id=35, name="Комедия")
+    Movie.objects.get(pk=2).genres.add(comedy)
+    assert "Комедия" in render_cards(page())[-2][1]
+
+    cards_catalog.name = "Драматургия"
+    cards_catalog.save()
+    assert all("Драматургия" in html for _, html in render_cards(page()))
+
+
+@pytest.mark.django_db
+def test_genre_save_without_rename_keeps_cards(cards_catalog):
+    """Тест: сохранение жанра без смены названия не обновляет updated_at его контента."""
+    updated_at = list(Movie.objects.order_by('pk').values_list('updated_at', flat=True))
+
+    cards_catalog.save()
+
+    assert list(Movie.objects.order_by('pk').values_list('updated_at', flat=True)) == updated_at
+
+
+@pytest.mark.django_db
+def test_cards_survive_entity_writes_without_new_rows(cards_catalog,
+                                                      django_capture_on_commit_callbacks):
+    """
+    Тест: загрузка уже известных жанров и пересчёт неизменившихся агрегатов
+    не сбрасывают карточки — повторный рендер не рендерит ни одного шаблона.
+    """
+    contents = page()
+    with mock.patch.object(fragments, 'render_to_string',
+                           wraps=fragments.render_to_string) as render:
+        render_cards(contents)
+        assert render.call_count == len(contents)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            bulk_upsert(Genre, {18: "Драма"})
+        refresh_entity_stats(Genre)
+        refresh_entity_stats(Genre)
+        render.reset_mock()
+        render_cards(page())
+
+    assert render.call_count == 0
+
+
+@pytest.mark.django_db
+def test_entity_list_is_cached_by_table_version(client, settings):
+    """Тест: список актёров кэшируется и обновляется после изменения таблицы актёров."""
+    settings.RESPONSE_CACHE_ENABLED = False
+    Actor.objects.create(tmdb_id=1, name="Первый актёр")
+    url = reverse('Movie_app:actor_list')
+    client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert "Первый актёр" in response.content.decode()
+    assert not any('"name"' in query['sql'] and 'LIMIT' in query['sql']
+                   for query in queries)
+
+    Actor.objects.create(tmdb_id=2, name="Второй актёр")
+    assert "Второй актёр" in client.get(url).content.decode()
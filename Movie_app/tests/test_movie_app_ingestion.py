@@ -0,0 +1,224 @@
+from unittest.mock import patch
+import pytest
+from Movie_app.models import Genre, Movie, Actor, Director, Country, Series
+from Movie_app.ingestion import IngestionBatch, parse_actors, parse_directors
+from Movie_app.api import get_popular_movies_from_tmdb
+
+
+def details_payload(offset=0):
+    return {
+        "production_countries": [{"iso_3166_1": "US", "name": "United States"}],
+        "credits": {
+            "cast": [{"id": 100 + offset + i, "name": f"Actor {offset + i}"} for i in range(12)],
+            "crew": [
+                {"id": 900 + offset, "name": f"Director {offset}", "job": "Director"},
+                {"id": 950, "name": "Producer", "job": "Producer"},
+            ],
+        },
+    }
+
+
+def test_parse_actors_limits_cast():
+    """Тест ограничения количества актёров."""
+    assert len(parse_actors(details_payload())) == 10
+
+
+def test_parse_directors_only_directors():
+    """Тест выбора только режиссёров из съёмочной группы."""
+    assert parse_directors(details_payload()) == {900: "Director 0"}
+
+
+@pytest.mark.django_db
+def test_flush_writes_entities_and_links():
+    """Тест пакетной записи сущностей и связей."""
+    movie = Movie.objects.create(tmdb_id=1, title="First")
+    series = Series.objects.create(tmdb_id=2, title="Second")
+    batch = IngestionBatch()
+    batch.add_genres(movie, [28, 12])
+    batch.add_movie_details(movie, details_payload())
+    batch.add_series_details(series, details_payload(offset=5))
+    batch.flush()
+
+    assert Genre.objects.count() == 2
+    assert Country.objects.count() == 1
+    assert Director.objects.count() == 1
+    assert Actor.objects.count() == 15
+    assert movie.actors.count() == 10
+    assert movie.director.get().name == "Director 0"
+    assert series.actors.count() == 10
+    assert list(series.created_in.values_list("iso_code", flat=True)) == ["US"]
+    assert len(batch) == 0
+
+
+@pytest.mark.django_db
+def test_flush_replaces_existing_links():
+    """Тест замены существующих связей при повторной записи."""
+    movie = Movie.objects.create(tmdb_id=1, title="First")
+    old_actor = Actor.objects.create(tmdb_id=1, name="Old Actor")
+    movie.actors.add(old_actor)
+
+    batch = IngestionBatch()
+    batch.add_movie_details(movie, details_payload())
+    batch.flush()
+
+    assert not movie.actors.filter(pk=old_actor.pk).exists()
+    assert movie.actors.count() == 10
+
+
+@pytest.mark.django_db
+def test_flush_skips_conflicting_names():
+    """Тест пропуска сущностей с конфликтом уникального имени."""
+    Actor.objects.create(tmdb_id=1, name="Actor 0")
+    movie = Movie.objects.create(tmdb_id=1, title="First")
+
+    batch = IngestionBatch()
+    batch.add_movie_details(movie, details_payload())
+    batch.flush()
+
+    assert movie.actors.count() == 9
+    assert not Actor.objects.filter(tmdb_id=100).exists()
+
+
+@pytest.mark.django_db
+def test_flush_query_count_does_not_grow_with_titles(django_assert_max_num_queries):
+    """Тест постоянного числа запросов к связям при росте размера пакета."""
+    movies = [Movie.objects.create(tmdb_id=i, title=f"Movie {i}") for i in range(1, 21)]
+    batch = IngestionBatch()
+    for i, movie in enumerate(movies):
+        batch.add_genres(movie, [28, 12])
+        batch.add_movie_details(movie, details_payload(offset=i * 20))
+
+    with django_assert_max_num_queries(len(movies) * 4 + 25):
+        batch.flush()
+
+    assert Actor.objects.count() == 200
+
+
+@pytest.mark.django_db
+@patch('requests.get')
+def test_get_popular_movies_writes_page_in_batch(mock_get, settings):
+    """Тест загрузки страницы популярных фильмов через пакетную запись."""
+    settings.TMDB_API_KEY = 'test_api_key'
+    popular = {"results": [
+        {"id": 10, "title": "Movie 10", "genre_ids": [28]},
+        {"id": 11, "title": "Movie 11", "genre_ids": [28, 35]},
+    ]}
+    mock_get.return_value.json.side_effect = [popular, details_payload(), details_payload(1)]
+    mock_get.return_value.status_code = 200
+
+    get_popular_movies_from_tmdb()
+
+    assert Movie.objects.count() == 2
+    assert Movie.objects.get(tmdb_id=11).genres.count() == 2
+    assert Movie.objects.get(tmdb_id=10).actors.count() == 10
+    assert Genre.objects.get(tmdb_id=35).name == "Genre 35"
+
+
+@pytest.mark.django_db
+@patch('requests.get')
+def test_get_popular_movies_rolls_back_only_failed_title(mock_get, settings,
+                                                         django_capture_on_commit_callbacks):
+    """Тест отката только ошибочного фильма при записи страницы в одной транзакции."""
+    settings.TMDB_API_KEY = 'test_api_key'
+    popular = {"results": [
+        {"id": 10, "title": "x" * 1000, "genre_ids": [28]},
+        {"id": 11, "title": "Movie 11", "genre_ids": [35]},
+    ]}
+    mock_get.return_value.json.side_effect = [popular, details_payload(), details_payload(1)]
+    mock_get.return_value.status_code = 200
+
+    with django_capture_on_commit_callbacks(execute=True):
+        metrics = get_popular_movies_from_tmdb()
+
+    assert list(Movie.objects.values_list('tmdb_id', flat=True)) == [11]
+    assert Movie.objects.get(tmdb_id=11).actors.count() == 10
+    assert metrics.commits == 1
+    assert [failure['tmdb_id'] for failure in metrics.failures] == [10]
+    assert metrics.report()['failed'] == 1
+
+
+@pytest.mark.django_db
+@patch('Movie_app.api.fetch_movie_details')
+@patch('requests.get')
+def test_failed_details_fetch_is_not_counted_as_imported(mock_get, mock_details, settings):
+    """Тест: фильм, детали которого не загрузились, не записывается и учитывается как ошибка."""
+    settings.TMDB_API_KEY = 'test_api_key'
+    popular = {"results": [
+        {"id": 10, "title": "Movie 10", "genre_ids": [28]},
+        {"id": 11, "title": "Movie 11", "genre_ids": [35]},
+    ]}
+    mock_get.return_value.json.return_value = popular
+    mock_get.return_value.status_code = 200
+    mock_details.side_effect = [None, details_payload(1)]
+
+    metrics = get_popular_movies_from_tmdb()
+
+    assert list(Movie.objects.values_list('tmdb_id', flat=True)) == [11]
+    assert [failure['tmdb_id'] for failure in metrics.failures] == [10]
+    assert metrics.titles == 1
+
+
+@pytest.mark.django_db
+@patch('requests.get')
+def test_write_failure_keeps_previous_title_state(mock_get, settings,
+                                                  django_capture_on_commit_callbacks):
+    """Тест: ошибка записи тайтла при flush не затрагивает его прежние данные и другие тайтлы."""
+    settings.TMDB_API_KEY = 'test_api_key'
+    movie = Movie.objects.create(tmdb_id=10, title="Old title")
+    old_actor = Actor.objects.create(tmdb_id=1, name="Old Actor")
+    movie.actors.add(old_actor)
+    popular = {"results": [
+        {"id": 10, "title": "Movie 10", "genre_ids": [28]},
+        {"id": 11, "title": "Movie 11", "genre_ids": [35]},
+    ]}
+    broken = {**details_payload(), "title": "y" * 1000}
+    mock_get.return_value.json.side_effect = [popular, broken, details_payload(1)]
+    mock_get.return_value.status_code = 200
+
+    with django_capture_on_commit_callbacks(execute=True):
+        metrics = get_popular_movies_from_tmdb(force=True)
+
+    movie.refresh_from_db()
+    assert movie.title == "Old title"
+    assert movie.last_synced_at is None
+    assert list(movie.actors.all()) == [old_actor]
+    assert Movie.objects.get(tmdb_id=11).actors.count() == 10
+    assert [failure['tmdb_id'] for failure in metrics.failures] == [10]
+    assert metrics.titles == 1
+    assert metrics.commits == 1
+
+
+@pytest.mark.django_db
+def test_discard_removes_object_and_links():
+    """Тест удаления объекта и его связей из пакета."""
+    movie = Movie.objects.create(tmdb_id=1, title="First")
+    batch = IngestionBatch()
+    batch.add_genres(movie, [28])
+    batch.add_movie_details(movie, details_payload())
+
+    batch.discard(movie)
+    batch.flush()
+
+    assert len(batch) == 0
+    assert movie.genres.count() == 0
+    assert movie.actors.count() == 0
+
+
+@pytest.mark.django_db
+def test_flush_refreshes_autocomplete_and_facets(django_capture_on_commit_callbacks):
+    """Тест: пакетная запись без сигналов m2m обновляет подсказки и фасетный индекс."""
+    from Movie_app.autocomplete import suggest
+    from Movie_app.facets import get_facet_index
+    movie = Movie.objects.create(tmdb_id=1, title="First", rating=50)
+    assert not suggest("actor", kinds=('actor',))
+    assert not list(get_facet_index().search({'genre': [28]}).pks)
+
+    batch = IngestionBatch()
+    batch.add_genres(movie, [28])
+    batch.add_movie_details(movie, details_payload())
+    with django_capture_on_commit_callbacks(execute=True):
+        batch.flush()
+
+    people = suggest("actor", kinds=('actor',), limit=3)
+    assert [item['label'] for item in people] == ["Actor 0", "Actor 1", "Actor 2"]
+    assert list(get_facet_index().search({'genre': [28]}).pks) == [1]
@@ -0,0 +1,122 @@
+from datetime import date
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app.facets import get_facet_index
+from Movie_app.listing import listing_queryset, prepare_listing
+from Movie_app.models import Director, Genre, Movie, Series
+from Movie_app.summaries import refresh_pending_summaries
+
+
+def create_catalog(size, start=1):
+    genres = [Genre.objects.get_or_create(tmdb_id=gid, name=f"Genre {gid}")[0] for gid in (1, 2, 3)]
+    for tmdb_id in range(start, start + size):
+        if tmdb_id % 2:
+            obj = Series.objects.create(tmdb_id=tmdb_id, title=f"Series {tmdb_id}", rating=50,
+                                        seasons=2, episodes=20, release_date=date(2020, 1, 1))
+        else:
+            obj = Movie.objects.create(tmdb_id=tmdb_id, title=f"Movie {tmdb_id}", rating=70,
+                                       poster_url="https://image.tmdb.org/t/p/w500/x.jpg")
+        obj.genres.add(*genres[:tmdb_id % 3 + 1])
+
+
+def content_list_queries(client, **params):
+    get_facet_index()
+    refresh_pending_summaries()
+    ContentType.objects.clear_cache()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('Movie_app:content_list'), params)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_listing_queryset_reads_subclass_fields_in_one_query(django_assert_num_queries):
+    """Тест чтения полей фильмов и сериалов одним неполиморфным запросом."""
+    create_catalog(6)
+
+    with django_assert_num_queries(1):
+        contents = {content.tmdb_id: content for content in listing_queryset()}
+
+    assert contents[2].rating == 70
+    assert contents[2].poster_url == "https://image.tmdb.org/t/p/w500/x.jpg"
+    assert contents[3].seasons == 2
+    assert contents[2].seasons is None
+
+
+@pytest.mark.django_db
+def test_prepare_listing_sets_type_and_genres(django_assert_max_num_queries):
+    """Тест определения типа по polymorphic_ctype и загрузки жанров."""
+    create_catalog(6)
+    contents = list(listing_queryset().order_by('tmdb_id'))
+
+    with django_assert_max_num_queries(3):
+        contents = prepare_listing(contents)
+
+    assert [content.is_series for content in contents] == [True, False, True, False, True, False]
+    assert contents[1].genre_names == ["Genre 1", "Genre 2", "Genre 3"]
+    assert contents[2].genre_names == ["Genre 1"]
+    assert isinstance(contents[0], Series) and contents[0].seasons == 2
+    assert contents[1] == Movie.objects.get(tmdb_id=2)
+
+
+@pytest.mark.django_db
+def test_content_list_query_budget(client):
+    """Тест постоянного числа запросов списка контента при росте каталога и страницы."""
+    create_catalog(25)
+    small = content_list_queries(client)
+    create_catalog(100, start=26)
+    large = content_list_queries(client)
+    filtered = content_list_queries(client, genres=2)
+
+    assert small == large <= 6
+    assert filtered <= large + 1
+
+
+@pytest.mark.django_db
+def test_content_list_renders_series_fields(client):
+    """Тест вывода сезонов сериала и жанров в списке контента."""
+    create_catalog(2)
+
+    response = client.get(reverse('Movie_app:content_list'))
+
+    html = response.content.decode()
+    assert "Сезонов: 2, Эпизодов: 20" in html
+    assert "Genre 1, Genre 2, Genre 3" in html
+
+
+@pytest.mark.django_db
+def test_genre_detail_paginates_in_database(client, django_assert_max_num_queries):
+    """Тест сортировки и ограничения контента жанра в базе данных."""
+    create_catalog(60)
+    genre = Genre.objects.get(tmdb_id=1)
+    refresh_pending_summaries()
+
+    with django_assert_max_num_queries(8):
+        response = client.get(reverse('Movie_app:genre_detail', kwargs={'tmdb_id': 1}))
+
+    contents = response.context['contents']
+    assert response.context['genre'] == genre
+    assert len(contents) == 20
+    assert [content.rating for content in contents] == [70] * 20
+    next_page = client.get(reverse('Movie_app:genre_detail', kwargs={'tmdb_id': 1})
+                           + response.context['next_page_url'])
+    second = next_page.context['contents']
+    assert second[0].tmdb_id < contents[-1].tmdb_id
+    assert not {content.tmdb_id for content in contents} & {content.tmdb_id for content in second}
+
+
+@pytest.mark.django_db
+def test_director_detail_lists_only_movies(client):
+    """Тест вывода только фильмов на странице режиссёра."""
+    director = Director.objects.create(tmdb_id=7, name="Director")
+    create_catalog(4)
+    for movie in Movie.objects.all():
+        movie.director.add(director)
+
+    response = client.get(reverse('Movie_app:director_detail', kwargs={'tmdb_id': 7}))
+
+    assert [content.tmdb_id for content in response.context['contents']] == [4, 2]
+    assert not response.context['is_paginated']
@@ -0,0 +1,66 @@
+from unittest import mock
+import pytest
+from django.urls import reverse
+from Movie_app.autocomplete import PrefixIndex
+from Movie_app.lookups import PAGE_SIZE
+from Movie_app.models import Actor, Country, Movie
+
+
+@pytest.fixture
+def actors():
+    movie = Movie.objects.create(tmdb_id=1, title="Матрица", rating=87)
+    people = [Actor.objects.create(tmdb_id=tmdb_id, name=f"Актёр {tmdb_id:02d}")
+              for tmdb_id in range(1, PAGE_SIZE + 6)]
+    movie.actors.add(people[-1])
+    return people
+
+
+@pytest.mark.django_db
+def test_lookup_paginates_without_query(client, actors):
+    """Тест постраничного вывода справочника по алфавиту."""
+    url = reverse('Movie_app:lookup', args=['actor'])
+
+    first = client.get(url).json()
+    second = client.get(url, {'page': 2}).json()
+
+    assert [item['id'] for item in first['results']] == list(range(1, PAGE_SIZE + 1))
+    assert first['pagination'] == {'more': True}
+    assert [item['text'] for item in second['results']][0] == f"Актёр {PAGE_SIZE + 1}"
+    assert second['pagination'] == {'more': False}
+
+
+@pytest.mark.django_db
+def test_lookup_ranks_query_matches_by_popularity(client, actors):
+    """Тест поиска по началу слова: сначала актёры с большим числом тайтлов."""
+    response = client.get(reverse('Movie_app:lookup', args=['actor']), {'q': 'актер'})
+
+    results = response.json()['results']
+    assert results[0]['id'] == actors[-1].pk
+    assert len(results) == PAGE_SIZE
+
+
+def test_lookup_first_page_served_from_precomputed_top():
+    """Тест: первая страница справочника с признаком продолжения берётся из index.top."""
+    index = PrefixIndex((ref, f"Актёр {ref}", ref) for ref in range(1000))
+    assert 'актер' in index.top
+
+    with mock.patch.object(index, '_best', side_effect=AssertionError):
+        refs = [ref for ref, _ in index.lookup('актер', PAGE_SIZE + 1)]
+    assert refs == list(range(999, 999 - PAGE_SIZE - 1, -1))
+
+
+@pytest.mark.django_db
+def test_lookup_countries_by_substring(client):
+    """Тест поиска стран в базе данных."""
+    Country.objects.create(iso_code='RU', name='Россия')
+    Country.objects.create(iso_code='US', name='США')
+
+    response = client.get(reverse('Movie_app:lookup', args=['country']), {'q': 'рос'})
+
+    assert response.json()['results'] == [{'id': 'RU', 'text': 'Россия'}]
+
+
+@pytest.mark.django_db
+def test_lookup_unknown_kind_returns_404(client):
+    """Тест неизвестного вида справочника."""
+    assert client.get(reverse('Movie_app:lookup', args=['studio'])).status_code == 404
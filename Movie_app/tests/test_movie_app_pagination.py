@@ -0,0 +1,111 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app.models import Content, Genre, Movie
+from Movie_app.pagination import (InvalidCursor, KeysetPaginator, decode_cursor,
+                                  encode_cursor, estimate_count)
+
+
+@pytest.fixture
+def movies():
+    return [Movie.objects.create(tmdb_id=tmdb_id, title=f"Movie {tmdb_id}", rating=tmdb_id % 4 * 10)
+            for tmdb_id in range(1, 26)]
+
+
+def expected_order():
+    return list(Movie.objects.order_by('-rating', '-tmdb_id').values_list('tmdb_id', flat=True))
+
+
+def test_cursor_roundtrip():
+    """Тест кодирования и декодирования курсора."""
+    cursor = encode_cursor([85, 2001], 3, previous=True)
+    assert decode_cursor(cursor) == ([85, 2001], 3, True)
+
+
+def test_decode_invalid_cursor():
+    """Тест ошибки при некорректном курсоре."""
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.django_db
+def test_paginator_walks_forward_and_back(movies):
+    """Тест обхода страниц вперёд и назад при повторяющихся значениях рейтинга."""
+    paginator = KeysetPaginator(Movie.objects.all(), 10, ('-rating', '-tmdb_id'))
+
+    first = paginator.page()
+    second = paginator.page(first.next_cursor)
+    third = paginator.page(second.next_cursor)
+    seen = [movie.tmdb_id for page in (first, second, third) for movie in page]
+
+    assert seen == expected_order()
+    assert not first.has_previous()
+    assert not third.has_next()
+    assert third.number == 3
+    back = paginator.page(third.previous_cursor)
+    assert [movie.tmdb_id for movie in back] == [movie.tmdb_id for movie in second]
+    assert back.number == 2
+    assert paginator.page(back.previous_cursor).object_list == first.object_list
+
+
+@pytest.mark.django_db
+def test_page_query_has_no_offset_or_count(movies):
+    """Тест выборки страницы без OFFSET и COUNT."""
+    paginator = KeysetPaginator(Movie.objects.all(), 5, ('-rating', '-tmdb_id'))
+    cursor = paginator.page().next_cursor
+
+    with CaptureQueriesContext(connection) as queries:
+        paginator.page(cursor)
+
+    assert len(queries) == 1
+    sql = queries[0]['sql'].upper()
+    assert 'OFFSET' not in sql
+    assert 'COUNT(' not in sql
+
+
+@pytest.mark.django_db
+def test_estimate_count_small_table_is_exact(movies):
+    """Тест точного подсчёта для небольших выборок."""
+    assert estimate_count(Movie.objects.all()) == 25
+    assert estimate_count(Movie.objects.filter(rating=10)) == 7
+
+
+@pytest.mark.django_db
+class TestKeysetListViews:
+    def test_movie_list_next_page_by_cursor(self, client, movies):
+        response = client.get(reverse('Movie_app:movie_list'))
+        assert response.context['paginator'].count == 25
+        next_url = response.context['next_page_url']
+
+        response = client.get(reverse('Movie_app:movie_list') + next_url)
+
+        assert [movie.tmdb_id for movie in response.context['movies']] == expected_order()[20:]
+        assert response.context['page_obj'].number == 2
+        assert response.context['previous_page_url'].startswith('?cursor=')
+
+    def test_cursor_url_keeps_filters(self, client, movies):
+        genre = Genre.objects.create(tmdb_id=28, name="Action")
+        for movie in movies:
+            movie.genres.add(genre)
+
+        response = client.get(reverse('Movie_app:movie_list'), {'genres': 28})
+
+        assert 'genres=28' in response.context['next_page_url']
+
+    def test_page_parameter_uses_offset_pagination(self, client, movies):
+        response = client.get(reverse('Movie_app:movie_list'), {'page': 2})
+        assert response.context['page_obj'].number == 2
+        assert response.context['previous_page_url'] == '?page=1'
+
+    def test_invalid_cursor_returns_404(self, client):
+        response = client.get(reverse('Movie_app:content_list'), {'cursor': '!!!'})
+        assert response.status_code == 404
+        response = client.get(reverse('Movie_app:movie_list'), {'cursor': '!!!'})
+        assert response.status_code == 404
+
+    def test_content_list_ordered_by_tmdb_id(self, client, movies):
+        response = client.get(reverse('Movie_app:content_list'))
+        ids = [content.tmdb_id for content in response.context['contents']]
+        assert ids == list(Content.objects.order_by('-tmdb_id')
+                           .values_list('tmdb_id', flat=True))[:20]
@@ -0,0 +1,108 @@
+import pytest
+from django.core.management import call_command
+from django.template import Context, Template
+from Movie_app.models import Movie
+from Movie_app.posters import PosterCache, get_poster_cache, local_poster_urls, \
+    poster_path_from_url
+from Movie_app.tmdb_stub import TMDBStubServer
+
+
+@pytest.fixture
+def image_stub(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.POSTER_CACHE_DIR = str(tmp_path / 'posters')
+    settings.POSTER_CACHE_MAX_BYTES = 1024 * 1024
+    with TMDBStubServer() as stub:
+        stub.add_poster('/first.jpg')
+        stub.add_poster('/second.jpg')
+        settings.POSTER_IMAGE_BASE_URL = f"{stub.base_url}/t/p"
+        yield stub
+
+
+def test_poster_path_from_url():
+    """Тест извлечения пути постера TMDB из poster_url."""
+    assert poster_path_from_url("https://image.tmdb.org/t/p/w500/abc.jpg") == "/abc.jpg"
+    assert poster_path_from_url("https://via.placeholder.com/500x750?text=No+Image") is None
+    assert poster_path_from_url("") is None
+
+
+@pytest.mark.django_db
+def test_fetch_many_deduplicates_posters(image_stub):
+    """Тест однократной загрузки постера, встречающегося несколько раз."""
+    cache = get_poster_cache()
+    urls = ["https://image.tmdb.org/t/p/w500/first.jpg"] * 3 + \
+        ["https://image.tmdb.org/t/p/w500/second.jpg", "https://example.com/other.jpg"]
+
+    assert cache.fetch_many(urls, workers=4) == 2
+    assert cache.stats['downloaded'] == 6
+    assert len(image_stub.requests) == 6
+    assert cache.path('/first.jpg', 'w92').read_bytes().startswith(b'\xff\xd8')
+
+    get_poster_cache().fetch_many(urls)
+    assert len(image_stub.requests) == 6
+
+
+def test_missing_poster_counted_as_failed(image_stub):
+    """Тест учёта постера, отсутствующего на сервере изображений."""
+    cache = get_poster_cache()
+    assert cache.fetch('/missing.jpg') is False
+    assert cache.stats['failed'] == 3
+
+
+def test_partially_available_poster_is_not_written(image_stub):
+    """Тест: постер записывается только во всех размерах сразу."""
+    image_stub.add_poster('/partial.jpg', sizes=('w92', 'w185'))
+    cache = get_poster_cache()
+
+    assert cache.fetch('/partial.jpg') is False
+    assert not cache.path('/partial.jpg', 'w92').exists()
+    assert not local_poster_urls("https://image.tmdb.org/t/p/w500/partial.jpg")
+
+
+def test_evict_keeps_cache_under_limit(tmp_path):
+    """Тест удаления давно не использованных постеров при превышении лимита."""
+    cache = PosterCache(tmp_path, 'http://unused', max_bytes=1000)
+    for index in range(20):
+        path = cache.path(f'/{index:02d}.jpg', 'w92')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x' * 100)
+
+    cache.evict()
+
+    assert cache.size() <= 900
+    assert cache.stats['evictions'] == 11
+
+
+def test_poster_img_uses_local_srcset(image_stub):
+    """Тест вывода локальных копий постера через srcset."""
+    movie = Movie(tmdb_id=1, title="Фильм", poster_url="https://image.tmdb.org/t/p/w500/first.jpg")
+    template = Template("{% load posters %}{% poster_img movie %}")
+
+    html = template.render(Context({'movie': movie}))
+    assert 'src="https://image.tmdb.org/t/p/w500/first.jpg"' in html
+    assert 'srcset' not in html
+
+    get_poster_cache().fetch('/first.jpg')
+    html = template.render(Context({'movie': movie}))
+    assert 'src="/media/posters/w185/first.jpg"' in html
+    assert '/media/posters/w92/first.jpg 92w' in html
+    assert set(local_poster_urls(movie.poster_url)) == {'w92', 'w185', 'w342'}
+
+
+@pytest.mark.django_db
+def test_fetch_posters_command(image_stub, capsys):
+    """Тест загрузки постеров командой fetch_posters."""
+    base_url = "https://image.tmdb.org/t/p/w500"
+    Movie.objects.create(tmdb_id=1, title="A", poster_url=f"{base_url}/first.jpg")
+    Movie.objects.create(tmdb_id=2, title="B", poster_url=f"{base_url}/first.jpg")
+    Movie.objects.create(tmdb_id=3, title="C", poster_url=f"{base_url}/second.jpg")
+    Movie.objects.create(tmdb_id=4, title="D", poster_url=f"{base_url}/missing.jpg")
+    before = dict(Movie.objects.values_list('pk', 'updated_at'))
+
+    call_command('fetch_posters', '--workers', '2')
+
+    assert 'Processed 3 posters: 6 downloaded' in capsys.readouterr().out
+    assert get_poster_cache().path('/second.jpg', 'w342').exists()
+    touched = {pk for pk, updated_at in Movie.objects.values_list('pk', 'updated_at')
+               if updated_at != before[pk]}
+    assert touched == {1, 2, 3}
@@ -0,0 +1,137 @@
+import importlib.util
+import json
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app.catalog import CatalogLoader
+from Movie_app.models import Genre, Movie
+from Movie_app.response_cache import STATS_KEY_PREFIX, catalog_version, response_cache, \
+    response_cache_stats
+
+
+@pytest.fixture
+def movie():
+    return Movie.objects.create(tmdb_id=1, title="Первый фильм", rating=80)
+
+
+@pytest.mark.django_db
+def test_repeated_anonymous_request_is_served_from_cache(client, movie):
+    """Тест повторного запроса: ответ отдаётся из кэша без запросов к базе данных."""
+    url = reverse('Movie_app:movie_list')
+    first = client.get(url, {'rating': 50})
+
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(url, {'rating': 50})
+
+    assert first['X-Cache'] == 'MISS'
+    assert second['X-Cache'] == 'HIT'
+    assert second.content == first.content
+    assert len(queries) == 0
+    assert client.get(url, {'rating': 60})['X-Cache'] == 'MISS'
+
+
+@pytest.mark.django_db
+def test_content_change_invalidates_cached_pages(client, movie):
+    """Тест сброса: изменение контента и его связей увеличивает версию каталога."""
+    url = reverse('Movie_app:content_detail', args=[movie.tmdb_id])
+    client.get(url)
+    version = catalog_version()
+
+    movie.title = "Новое название"
+    movie.save()
+    response = client.get(url)
+    assert catalog_version() > version
+    assert response['X-Cache'] == 'MISS'
+    assert "Новое название" in response.content.decode()
+
+    version = catalog_version()
+    movie.genres.add(Genre.objects.create(tmdb_id=18, name="Драма"))
+    assert catalog_version() > version
+    assert "Драма" in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_catalog_batch_invalidates_cached_pages(django_capture_on_commit_callbacks):
+    """Тест сброса после записи пакета загрузчиком каталога."""
+    version = catalog_version()
+    loader = CatalogLoader()
+    loader.add({'id': 7, 'title': "Из дампа", 'vote_average': 7.0})
+    with django_capture_on_commit_callbacks(execute=True):
+        loader.flush()
+
+    assert catalog_version() > version
+
+
+@pytest.mark.django_db
+def test_authenticated_requests_bypass_cache(client, movie):
+    """Тест: страницы вошедших пользователей не кэшируются и не отдаются из кэша."""
+    url = reverse('Movie_app:movie_list')
+    client.get(url)
+    client.force_login(User.objects.create_user(username='viewer', password='secret'))
+
+    response = client.get(url)
+
+    assert 'X-Cache' not in response
+    assert 'csrfmiddlewaretoken' in response.content.decode()
+    assert response_cache_stats()['movie_list'] == {'hits': 0, 'misses': 1, 'bypassed': 1,
+                                                    'hit_rate': 0.0}
+
+
+@pytest.mark.django_db
+def test_timeout_override_disables_view_cache(client, settings, movie):
+    """Тест переопределения времени жизни: 0 отключает кэш представления."""
+    settings.RESPONSE_CACHE_TIMEOUTS = {'series_list': 0}
+
+    client.get(reverse('Movie_app:series_list'))
+    client.get(reverse('Movie_app:series_list'))
+    client.get(reverse('Movie_app:movie_list'))
+    client.get(reverse('Movie_app:movie_list'))
+
+    stats = response_cache_stats()
+    assert stats['series_list']['bypassed'] == 2
+    assert stats['movie_list']['hits'] == 1
+    assert stats['movie_list']['hit_rate'] == 0.5
+
+
+@pytest.mark.django_db
+def test_response_cache_command_invalidates(client, movie, capsys):
+    """Тест команды response_cache: сброс кэша и вывод метрик."""
+    url = reverse('Movie_app:home')
+    client.get(url)
+    version = catalog_version()
+
+    call_command('response_cache', '--invalidate')
+
+    report = json.loads(capsys.readouterr().out.split('\n', 1)[1])
+    assert report['catalog_version'] == version + 1
+    assert report['views']['home']['misses'] == 1
+    assert client.get(url)['X-Cache'] == 'MISS'
+
+
+def test_default_backend_is_shared_between_processes(monkeypatch):
+    """Тест настроек: без RESPONSE_CACHE_BACKEND кэш ответов хранится в файлах, а не в locmem."""
+    monkeypatch.delenv('RESPONSE_CACHE_BACKEND', raising=False)
+    spec = importlib.util.find_spec('config.settings')
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+
+    for alias in ('responses', 'template_fragments'):
+        assert config.CACHES[alias]['BACKEND'].endswith('FileBasedCache')
+    assert config.CACHES['responses']['LOCATION'] != config.CACHES['template_fragments']['LOCATION']
+
+
+@pytest.mark.django_db
+def test_metrics_are_buffered_in_process(client, movie, settings):
+    """Тест: запросы не пишут счётчики в хранилище, они переносятся раз в интервал."""
+    settings.RESPONSE_CACHE_STATS_FLUSH_INTERVAL = 60
+    url = reverse('Movie_app:movie_list')
+    client.get(url)
+    client.get(url)
+    client.get(url)
+
+    assert response_cache().get(f"{STATS_KEY_PREFIX}:movie_list:hits") is None
+    assert response_cache_stats()['movie_list']['hits'] == 2
+    assert response_cache().get(f"{STATS_KEY_PREFIX}:movie_list:hits") == 2
@@ -0,0 +1,153 @@
+import importlib
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from Movie_app import search
+from Movie_app.models import Actor, Director, Genre, Movie, SearchDocument, Series
+
+
+@pytest.fixture
+def search_catalog():
+    genre = Genre.objects.create(tmdb_id=1, name="Фантастика")
+    matrix = Movie.objects.create(tmdb_id=1, title="Матрица", rating=87,
+                                  description="Хакер узнаёт правду о мире.")
+    matrix.genres.add(genre)
+    matrix.actors.add(Actor.objects.create(tmdb_id=1, name="Киану Ривз"))
+    matrix.director.add(Director.objects.create(tmdb_id=1, name="Лана Вачовски"))
+    documentary = Movie.objects.create(tmdb_id=2, title="Как снимали фильм", rating=95,
+                                       description="Документальный фильм о создании Матрицы.")
+    series = Series.objects.create(tmdb_id=3, title="Тёмные материи", rating=70,
+                                   description="Девочка путешествует между мирами.")
+    series.genres.add(genre)
+    search.refresh_search_documents([1, 2, 3])
+    return matrix, documentary, series
+
+
+@pytest.mark.django_db
+def test_refresh_search_documents_collects_names(search_catalog):
+    """Тест заполнения поискового документа именами связанных сущностей."""
+    document = SearchDocument.objects.get(pk=1)
+
+    assert document.title == "Матрица"
+    assert document.rating == 87
+    assert "Киану Ривз" in document.names
+    assert "Лана Вачовски" in document.names
+    assert document.search_vector is not None
+
+
+@pytest.mark.django_db
+def test_search_documents_ranks_title_above_description(search_catalog):
+    """Тест ранжирования: совпадение в названии важнее совпадения в описании."""
+    pks = list(search.search_documents("матрицы").values_list('pk', flat=True))
+
+    assert pks[:2] == [1, 2]
+
+
+@pytest.mark.django_db
+def test_search_documents_finds_people_and_genres(search_catalog):
+    """Тест поиска по именам актёров и названиям жанров."""
+    assert list(search.search_documents("Ривз").values_list('pk', flat=True)) == [1]
+    assert set(search.search_documents("фантастика").values_list('pk', flat=True)) == {1, 3}
+
+
+@pytest.mark.django_db
+def test_search_documents_tolerates_typos(search_catalog):
+    """Тест поиска названия с опечаткой через pg_trgm."""
+    if not search.trigram_available():
+        pytest.skip("Расширение pg_trgm не установлено")
+
+    assert 1 in search.search_documents("Матрца").values_list('pk', flat=True)
+
+
+@pytest.mark.django_db
+def test_search_document_refreshed_after_commit(django_capture_on_commit_callbacks):
+    """Тест обновления поискового документа после сохранения фильма."""
+    with django_capture_on_commit_callbacks(execute=True):
+        movie = Movie.objects.create(tmdb_id=10, title="Начало", rating=80)
+    assert SearchDocument.objects.get(pk=10).title == "Начало"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        movie.title = "Начало (2010)"
+        movie.save()
+    assert SearchDocument.objects.get(pk=10).title == "Начало (2010)"
+
+
+@pytest.mark.django_db
+def test_search_documents_follow_renames_and_links(search_catalog,
+                                                   django_capture_on_commit_callbacks):
+    """Тест: переименование сущности и изменение связей обновляют поисковые документы."""
+    matrix, documentary, _ = search_catalog
+    with django_capture_on_commit_callbacks(execute=True):
+        actor = Actor.objects.get(pk=1)
+        actor.name = "Кэрри-Энн Мосс"
+        actor.save()
+    assert "Кэрри-Энн Мосс" in SearchDocument.objects.get(pk=1).names
+
+    with patch('Movie_app.search.schedule_refresh') as schedule_refresh:
+        actor.save()
+    schedule_refresh.assert_not_called()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        documentary.actors.add(actor)
+        matrix.genres.clear()
+    assert "Кэрри-Энн Мосс" in SearchDocument.objects.get(pk=2).names
+    assert "Фантастика" not in SearchDocument.objects.get(pk=1).names
+
+
+@pytest.mark.django_db
+def test_migration_backfills_existing_content(search_catalog):
+    """Тест миграции поисковых документов: уже загруженный контент сразу находится."""
+    expected = {document.pk: document.names for document in SearchDocument.objects.all()}
+    SearchDocument.objects.all().delete()
+
+    migration = importlib.import_module('Movie_app.migrations.0005_searchdocument')
+    migration.backfill_search_documents(apps, SimpleNamespace(connection=connection))
+
+    assert {document.pk: document.names for document in SearchDocument.objects.all()} \
+        == expected
+    assert list(search.search_documents("Ривз").values_list('pk', flat=True)) == [1]
+
+
+@pytest.mark.django_db
+def test_refresh_search_documents_query_count(django_assert_max_num_queries):
+    """Тест пакетного обновления фиксированным числом запросов."""
+    for tmdb_id in range(1, 41):
+        Movie.objects.create(tmdb_id=tmdb_id, title=f"Фильм {tmdb_id}", rating=50)
+
+    with django_assert_max_num_queries(10):
+        assert search.refresh_search_documents(range(1, 41)) == 40
+
+
+@pytest.mark.django_db
+def test_update_search_documents_command():
+    """Тест полной перестройки поисковых документов командой."""
+    for tmdb_id in range(1, 6):
+        Movie.objects.create(tmdb_id=tmdb_id, title=f"Фильм {tmdb_id}", rating=50)
+
+    call_command('update_search_documents', '--batch-size', '2')
+
+    assert SearchDocument.objects.count() == 5
+
+
+@pytest.mark.django_db
+def test_content_search_view_paginates_ranked_results(client):
+    """Тест постраничного вывода результатов поиска в порядке релевантности."""
+    for tmdb_id in range(1, 26):
+        Movie.objects.create(tmdb_id=tmdb_id, title=f"Звёздный путь {tmdb_id}",
+                             rating=tmdb_id)
+    search.refresh_search_documents(range(1, 26))
+
+    response = client.get(reverse('Movie_app:search_results'), {'query': 'звёздный'})
+
+    assert response.status_code == 200
+    results = response.context['results']
+    assert len(results) == search.RESULTS_PER_PAGE
+    assert results[0].tmdb_id == 25
+    assert response.context['next_page_url'].endswith("&page=2")
+
+    response = client.get(reverse('Movie_app:search_results'), {'query': 'звёздный', 'page': 2})
+    assert len(response.context['results']) == 5
@@ -0,0 +1,122 @@
+from unittest.mock import patch
+import numpy as np
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from Movie_app import search_index
+from Movie_app.models import Actor, Genre, Movie, Series
+
+
+@pytest.fixture
+def bm25_settings(settings, tmp_path):
+    settings.CONTENT_SEARCH_BACKEND = 'bm25'
+    settings.SEARCH_INDEX_PATH = str(tmp_path / 'search_index')
+    return settings
+
+
+@pytest.fixture
+def indexed_catalog(bm25_settings):
+    genre = Genre.objects.create(tmdb_id=1, name="Фантастика")
+    matrix = Movie.objects.create(tmdb_id=1, title="Матрица", rating=87,
+                                  description="Хакер узнаёт правду о мире.")
+    matrix.genres.add(genre)
+    matrix.actors.add(Actor.objects.create(tmdb_id=1, name="Киану Ривз"))
+    Movie.objects.create(tmdb_id=2, title="Как снимали фильм", rating=95,
+                         description="Документальный фильм о создании фильма Матрица.")
+    series = Series.objects.create(tmdb_id=3, title="Тёмные материи", rating=70,
+                                   description="Девочка путешествует между мирами.")
+    series.genres.add(genre)
+    search_index.build_search_index()
+    return search_index.get_search_index()
+
+
+def test_tokenize_normalizes_words():
+    """Тест нормализации слов: нижний регистр, ё → е, без однобуквенных слов."""
+    assert search_index.tokenize("Тёмные Материи: и Пыль") == ["темные", "материи", "пыль"]
+
+
+@pytest.mark.django_db
+def test_build_search_index_writes_mmap_artifact(indexed_catalog):
+    """Тест сохранения индекса в файлы, открываемые через mmap."""
+    assert indexed_catalog.meta['documents'] == 3
+    assert isinstance(indexed_catalog.arrays['postings_doc'], np.memmap)
+    assert list(indexed_catalog.arrays['doc_ids']) == [1, 2, 3]
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_above_description(indexed_catalog):
+    """Тест ранжирования BM25: совпадение в названии важнее совпадения в описании."""
+    assert indexed_catalog.search("матрица") == [1, 2]
+    assert indexed_catalog.search("ривз") == [1]
+    assert set(indexed_catalog.search("фантастика")) == {1, 3}
+    assert indexed_catalog.search("несуществующее") == []
+
+
+@pytest.mark.django_db
+def test_search_index_updated_after_commit(indexed_catalog, django_capture_on_commit_callbacks):
+    """Тест учёта сохранённого и удалённого контента до перестройки индекса."""
+    with django_capture_on_commit_callbacks(execute=True):
+        Movie.objects.create(tmdb_id=4, title="Матрица: Перезагрузка", rating=72)
+        matrix = Movie.objects.get(tmdb_id=1)
+        matrix.title = "The Matrix"
+        matrix.save()
+    assert indexed_catalog.search("матрица") == [4, 2]
+    assert indexed_catalog.search("matrix") == [1]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Movie.objects.get(tmdb_id=2).delete()
+    assert indexed_catalog.search("матрица") == [4]
+
+
+@pytest.mark.django_db
+def test_delta_view_computed_once_per_journal_read(indexed_catalog,
+                                                   django_capture_on_commit_callbacks):
+    """Тест: замещённые документы и частоты журнала считаются при чтении журнала, а не в поиске."""
+    with django_capture_on_commit_callbacks(execute=True):
+        matrix = Movie.objects.get(tmdb_id=1)
+        matrix.title = "Матрица Матрица"
+        matrix.save()
+
+    with patch.object(indexed_catalog, '_delta_view',
+                      wraps=indexed_catalog._delta_view) as delta_view:
+        assert indexed_catalog.search("матрица") == [1, 2]
+        assert indexed_catalog.search("матрица ривз") == [1, 2]
+    assert delta_view.call_count == 1
+    assert list(indexed_catalog.view.overridden) == [pk in indexed_catalog.delta
+                                                     for pk in (1, 2, 3)]
+    assert indexed_catalog.view.documents == 3
+
+
+@pytest.mark.django_db
+def test_rebuild_compacts_delta_and_reloads(indexed_catalog, django_capture_on_commit_callbacks):
+    """Тест перестройки индекса командой: журнал переносится в основной индекс."""
+    with django_capture_on_commit_callbacks(execute=True):
+        Movie.objects.create(tmdb_id=4, title="Матрица: Перезагрузка", rating=72)
+
+    call_command('build_search_index')
+    index = search_index.get_search_index()
+
+    assert index is not indexed_catalog
+    assert index.meta['documents'] == 4
+    assert index.search("перезагрузка") == [4]
+    index.load_delta()
+    assert not index.delta
+
+
+@pytest.mark.django_db
+def test_content_search_view_uses_bm25_backend(indexed_catalog, client):
+    """Тест выдачи результатов BM25 через представление поиска."""
+    response = client.get(reverse('Movie_app:search_results'), {'query': 'матрица'})
+
+    assert response.status_code == 200
+    assert [content.tmdb_id for content in response.context['results']] == [1, 2]
+
+
+@pytest.mark.django_db
+def test_content_search_without_index_falls_back_to_icontains(bm25_settings, client):
+    """Тест поиска через icontains, если индекс ещё не построен."""
+    Movie.objects.create(tmdb_id=1, title="Матрица", rating=87)
+
+    response = client.get(reverse('Movie_app:search_results'), {'query': 'Матр'})
+
+    assert [content.tmdb_id for content in response.context['results']] == [1]
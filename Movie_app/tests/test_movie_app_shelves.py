@@ -0,0 +1,100 @@
+from datetime import date
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app.models import Genre, Movie, Series
+from Movie_app.shelves import SHELF_SIZE, build_shelves, get_shelves
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def create_catalog(size, start=1):
+    drama = Genre.objects.get_or_create(tmdb_id=18, name="Драма")[0]
+    comedy = Genre.objects.get_or_create(tmdb_id=35, name="Комедия")[0]
+    for tmdb_id in range(start, start + size):
+        model = Series if tmdb_id % 3 == 0 else Movie
+        obj = model.objects.create(tmdb_id=tmdb_id, title=f"Title {tmdb_id}",
+                                   rating=tmdb_id % 100,
+                                   release_date=date(2000 + tmdb_id % 20, 1, 1))
+        obj.genres.add(drama if tmdb_id % 2 else comedy)
+
+
+def home_queries(client):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('home'))
+    assert response.status_code == 200
+    return len(queries), len(response.content)
+
+
+@pytest.mark.django_db
+def test_shelves_are_bounded():
+    """Тест ограничения размера полок и их порядка."""
+    create_catalog(40)
+
+    shelves = {shelf['key']: shelf for shelf in build_shelves()}
+
+    assert set(shelves) == {'top_rated', 'newest', 'genre_18', 'genre_35'}
+    top = [content.rating for content in shelves['top_rated']['contents']]
+    assert len(top) == SHELF_SIZE
+    assert top == sorted(top, reverse=True)
+    assert top[0] == 40
+    assert any(content.is_series for content in shelves['top_rated']['contents'])
+
+
+@pytest.mark.django_db
+def test_home_query_count_does_not_grow_with_catalog(client):
+    """Тест постоянного числа запросов и размера главной страницы."""
+    create_catalog(30)
+    small_queries, small_size = home_queries(client)
+    create_catalog(90, start=31)
+    large_queries, large_size = home_queries(client)
+
+    assert large_queries == small_queries
+    assert abs(large_size - small_size) < small_size * 0.05
+
+
+@pytest.mark.django_db
+def test_shelves_served_from_cache(client, django_assert_num_queries):
+    """Тест выдачи полок из кэша без запросов к базе."""
+    create_catalog(10)
+    get_shelves()
+
+    with django_assert_num_queries(0):
+        shelves = get_shelves()
+    assert shelves
+
+
+@pytest.mark.django_db
+def test_shelves_invalidated_on_content_change(django_capture_on_commit_callbacks):
+    """Тест сброса кэша полок после изменения контента."""
+    create_catalog(5)
+    get_shelves()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Movie.objects.create(tmdb_id=500, title="Новый фильм", rating=99)
+
+    top = get_shelves()[0]['contents']
+    assert top[0].tmdb_id == 500
+
+
+@pytest.mark.django_db
+def test_home_filtered_view_is_paginated(client):
+    """Тест постраничного вывода отфильтрованного контента на главной странице."""
+    create_catalog(50)
+
+    response = client.get(reverse('home'), {'genres': 18})
+
+    assert response.context['is_filtered']
+    assert 'shelves' not in response.context
+    contents = list(response.context['contents'])
+    assert len(contents) == 20
+    assert all("Драма" in content.genre_names for content in contents)
+    assert 'genres=18' in response.context['next_page_url']
@@ -0,0 +1,135 @@
+import importlib
+from datetime import date
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from Movie_app import summaries
+from Movie_app.catalog import CatalogLoader
+from Movie_app.models import Actor, ContentSummary, Country, Director, Genre, Movie, Series
+
+
+@pytest.fixture
+def summary_catalog(settings):
+    settings.CONTENT_SUMMARY_ACTORS = 2
+    drama = Genre.objects.create(tmdb_id=18, name="Драма")
+    comedy = Genre.objects.create(tmdb_id=35, name="Комедия")
+    movie = Movie.objects.create(tmdb_id=1, title="Фильм", rating=80,
+                                 release_date=date(2020, 5, 1),
+                                 poster_url="https://image.tmdb.org/t/p/w500/1.jpg")
+    movie.genres.add(drama, comedy)
+    for tmdb_id, name in ((3, "Третий"), (1, "Первый"), (2, "Второй")):
+        movie.actors.add(Actor.objects.create(tmdb_id=tmdb_id, name=name))
+    movie.director.add(Director.objects.create(tmdb_id=1, name="Режиссёр"))
+    movie.created_in.add(Country.objects.create(iso_code="US", name="США"))
+    series = Series.objects.create(tmdb_id=2, title="Сериал", rating=60, seasons=3, episodes=30)
+    series.genres.add(drama)
+    return movie
+
+
+@pytest.mark.django_db
+def test_summary_contains_card_fields(summary_catalog):
+    """Тест построения карточки: тип, жанры, первые актёры, режиссёр и страны."""
+    summaries.refresh_summaries([1, 2])
+
+    movie = ContentSummary.objects.get(pk=1)
+    assert movie.kind == ContentSummary.MOVIE and not movie.is_series
+    assert movie.tmdb_id == 1
+    assert movie.release_date == date(2020, 5, 1)
+    assert movie.genre_ids == [18, 35]
+    assert movie.genre_names == ["Драма", "Комедия"]
+    assert movie.actor_names == ["Третий", "Первый"]
+    assert movie.director_name == "Режиссёр"
+    assert movie.country_names == ["США"]
+    assert movie.updated_at == Movie.objects.get(pk=1).updated_at
+    series = ContentSummary.objects.get(pk=2)
+    assert series.is_series and (series.seasons, series.episodes) == (3, 30)
+
+
+@pytest.mark.django_db
+def test_refresh_summaries_query_count(django_assert_max_num_queries):
+    """Тест постоянного числа запросов пересчёта карточек."""
+    genre = Genre.objects.create(tmdb_id=1, name="Жанр")
+    for tmdb_id in range(1, 41):
+        model = Series if tmdb_id % 2 else Movie
+        model.objects.create(tmdb_id=tmdb_id, title=f"Тайтл {tmdb_id}", rating=50).genres.add(genre)
+
+    with django_assert_max_num_queries(9):
+        assert summaries.refresh_summaries(range(1, 41)) == 40
+
+
+@pytest.mark.django_db
+def test_summaries_follow_signals(summary_catalog):
+    """Тест: изменения контента, связей и сущностей попадают в карточки до чтения."""
+    summary_catalog.title = "Новое название"
+    summary_catalog.save()
+    Genre.objects.filter(pk=35).get().movie_set.clear()
+    director = Director.objects.get(pk=1)
+    director.name = "Другой режиссёр"
+    director.save()
+
+    movie = summaries.summary_queryset().get(pk=1)
+    assert movie.title == "Новое название"
+    assert movie.genre_names == ["Драма"]
+    assert movie.director_name == "Другой режиссёр"
+
+    Genre.objects.get(pk=18).delete()
+    Series.objects.get(pk=2).delete()
+    assert list(summaries.summary_queryset().values_list('pk', 'genre_ids')) == [(1, [])]
+
+
+@pytest.mark.django_db
+def test_catalog_batch_refreshes_summaries(django_capture_on_commit_callbacks):
+    """Тест пересчёта карточек после фиксации пакета загрузчика каталога."""
+    loader = CatalogLoader()
+    loader.add({'id': 7, 'title': "Из дампа", 'vote_average': 7.0,
+                'genres': [{'id': 18, 'name': "Драма"}]})
+    with django_capture_on_commit_callbacks(execute=True):
+        loader.flush()
+
+    summary = ContentSummary.objects.get(pk=7)
+    assert summary.title == "Из дампа"
+    assert summary.genre_names == ["Драма"]
+
+
+@pytest.mark.django_db
+def test_rebuild_command_and_entity_page_reads_one_table(client, settings, summary_catalog,
+                                                        capsys):
+    """Тест команды перестройки и чтения страницы жанра одним запросом к карточкам."""
+    settings.RESPONSE_CACHE_ENABLED = False
+    summaries.clear_pending_summaries()
+
+    call_command('rebuild_content_summaries', '--batch-size', '1')
+    assert "Rebuilt 2 content summaries." in capsys.readouterr().out
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('Movie_app:genre_detail', kwargs={'tmdb_id': 18}))
+    assert [content.tmdb_id for content in response.context['contents']] == [1, 2]
+    listing = [query['sql'] for query in queries
+               if 'LIMIT 21' in query['sql'] and 'contentsummary' in query['sql']]
+    assert len(listing) == 1
+    if connection.vendor == 'postgresql':
+        assert '"Movie_app_contentsummary"."genre_ids" @>' in listing[0]
+    else:
+        assert '"Movie_app_movie_genres"' in listing[0]
+    assert 'JOIN' not in listing[0]
+
+
+@pytest.mark.django_db
+def test_migration_backfills_existing_content(summary_catalog):
+    """
+    Тест миграции карточек: уже загруженный контент получает те же карточки,
+    что и при пересчёте.
+    """
+    summaries.refresh_summaries([1, 2])
+    expected = {summary.pk: [getattr(summary, field) for field in summaries.SUMMARY_FIELDS]
+                for summary in ContentSummary.objects.all()}
+    ContentSummary.objects.all().delete()
+
+    migration = importlib.import_module('Movie_app.migrations.0008_contentsummary')
+    migration.backfill_summaries(apps, None)
+
+    assert {summary.pk: [getattr(summary, field) for field in summaries.SUMMARY_FIELDS]
+            for summary in ContentSummary.objects.all()} == expected
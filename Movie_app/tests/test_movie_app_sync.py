@@ -0,0 +1,109 @@
+from datetime import timedelta
+from unittest.mock import patch
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from Movie_app.api import TMDBClientError
+from Movie_app.models import Movie, Series, SyncState
+from Movie_app.sync import sync_changes
+from Movie_app.tmdb_stub import TMDBStubServer, RECORDINGS_DIR
+
+
+@pytest.fixture
+def tmdb_stub(settings):
+    settings.TMDB_API_KEY = 'test_api_key'
+    with TMDBStubServer(recordings_dir=RECORDINGS_DIR) as stub:
+        settings.TMDB_BASE_URL = stub.base_url
+        yield stub
+
+
+@pytest.fixture
+def local_content():
+    movie = Movie.objects.create(tmdb_id=550, title="Fight Club")
+    other = Movie.objects.create(tmdb_id=680, title="Pulp Fiction")
+    series = Series.objects.create(tmdb_id=1399, title="Game of Thrones")
+    return movie, other, series
+
+
+@pytest.mark.django_db
+def test_sync_changes_refreshes_only_local_titles(tmdb_stub, local_content):
+    """Тест обновления только тех изменившихся фильмов, которые есть в базе."""
+    updated = sync_changes('movie')
+
+    assert updated == 2
+    movie = Movie.objects.get(tmdb_id=550)
+    assert movie.title == "Бойцовский клуб"
+    assert movie.director.get().name == "David Fincher"
+    assert not Movie.objects.filter(tmdb_id=999001).exists()
+    assert ('/movie/999001', {'api_key': 'test_api_key', 'language': 'ru-RU',
+                              'append_to_response': 'credits'}) not in tmdb_stub.requests
+
+
+@pytest.mark.django_db
+def test_sync_changes_persists_watermark(tmdb_stub, local_content):
+    """Тест сохранения отметки синхронизации."""
+    until = timezone.now()
+
+    sync_changes('tv', until=until)
+
+    state = SyncState.objects.get(key='tmdb_changes:tv')
+    assert state.watermark == until
+    assert state.page == 0
+    assert Series.objects.get(tmdb_id=1399).seasons == 8
+
+
+@pytest.mark.django_db
+def test_sync_changes_starts_from_watermark(tmdb_stub, local_content):
+    """Тест чтения ленты изменений начиная с сохранённой отметки."""
+    until = timezone.now()
+    SyncState.objects.create(key='tmdb_changes:movie', watermark=until - timedelta(days=3))
+
+    sync_changes('movie', until=until)
+
+    start_dates = {query['start_date'] for path, query in tmdb_stub.requests
+                   if path == '/movie/changes'}
+    assert start_dates == {(until - timedelta(days=3)).date().isoformat()}
+
+
+@pytest.mark.django_db
+def test_sync_changes_keeps_page_progress_on_failure(tmdb_stub, local_content):
+    """Тест сохранения прогресса после успешной страницы при ошибке следующей."""
+    tmdb_stub.add_route('/movie/changes', {'status_message': 'error'},
+                        params={'page': 2}, status=500)
+    with pytest.raises(TMDBClientError):
+        sync_changes('movie')
+
+    state = SyncState.objects.get(key='tmdb_changes:movie')
+    assert state.page == 1
+    assert Movie.objects.get(tmdb_id=550).title == "Бойцовский клуб"
+    assert Movie.objects.get(tmdb_id=680).title == "Pulp Fiction"
+
+
+@pytest.mark.django_db
+def test_sync_changes_retries_failed_details(tmdb_stub, local_content, settings):
+    """Тест: тайтл с ошибкой загрузки деталей не считается обновлённым и повторяется."""
+    settings.TMDB_MAX_RETRIES = 0
+    tmdb_stub.add_route('/movie/680', {'status_message': 'error'}, status=503)
+    until = timezone.now()
+
+    assert sync_changes('movie', until=until) == 1
+    state = SyncState.objects.get(key='tmdb_changes:movie')
+    assert state.failed_ids == [680]
+    assert state.page == 0
+    assert Movie.objects.get(tmdb_id=680).title == "Pulp Fiction"
+
+    tmdb_stub.routes['/movie/680'].pop()
+    assert sync_changes('movie', until=until) == 1
+    assert SyncState.objects.get(key='tmdb_changes:movie').failed_ids == []
+    assert Movie.objects.get(tmdb_id=680).title == "Криминальное чтиво"
+
+
+@pytest.mark.django_db
+def test_sync_tmdb_changes_command(tmdb_stub, local_content):
+    """Тест команды синхронизации изменений."""
+    with patch('Movie_app.management.commands.sync_tmdb_changes.sync_changes',
+               wraps=sync_changes) as mock_sync:
+        call_command('sync_tmdb_changes', '--type', 'all')
+
+    assert mock_sync.call_count == 2
+    assert SyncState.objects.count() == 2
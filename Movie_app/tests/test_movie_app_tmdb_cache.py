@@ -0,0 +1,100 @@
+from datetime import date
+import pytest
+from Movie_app.api import fetch_changes, fetch_movie_details
+from Movie_app.tmdb_cache import TMDBResponseCache, get_response_cache
+from Movie_app.tmdb_stub import TMDBStubServer, RECORDINGS_DIR
+
+
+@pytest.fixture
+def tmdb_stub(settings, tmp_path):
+    settings.TMDB_API_KEY = 'test_api_key'
+    settings.TMDB_CACHE_ENABLED = True
+    settings.TMDB_CACHE_DIR = str(tmp_path / 'tmdb')
+    settings.TMDB_CACHE_TTL = 3600
+    with TMDBStubServer(recordings_dir=RECORDINGS_DIR) as stub:
+        settings.TMDB_BASE_URL = stub.base_url
+        yield stub
+
+
+def test_make_key_ignores_api_key():
+    """Тест построения ключа кэша без учёта api_key и порядка параметров."""
+    first = TMDBResponseCache.make_key('http://x/movie/1', {'api_key': 'a', 'language': 'ru-RU',
+                                                            'page': 1})
+    second = TMDBResponseCache.make_key('http://x/movie/1', {'page': '1', 'language': 'ru-RU',
+                                                             'api_key': 'b'})
+    assert first == second
+
+
+def test_cache_disabled_by_default(settings):
+    """Тест выключенного по умолчанию кэша."""
+    settings.TMDB_CACHE_ENABLED = False
+    assert get_response_cache() is None
+
+
+def test_repeat_request_served_from_disk(tmdb_stub):
+    """Тест обслуживания повторного запроса из кэша без обращения к TMDB."""
+    first = fetch_movie_details(550)
+    second = fetch_movie_details(550)
+
+    assert first == second
+    assert len(tmdb_stub.requests) == 1
+    report = get_response_cache().report()
+    assert report['hits'] == 1
+    assert report['misses'] == 1
+    assert report['hit_rate'] == 0.5
+
+
+def test_stale_entry_revalidated_with_etag(tmdb_stub, settings):
+    """Тест ревалидации устаревшей записи условным запросом."""
+    fetch_movie_details(550)
+    settings.TMDB_CACHE_TTL = 0
+
+    data = fetch_movie_details(550)
+
+    assert data['title'] == "Бойцовский клуб"
+    assert len(tmdb_stub.requests) == 2
+    assert get_response_cache().stats['revalidated'] == 1
+
+
+def test_revalidate_picks_up_changed_entry(tmdb_stub):
+    """Тест: revalidate перепроверяет свежую запись и получает изменённые данные."""
+    fetch_movie_details(550)
+    tmdb_stub.add_route('/movie/550', {'id': 550, 'title': "Бойцовский клуб (новое)"})
+
+    assert fetch_movie_details(550)['title'] == "Бойцовский клуб"
+    assert fetch_movie_details(550, revalidate=True)['title'] == "Бойцовский клуб (новое)"
+    assert len(tmdb_stub.requests) == 2
+
+
+def test_change_feeds_bypass_cache(tmdb_stub):
+    """Тест: ленты изменений всегда читаются из сети и не попадают в кэш."""
+    fetch_changes('movie', date(2026, 1, 1), date(2026, 1, 2))
+    fetch_changes('movie', date(2026, 1, 1), date(2026, 1, 2))
+
+    assert len(tmdb_stub.requests) == 2
+    assert get_response_cache().report()['entries'] == 0
+
+
+def test_eviction_keeps_cache_under_limit(tmp_path):
+    """Тест удаления давно не использованных записей при превышении лимита."""
+    cache = TMDBResponseCache(tmp_path, ttl=3600, max_bytes=1000)
+    for index in range(20):
+        cache.store(f"{index:02d}key", {'payload': 'x' * 100})
+
+    assert cache.size() <= 1000
+    assert cache.get("19key") is not None
+    assert cache.get("00key") is None
+    assert cache.stats['evictions'] > 0
+
+
+def test_save_stats_accumulates_totals(tmp_path):
+    """Тест накопления статистики кэша между запусками."""
+    cache = TMDBResponseCache(tmp_path, ttl=3600, max_bytes=1000)
+    cache.stats['hits'] = 3
+    cache.save_stats()
+    cache.stats['hits'] = 2
+
+    totals = cache.save_stats()
+
+    assert totals['hits'] == 5
+    assert cache.stats['hits'] == 0
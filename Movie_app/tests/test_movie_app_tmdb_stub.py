@@ -0,0 +1,96 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+import pytest
+import requests
+from django.core.management import call_command
+from django.db import connection
+from Movie_app.api import fetch_movie_details, send_request
+from Movie_app.models import Movie, Series
+from Movie_app.tmdb_stub import StubFaults, TMDBStubServer, RECORDINGS_DIR
+
+
+@pytest.fixture
+def tmdb_stub(settings):
+    settings.TMDB_API_KEY = 'test_api_key'
+    settings.TMDB_CACHE_ENABLED = False
+    with TMDBStubServer(recordings_dir=RECORDINGS_DIR, faults=StubFaults(seed=1)) as stub:
+        settings.TMDB_BASE_URL = stub.base_url
+        yield stub
+
+
+def test_stub_serves_recorded_response(tmdb_stub):
+    """Тест ответа заглушки записанными данными."""
+    data = fetch_movie_details(550)
+    assert data['title'] == "Бойцовский клуб"
+    assert tmdb_stub.requests == [('/movie/550', {'api_key': 'test_api_key',
+                                                  'language': 'ru-RU',
+                                                  'append_to_response': 'credits'})]
+
+
+def test_stub_unknown_path_returns_404(tmdb_stub):
+    """Тест ответа 404 для незаписанного пути."""
+    response = requests.get(f"{tmdb_stub.base_url}/movie/1", timeout=5)
+    assert response.status_code == 404
+
+
+def test_send_request_retries_rate_limited_response(tmdb_stub, settings):
+    """Тест повтора запроса после ответа 429 с заголовком Retry-After."""
+    settings.TMDB_MAX_RETRIES = 3
+    tmdb_stub.faults.rate_limit_rate = 1.0
+
+    response = send_request(f"{tmdb_stub.base_url}/movie/550", {})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '0'
+    assert len(tmdb_stub.requests) == 4
+    assert tmdb_stub.injected['rate_limited'] == 4
+
+
+@patch('Movie_app.api.time.sleep')
+def test_send_request_recovers_after_server_error(mock_sleep, tmdb_stub):
+    """Тест успешного ответа после случайных ошибок сервера."""
+    tmdb_stub.faults.error_rate = 0.5
+
+    response = send_request(f"{tmdb_stub.base_url}/movie/550", {})
+
+    assert response.status_code == 200
+    assert len(tmdb_stub.requests) == tmdb_stub.injected['errors'] + 1
+    assert mock_sleep.call_count == tmdb_stub.injected['errors']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_ingestion_on_recordings():
+    """Тест нагрузочной команды на записанных ответах TMDB."""
+    out = StringIO()
+    call_command('benchmark_ingestion', '--commit', stdout=out)
+
+    report = json.loads(out.getvalue())
+    assert report['titles'] == 5
+    assert report['pages'] == 2
+    assert report['commits'] == 2
+    assert report['queries_per_title'] > 0
+    assert report['flush_seconds'] > 0
+    assert report['http_requests'] == 8
+    assert Movie.objects.get(tmdb_id=13).actors.count() == 3
+    assert Series.objects.get(tmdb_id=1396).seasons == 5
+
+
+@pytest.mark.django_db(transaction=True)
+@patch('Movie_app.api.time.sleep')
+def test_benchmark_ingestion_synthetic_catalog_with_failures(mock_sleep):
+    """Тест нагрузочной команды на синтетическом каталоге с внедрёнными ошибками."""
+    out = StringIO()
+    call_command('benchmark_ingestion', '--synthetic', '--per-page', '5', '--pages', '2',
+                 '--error-rate', '0.2', '--rate-limit-rate', '0.1', '--seed', '7',
+                 stdout=out)
+
+    report = json.loads(out.getvalue())
+    assert report['titles'] == 20
+    assert report['commits'] == report['pages'] == 4
+    assert report['injected_errors'] + report['injected_rate_limits'] > 0
+    assert report['http_requests'] > 25
+    assert report['p50_title_seconds'] >= report['flush_seconds'] / report['titles'] - 0.001
+    assert not report['committed']
+    assert not Movie.objects.exists()
+    assert not connection.settings_dict['NAME'].endswith('_benchmark')
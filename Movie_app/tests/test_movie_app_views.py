@@ -1,8 +1,11 @@
 from datetime import date
 import pytest
+from django.db import connection
 from django.test import Client
 from django.urls import reverse
+from Movie_app.forms import MovieFilterForm, SeriesFilterForm
 from Movie_app.models import Actor, Country, Director, Genre, Movie, Series
+from Movie_app.views import filter_titles
 
 
 @pytest.fixture
@@ -10,6 +13,22 @@ def client():
     return Client()
 
 
+def explain_filter(model, form_class, data, size=300):
+    """
+    Заполняет таблицу модели size записями с разными рейтингами и годами выхода,
+    обновляет статистику и возвращает план запроса filter_titles при запрете
+    последовательного чтения.
+    """
+    for index in range(size):
+        model.objects.create(tmdb_id=10_000 + index, title=f"Title {index}", rating=index % 100,
+                             release_date=date(1950 + index % 60, 1, 1))
+    with connection.cursor() as cursor:
+        for table in (model._meta.db_table, 'Movie_app_content'):
+            cursor.execute(f'ANALYZE "{table}"')
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    return filter_titles(model.objects.all(), form_class(data)).explain()
+
+
 @pytest.fixture
 def setup_genre():
     return Genre.objects.create(tmdb_id=28, name="Action")
@@ -101,7 +120,7 @@ class TestGenreDetailView:
         response = client.get(reverse('Movie_app:genre_detail',
                                       kwargs={'tmdb_id': setup_genre.tmdb_id}))
         assert 'contents' in response.context
-        assert setup_movie in response.context['contents']
+        assert setup_movie.tmdb_id in [content.tmdb_id for content in response.context['contents']]
 
 
 # ============================================================================
@@ -180,7 +199,7 @@ class TestDirectorDetailView:
         response = client.get(reverse('Movie_app:director_detail',
                                       kwargs={'tmdb_id': setup_director.tmdb_id}))
         assert 'contents' in response.context
-        assert setup_movie in response.context['contents']
+        assert setup_movie.tmdb_id in [content.tmdb_id for content in response.context['contents']]
 
 
 # ============================================================================
@@ -250,6 +269,48 @@ class TestMovieListView:
         response = client.get(reverse('Movie_app:movie_list'))
         assert 'filter_form' in response.context
 
+    def test_movie_list_filters_by_title_rating_and_year(self, client, setup_movie):
+        Movie.objects.create(tmdb_id=2002, title="Another Movie", rating=40,
+                             release_date=date(2010, 1, 1))
+        Movie.objects.create(tmdb_id=2003, title="Test Drive", rating=60,
+                             release_date=date(2020, 12, 31))
+        url = reverse('Movie_app:movie_list')
+
+        response = client.get(url, {'title': 'test'})
+        assert [movie.tmdb_id for movie in response.context['movies']] == [2001, 2003]
+
+        response = client.get(url, {'rating': 50, 'rating_max': 70})
+        assert [movie.tmdb_id for movie in response.context['movies']] == [2003]
+
+        response = client.get(url, {'year_from': 2020, 'year_to': 2020})
+        assert [movie.tmdb_id for movie in response.context['movies']] == [2001, 2003]
+
+    def test_movie_list_filters_by_single_entities(self, client, setup_movie, setup_director):
+        Movie.objects.create(tmdb_id=2002, title="Another Movie", rating=40)
+        url = reverse('Movie_app:movie_list')
+
+        for params in ({'genre': 28}, {'actor': 500}, {'director': setup_director.pk},
+                       {'country': 'USA'}):
+            response = client.get(url, params)
+            assert list(response.context['movies']) == [setup_movie]
+
+    def test_movie_list_rejects_inverted_range(self, client, setup_movie):
+        response = client.get(reverse('Movie_app:movie_list'), {'rating': 90, 'rating_max': 10})
+        assert response.context['filter_form'].errors
+        assert list(response.context['movies']) == [setup_movie]
+
+    def test_movie_list_rating_filter_uses_index(self, setup_movie):
+        """Тест плана запроса: диапазон рейтинга читает индекс movie_rating_release_idx."""
+        plan = explain_filter(Movie, MovieFilterForm, {'rating': 95, 'rating_max': 96})
+
+        assert 'movie_rating_release_idx' in plan
+
+    def test_movie_list_title_prefix_filter_uses_index(self, setup_movie):
+        """Тест плана запроса: начало названия ищется по индексу content_title_upper_prefix_idx."""
+        plan = explain_filter(Movie, MovieFilterForm, {'title': 'title 12'})
+
+        assert 'content_title_upper_prefix_idx' in plan
+
 
 # ============================================================================
 # Тесты SeriesListView
@@ -270,6 +331,21 @@ class TestSeriesListView:
         response = client.get(reverse('Movie_app:series_list'))
         assert 'filter_form' in response.context
 
+    def test_series_list_filters_by_year_and_country(self, client, setup_series):
+        Series.objects.create(tmdb_id=3002, title="Old Series", rating=70,
+                              release_date=date(1999, 1, 1))
+
+        response = client.get(reverse('Movie_app:series_list'),
+                              {'year_from': 2000, 'country': 'USA'})
+
+        assert list(response.context['series']) == [setup_series]
+
+    def test_series_list_year_filter_uses_index(self, setup_series):
+        """Тест плана запроса: диапазон годов выхода читает индекс series_release_rating_idx."""
+        plan = explain_filter(Series, SeriesFilterForm, {'year_from': 2020, 'year_to': 2021})
+
+        assert 'series_release_rating_idx' in plan
+
 
 # ============================================================================
 # Тесты content_detail
@@ -0,0 +1,189 @@
+"""
+Этот модуль отвечает за дисковый кэш ответов TMDB API.
+Ответы хранятся в MEDIA_ROOT/cache/tmdb/ в виде JSON-файлов,
+ключ кэша строится по URL и параметрам запроса без api_key.
+Устаревшие записи перепроверяются условным запросом (If-None-Match),
+а при превышении лимита размера удаляются давно не использованные записи.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlencode
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+EXCLUDED_PARAMS = {'api_key'}
+
+STATS_FILE = 'stats.json'
+
+
+class TMDBResponseCache:
+    """
+    Кэш ответов TMDB на диске с TTL, ревалидацией по ETag
+    и ограничением общего размера.
+    """
+
+    def __init__(self, directory, ttl, max_bytes):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'evictions': 0}
+        self._size = None
+
+    @staticmethod
+    def make_key(url, params):
+        """Строит ключ кэша по URL и параметрам запроса без api_key."""
+        items = sorted((key, str(value)) for key, value in (params or {}).items()
+                       if key not in EXCLUDED_PARAMS)
+        return hashlib.sha256(f"{url}?{urlencode(items)}".encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Возвращает запись кэша или None."""
+        try:
+            return json.loads(self._path(key).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, body, etag=None):
+        """Сохраняет ответ в кэш, при необходимости освобождая место."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous = path.stat().st_size if path.exists() else 0
+        payload = json.dumps({'stored_at': time.time(), 'etag': etag, 'body': body},
+                             ensure_ascii=False).encode('utf-8')
+        temp_path = path.with_suffix('.tmp')
+        temp_path.write_bytes(payload)
+        os.replace(temp_path, path)
+        self._size = self.size() - previous + len(payload)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def touch(self, key, entry):
+        """Обновляет время сохранения записи после успешной ревалидации."""
+        entry['stored_at'] = time.time()
+        self.store(key, entry['body'], entry.get('etag'))
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get('stored_at', 0) < self.ttl
+
+    def fetch(self, url, params, send=None, revalidate=False):
+        """
+        Возвращает JSON-ответ TMDB из кэша или из сети.
+        send(url, params, headers) выполняет сетевой запрос.
+        При revalidate=True даже свежая запись перепроверяется условным запросом.
+        Исключения requests пробрасываются вызывающему коду.
+        """
+        key = self.make_key(url, params)
+        entry = self.get(key)
+        if entry is not None and not revalidate and self.is_fresh(entry):
+            self.stats['hits'] += 1
+            os.utime(self._path(key))
+            return entry['body']
+
+        headers = {}
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if send is None:
+            response = requests.get(url, params=params, headers=headers, timeout=10)
+        else:
+            response = send(url, params, headers)
+        if response.status_code == 304 and entry is not None:
+            self.stats['revalidated'] += 1
+            self.touch(key, entry)
+            return entry['body']
+
+        response.raise_for_status()
+        body = response.json()
+        self.stats['misses'] += 1
+        self.store(key, body, response.headers.get('ETag'))
+        return body
+
+    def _entries(self):
+        return list(self.directory.glob('*/*.json'))
+
+    def size(self):
+        """Возвращает общий размер записей кэша в байтах."""
+        if self._size is None:
+            self._size = sum(path.stat().st_size for path in self._entries())
+        return self._size
+
+    def evict(self, target_bytes=None):
+        """
+        Удаляет давно не использованные записи, пока размер кэша
+        не станет меньше target_bytes (по умолчанию 90% лимита).
+        """
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.9)
+        entries = sorted(((path.stat(), path) for path in self._entries()),
+                         key=lambda item: item[0].st_mtime)
+        size = sum(stat.st_size for stat, _ in entries)
+        for stat, path in entries:
+            if size <= target_bytes:
+                break
+            path.unlink(missing_ok=True)
+            size -= stat.st_size
+            self.stats['evictions'] += 1
+        self._size = size
+        logger.info(f"Кэш TMDB очищен до {size} байт")
+
+    def clear(self):
+        """Удаляет все записи кэша."""
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+    def report(self):
+        """Возвращает статистику кэша, включая долю попаданий."""
+        requests_total = sum(self.stats[name] for name in ('hits', 'misses', 'revalidated'))
+        served = self.stats['hits'] + self.stats['revalidated']
+        return {
+            **self.stats,
+            'hit_rate': served / requests_total if requests_total else 0.0,
+            'entries': len(self._entries()),
+            'size_bytes': self.size(),
+            'max_bytes': self.max_bytes,
+        }
+
+    def save_stats(self):
+        """Добавляет статистику текущего процесса к накопленной на диске и сбрасывает её."""
+        path = self.directory / STATS_FILE
+        try:
+            totals = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            totals = {}
+        for name, value in self.stats.items():
+            totals[name] = totals.get(name, 0) + value
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(totals), encoding='utf-8')
+        self.stats = dict.fromkeys(self.stats, 0)
+        return totals
+
+
+_state = SimpleNamespace(cache=None)
+
+
+def get_response_cache():
+    """
+    Возвращает кэш ответов TMDB согласно настройкам
+    или None, если кэш выключен (TMDB_CACHE_ENABLED).
+    """
+    if not getattr(settings, 'TMDB_CACHE_ENABLED', False):
+        return None
+    directory = getattr(settings, 'TMDB_CACHE_DIR',
+                        os.path.join(settings.MEDIA_ROOT, 'cache', 'tmdb'))
+    ttl = getattr(settings, 'TMDB_CACHE_TTL', 24 * 60 * 60)
+    max_bytes = getattr(settings, 'TMDB_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+    cache = _state.cache
+    if cache is None or (str(cache.directory), cache.ttl, cache.max_bytes) != \
+            (str(directory), ttl, max_bytes):
+        _state.cache = TMDBResponseCache(directory, ttl, max_bytes)
+    return _state.cache
@@ -0,0 +1,250 @@
+"""
+Этот модуль содержит локальную заглушку TMDB API, которая отдаёт
+записанные JSON-ответы. Используется в тестах и для проверки
+загрузки данных без обращения к настоящему TMDB.
+Заглушка умеет добавлять задержку, случайные ошибки сервера
+и ответы 429 (превышение лимита запросов), а также отдавать
+изображения постеров по путям вида /t/p/<размер>/<файл>.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import InitVar, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+
+RECORDINGS_DIR = Path(__file__).resolve().parent / 'tmdb_recordings'
+
+
+@dataclass
+class StubFaults:
+    """
+    Внедряемые заглушкой сбои: задержка каждого ответа (в секундах),
+    доли ответов 500 и 429, заголовок Retry-After и зерно генератора случайных чисел.
+    """
+    latency: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: int = 0
+    seed: InitVar[int | None] = None
+
+    def __post_init__(self, seed):
+        self.injected = {'errors': 0, 'rate_limited': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self):
+        """Возвращает статус внедрённой ошибки или None."""
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                self.injected['rate_limited'] += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.injected['errors'] += 1
+                return 500
+        return None
+
+
+class TMDBStubServer:
+    """
+    HTTP-сервер, отдающий записанные ответы TMDB.
+    Ответ выбирается по пути запроса и подмножеству его параметров,
+    сбои ответов задаются объектом StubFaults.
+    """
+
+    def __init__(self, recordings_dir=None, host='127.0.0.1', port=0, faults=None):
+        self.routes = {}
+        self.requests = []
+        self.faults = faults or StubFaults()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+        if recordings_dir is not None:
+            self.load_recordings(recordings_dir)
+
+    @property
+    def injected(self):
+        """Количество внедрённых ошибок сервера и ответов 429."""
+        return self.faults.injected
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_route(self, path, body, params=None, status=200):
+        """Добавляет ответ body для пути path и параметров params."""
+        params = {key: str(value) for key, value in (params or {}).items()}
+        self.routes.setdefault(path, []).append((params, status, body))
+
+    def add_poster(self, poster_path, sizes=('w92', 'w185', 'w342', 'w500')):
+        """Добавляет изображения постера poster_path в размерах sizes."""
+        for size in sizes:
+            self.add_route(f'/t/p/{size}{poster_path}', _synthetic_image(size, poster_path))
+
+    def load_recordings(self, directory):
+        """
+        Загружает записанные ответы из JSON-файлов каталога.
+        Каждый файл содержит path, необязательные params и body.
+        """
+        for file in sorted(Path(directory).glob('*.json')):
+            recording = json.loads(file.read_text(encoding='utf-8'))
+            self.add_route(recording['path'], recording['body'],
+                           recording.get('params'), recording.get('status', 200))
+
+    def add_synthetic_catalog(self, pages=1, per_page=20, start_id=9_000_000):
+        """
+        Добавляет сгенерированные списки популярных фильмов и сериалов
+        и детали каждого тайтла для нагрузочных проверок.
+        """
+        self.add_route('/genre/movie/list', {'genres': [
+            {'id': gid, 'name': f'Синтетический жанр {gid}'} for gid in range(1, 11)]})
+        tmdb_id = start_id
+        for media_type, list_path in (('movie', '/movie/popular'), ('tv', '/tv/popular')):
+            for page in range(1, pages + 1):
+                results = []
+                for _ in range(per_page):
+                    tmdb_id += 1
+                    results.append(_synthetic_list_item(media_type, tmdb_id))
+                    self.add_route(f'/{media_type}/{tmdb_id}',
+                                   _synthetic_details(media_type, tmdb_id))
+                self.add_route(list_path, {'page': page, 'results': results,
+                                           'total_pages': pages}, params={'page': page})
+
+    def match(self, path, query):
+        """
+        Возвращает (status, body) наиболее точно подходящего ответа.
+        При равной точности побеждает ответ, добавленный позже.
+        """
+        candidates = [
+            ((len(params), index), status, body)
+            for index, (params, status, body) in enumerate(self.routes.get(path, []))
+            if all(query.get(k) == v for k, v in params.items())
+        ]
+        if not candidates:
+            return 404, {'status_message': 'The resource you requested could not be found.'}
+        _, status, body = max(candidates, key=lambda item: item[0])
+        return status, body
+
+    def respond(self, handler):
+        """Формирует ответ на запрос обработчика."""
+        url = urlsplit(handler.path)
+        query = dict(parse_qsl(url.query))
+        path = url.path
+        if path.startswith('/3/'):
+            path = path[2:]
+        self.requests.append((path, query))
+        if self.faults.latency:
+            time.sleep(self.faults.latency)
+        injected = self.faults.roll()
+        if injected == 429:
+            handler.send_json(429, {'status_code': 25, 'status_message': 'Rate limit exceeded'},
+                              {'Retry-After': str(self.faults.retry_after)})
+            return
+        if injected is not None:
+            handler.send_json(injected, {'status_message': 'Internal error'})
+            return
+        status, body = self.match(path, query)
+        if status != 200:
+            handler.send_json(status, body)
+            return
+        if isinstance(body, bytes):
+            handler.send_bytes(body, 'image/jpeg')
+            return
+        etag = self.make_etag(body)
+        if handler.headers.get('If-None-Match') == etag:
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.end_headers()
+            return
+        handler.send_json(status, body, {'ETag': etag})
+
+    @staticmethod
+    def make_etag(body):
+        """Вычисляет ETag ответа по его содержимому."""
+        payload = json.dumps(body, sort_keys=True).encode('utf-8')
+        return f'"{hashlib.sha1(payload).hexdigest()}"'
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.respond(self)
+
+            def send_json(self, status, body, headers=None):
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json;charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def send_bytes(self, payload, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _synthetic_list_item(media_type, tmdb_id):
+    item = {
+        'id': tmdb_id,
+        'overview': f'Синтетическое описание {tmdb_id}',
+        'poster_path': f'/synthetic{tmdb_id}.jpg',
+        'vote_average': (tmdb_id % 100) / 10,
+        'genre_ids': [tmdb_id % 10 + 1, (tmdb_id + 3) % 10 + 1],
+    }
+    if media_type == 'tv':
+        item.update(name=f'Сериал {tmdb_id}', original_name=f'Series {tmdb_id}',
+                    first_air_date='2020-01-01')
+    else:
+        item.update(title=f'Фильм {tmdb_id}', release_date='2020-01-01')
+    return item
+
+
+def _synthetic_details(media_type, tmdb_id):
+    details = _synthetic_list_item(media_type, tmdb_id)
+    details.update(
+        production_countries=[{'iso_3166_1': 'US', 'name': 'United States of America'}],
+        credits={
+            'cast': [{'id': 5_000_000 + (tmdb_id * 7 + i) % 5000,
+                      'name': f'Актёр {(tmdb_id * 7 + i) % 5000}'} for i in range(12)],
+            'crew': [{'id': 6_000_000 + tmdb_id % 500, 'name': f'Режиссёр {tmdb_id % 500}',
+                      'job': 'Director'}],
+        },
+    )
+    if media_type == 'tv':
+        details.update(number_of_seasons=tmdb_id % 8 + 1, number_of_episodes=tmdb_id % 80 + 8)
+    return details
+
+
+def _synthetic_image(size, poster_path):
+    """Возвращает байты, имитирующие JPEG-файл постера."""
+    return b'\xff\xd8\xff\xe0' + f'{size}{poster_path}'.encode('utf-8') + b'\xff\xd9'
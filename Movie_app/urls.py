@@ -8,6 +8,7 @@ app_name = 'Movie_app'
 
 urlpatterns = [
     path('actors/', views.ActorListView.as_view(), name='actor_list'),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
     path('actors/<int:tmdb_id>/', views.ActorDetailView.as_view(), name='actor_detail'),
     path("content/<int:tmdb_id>/", views.content_detail, name="content_detail"),
     path('content/', views.ContentListView.as_view(), name='content_list'),
@@ -17,6 +18,7 @@ urlpatterns = [
     path('directors/<int:tmdb_id>/', views.DirectorDetailView.as_view(), name='director_detail'),
     path('genres/', views.GenreListView.as_view(), name='genre_list'),
     path('genres/<int:tmdb_id>/', views.GenreDetailView.as_view(), name='genre_detail'),
+    path('lookup/<str:kind>/', views.lookup, name='lookup'),
     path('movies/', views.MovieListView.as_view(), name='movie_list'),
     path('series/', views.SeriesListView.as_view(), name='series_list'),
     path("search_results/", views.content_search, name="search_results"),
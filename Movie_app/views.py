@@ -3,48 +3,175 @@
 пользовательских запросов и отображение данных в приложении Movie_app.
 """
 
-from django.views.generic import ListView, DetailView
+from datetime import date
+from django.db import models
+from django.views.generic import ListView
+from django.views.generic.detail import SingleObjectMixin
+from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import render
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
 from recommendations.models import UserPreference
+from .autocomplete import DEFAULT_LIMIT, KINDS, MAX_LIMIT, suggest
+from .entity_stats import ranked_entities
+from .conditional import (ConditionalResponseMixin, conditional_page, content_etag,
+                          content_last_modified)
 from .forms import SearchForm, ContentFilterForm, MovieFilterForm, SeriesFilterForm
 from .models import Actor, Content, Country, Director, Genre, Movie, Series
+from .facets import get_facet_index, match_from_form, selection_from_form
+from .filters import FILTER_RELATIONS, apply_filters
+from .fragments import fragment_timeout, table_version
+from .listing import LISTING_ANNOTATIONS
+from .lookups import LOOKUP_MODELS, lookup_page
+from .pagination import KeysetPaginationMixin
+from .response_cache import CachedResponseMixin, cache_response
+from .search import RESULTS_PER_PAGE, load_results, ranked_pks, search_like
+from .shelves import get_shelves
+from .summaries import entity_summaries
+
+
+class FacetedContentMixin:
+    """
+    Выбирает контент по фасетам ContentFilterForm в памяти (FacetIndex)
+    и загружает из базы данных только текущую страницу. Без выбранных фасетов
+    (и пока индекс строится) список читается из базы постранично по ключу,
+    а счётчики фасетов без выбора берутся из индекса готовыми.
+    """
+    facet_ordering = '-tmdb_id'
+
+    facet_result = None
+
+    def get_selection(self):
+        """Возвращает выбранные в ContentFilterForm значения фасетов."""
+        self.filter_form = ContentFilterForm(self.request.GET)
+        self.selection = selection_from_form(self.filter_form)
+        self.match = match_from_form(self.filter_form)
+        return self.selection
+
+    def filter_content(self):
+        """
+        Queryset контента, подходящего под выбранные фасеты: связи проверяются
+        через EXISTS, диапазоны рейтинга — по рейтингу фильма или сериала.
+        """
+        queryset = apply_filters(Content.objects.non_polymorphic().only('pk'),
+                                 {name: keys for name, keys in self.selection.items()
+                                  if name in FILTER_RELATIONS}, self.match)
+        buckets = self.selection.get('rating')
+        if buckets:
+            condition = models.Q()
+            for bucket in map(int, buckets):
+                condition |= models.Q(rating__gte=bucket * 10,
+                                      rating__lte=100 if bucket == 9 else bucket * 10 + 9)
+            queryset = queryset.annotate(rating=LISTING_ANNOTATIONS['rating']).filter(condition)
+        return queryset
+
+    def search_facets(self):
+        """
+        Возвращает pk контента, подходящего под выбранные фасеты: готовую
+        последовательность из индекса или, без фасетов и пока индекс строится, queryset.
+        """
+        index = get_facet_index()
+        if index is None or not self.selection:
+            self.facets = index.facets({}) if index is not None else []
+            return self.filter_content()
+        self.facet_result = index.search(self.selection, self.facet_ordering, self.match)
+        self.facets = self.facet_result.facets
+        return self.facet_result.pks
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filter_form'] = self.filter_form
+        context['match'] = self.match
+        context['facets'] = getattr(self, 'facets', [])
+        for facet in context['facets']:
+            facet['label'] = self.filter_form.fields[facet['param']].label
+        context['contents'] = context['object_list'] = load_results(
+            [getattr(obj, 'pk', obj) for obj in context['object_list']])
+        return context
 
 
-class HomeView(ListView):
+class HomeView(ConditionalResponseMixin, CachedResponseMixin, KeysetPaginationMixin,
+               FacetedContentMixin, ListView):
+    """
+    Главная страница: кэшированные подборки контента,
+    а при выбранных фильтрах — отфильтрованный список с постраничным выводом.
+    """
     model = Content
     template_name = 'Movie_app/home.html'
     context_object_name = 'contents'
+    paginate_by = 20
+    keyset_ordering = ('-tmdb_id',)
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        queryset = queryset.order_by('-tmdb_id')
-        form = ContentFilterForm(self.request.GET)
-        if form.is_valid():
-            genres = form.cleaned_data.get('genres')
-            actors = form.cleaned_data.get('actors')
-            directors = form.cleaned_data.get('directors')
-            countries = form.cleaned_data.get('countries')
-            if genres:
-                queryset = queryset.filter(genres__in=genres)
-            if actors:
-                queryset = queryset.filter(actors__in=actors)
-            if directors:
-                queryset = queryset.filter(director__in=directors)
-            if countries:
-                queryset = queryset.filter(created_in__in=countries)
-        return queryset.distinct()
+        if not self.get_selection():
+            return []
+        return self.search_facets()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['filter_form'] = ContentFilterForm(self.request.GET)
-        for content in context['contents']:
-            content.is_series = isinstance(content, Series)
+        context['is_filtered'] = bool(self.selection)
+        if not context['is_filtered']:
+            context['shelves'] = get_shelves()
         return context
 
 
-class GenreListView(ListView):
+class EntityContentView(ConditionalResponseMixin, CachedResponseMixin, KeysetPaginationMixin,
+                        SingleObjectMixin, ListView):
+    """
+    Базовое представление сущности (жанра, актёра, режиссёра, страны)
+    со списком её фильмов и сериалов. Список выбирается одним запросом
+    к карточкам контента (ContentSummary), сортируется и ограничивается
+    в базе данных и выводится постранично по ключу (рейтинг, tmdb_id).
+    """
+    paginate_by = 20
+    keyset_ordering = ('-rating', '-content_id')
+    content_relation = None
+    content_models = ('movie', 'series')
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object(queryset=self.model.objects.all())
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return entity_summaries(self.object, self.content_relation, self.content_models)
+
+    def get_context_object_name(self, obj):
+        if isinstance(obj, models.Model):
+            return super().get_context_object_name(obj)
+        return None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['contents'] = context['object_list']
+        return context
+
+
+class TableVersionMixin:
+    """
+    Добавляет в контекст версию таблицы модели и время жизни фрагментов,
+    чтобы шаблон списка сущностей кэшировал его тегом {% cache %}.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['table_version'] = table_version(self.model)
+        context['fragment_timeout'] = fragment_timeout()
+        return context
+
+
+class EntityStatsMixin:
+    """
+    Список сущностей по убыванию популярности: порядок задаётся индексированными
+    столбцами таблицы агрегатов, а агрегаты (число тайтлов, средний рейтинг,
+    последний выход) доступны шаблону через атрибут stats без лишних запросов.
+    """
+
+    def get_queryset(self):
+        return ranked_entities(self.model)
+
+
+class GenreListView(ConditionalResponseMixin, CachedResponseMixin, TableVersionMixin,
+                    EntityStatsMixin, ListView):
     """Отображение списка жанров"""
     model = Genre
     template_name = 'Movie_app/genre_list.html'
@@ -52,25 +179,17 @@ class GenreListView(ListView):
     paginate_by = 20
 
 
-class GenreDetailView(DetailView):
+class GenreDetailView(EntityContentView):
     """Отображение деталей жанра с фильмами и сериалами"""
     model = Genre
     template_name = 'Movie_app/genre_detail.html'
     context_object_name = 'genre'
     pk_url_kwarg = 'tmdb_id'
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        genre = self.get_object()
-        movies = Movie.objects.filter(genres=genre)
-        series = Series.objects.filter(genres=genre)
-        contents = list(movies) + list(series)
-        contents.sort(key=lambda x: x.rating, reverse=True)
-        context['contents'] = contents
-        return context
+    content_relation = 'genres'
 
 
-class ActorListView(ListView):
+class ActorListView(ConditionalResponseMixin, CachedResponseMixin, TableVersionMixin,
+                    EntityStatsMixin, ListView):
     """Отображение списка актеров"""
     model = Actor
     template_name = 'Movie_app/actor_list.html'
@@ -78,25 +197,17 @@ class ActorListView(ListView):
     paginate_by = 20
 
 
-class ActorDetailView(DetailView):
+class ActorDetailView(EntityContentView):
     """Отображение деталей актёров с фильмами и сериалами"""
     model = Actor
     template_name = 'Movie_app/actor_detail.html'
     context_object_name = 'actors'
     pk_url_kwarg = 'tmdb_id'
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        actor = self.get_object()
-        movies = Movie.objects.filter(actors=actor)
-        series = Series.objects.filter(actors=actor)
-        contents = list(movies) + list(series)
-        contents.sort(key=lambda x: x.rating, reverse=True)
-        context['contents'] = contents
-        return context
+    content_relation = 'actors'
 
 
-class DirectorListView(ListView):
+class DirectorListView(ConditionalResponseMixin, CachedResponseMixin, TableVersionMixin,
+                       EntityStatsMixin, ListView):
     """Отображение списка режиссёров"""
     model = Director
     template_name = 'Movie_app/director_list.html'
@@ -104,24 +215,18 @@ class DirectorListView(ListView):
     paginate_by = 20
 
 
-class DirectorDetailView(DetailView):
+class DirectorDetailView(EntityContentView):
     """Отображение деталей режиссёров с фильмами и сериалами"""
     model = Director
     template_name = 'Movie_app/director_detail.html'
     context_object_name = 'directors'
     pk_url_kwarg = 'tmdb_id'
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        director = self.get_object()
-        movies = Movie.objects.filter(director=director)
-        contents = list(movies)
-        contents.sort(key=lambda x: x.rating, reverse=True)
-        context['contents'] = contents
-        return context
+    content_relation = 'director'
+    content_models = ('movie',)
 
 
-class CountryListView(ListView):
+class CountryListView(ConditionalResponseMixin, CachedResponseMixin, TableVersionMixin,
+                      EntityStatsMixin, ListView):
     """Отображение списка стран"""
     model = Country
     template_name = 'Movie_app/country_list.html'
@@ -129,119 +234,83 @@ class CountryListView(ListView):
     paginate_by = 20
 
 
-class CountryDetailView(DetailView):
+class CountryDetailView(EntityContentView):
     """Отображение деталей стран с фильмами и сериалами"""
     model = Country
     template_name = 'Movie_app/country_detail.html'
     context_object_name = 'countries'
     pk_url_kwarg = 'iso_code'
+    content_relation = 'created_in'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        country = self.get_object()
-        movies = Movie.objects.filter(created_in=country)
-        series = Series.objects.filter(created_in=country)
-        contents = list(movies) + list(series)
-        contents.sort(key=lambda x: x.rating, reverse=True)
-        context['contents'] = contents
-        return context
 
-
-class ContentListView(ListView):
-    """Отображение списка всего контента"""
+class ContentListView(ConditionalResponseMixin, CachedResponseMixin, KeysetPaginationMixin,
+                      FacetedContentMixin, ListView):
+    """Отображение списка всего контента с фасетными фильтрами и счётчиками"""
     model = Content
     template_name = 'Movie_app/content_list.html'
     context_object_name = 'contents'
     paginate_by = 20
+    keyset_ordering = ('-tmdb_id',)
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        queryset = queryset.order_by('-tmdb_id')
-        form = ContentFilterForm(self.request.GET)
-        if form.is_valid():
-            genres = form.cleaned_data.get('genres')
-            actors = form.cleaned_data.get('actors')
-            directors = form.cleaned_data.get('directors')
-            countries = form.cleaned_data.get('countries')
-            if genres:
-                queryset = queryset.filter(genres__in=genres)
-            if actors:
-                queryset = queryset.filter(actors__in=actors)
-            if directors:
-                queryset = queryset.filter(director__in=directors)
-            if countries:
-                queryset = queryset.filter(created_in__in=countries)
-        return queryset.distinct()
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['filter_form'] = ContentFilterForm(self.request.GET)
-        for content in context['contents']:
-            content.is_series = isinstance(content, Series)
-        return context
+        self.get_selection()
+        return self.search_facets()
 
 
-class MovieListView(ListView):
+def filter_titles(queryset, form):
+    """
+    Применяет к queryset фильмов или сериалов фильтры MovieFilterForm/SeriesFilterForm:
+    начало названия, диапазоны рейтинга и года выхода, жанр, актер, режиссер и страна.
+    Диапазоны сравниваются с самими столбцами rating и release_date,
+    чтобы запрос мог использовать их индексы, а связи проверяются через EXISTS.
+    """
+    if not form.is_valid():
+        return queryset
+    data = form.cleaned_data
+    if data.get('title'):
+        queryset = queryset.filter(title__istartswith=data['title'].strip())
+    if data.get('rating') is not None:
+        queryset = queryset.filter(rating__gte=data['rating'])
+    if data.get('rating_max') is not None:
+        queryset = queryset.filter(rating__lte=data['rating_max'])
+    if data.get('year_from') is not None:
+        queryset = queryset.filter(release_date__gte=date(data['year_from'], 1, 1))
+    if data.get('year_to') is not None:
+        queryset = queryset.filter(release_date__lt=date(data['year_to'] + 1, 1, 1))
+    return apply_filters(queryset, {name: [data[name].pk] for name in FILTER_RELATIONS
+                                    if data.get(name) is not None})
+
+
+class MovieListView(ConditionalResponseMixin, CachedResponseMixin, KeysetPaginationMixin, ListView):
     """Отображение списка фильмов."""
     model = Movie
     template_name = 'Movie_app/movie_list.html'
     context_object_name = 'movies'
     paginate_by = 20
+    keyset_ordering = ('-rating', '-tmdb_id')
+    filter_form_class = MovieFilterForm
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        queryset = queryset.order_by('-rating')
-        form = MovieFilterForm(self.request.GET)
-        if form.is_valid():
-            genres = form.cleaned_data.get('genres')
-            actors = form.cleaned_data.get('actors')
-            directors = form.cleaned_data.get('directors')
-            countries = form.cleaned_data.get('countries')
-            if genres:
-                queryset = queryset.filter(genres__in=genres)
-            if actors:
-                queryset = queryset.filter(actors__in=actors)
-            if directors:
-                queryset = queryset.filter(director__in=directors)
-            if countries:
-                queryset = queryset.filter(created_in__in=countries)
-        return queryset.distinct()
+        self.filter_form = self.filter_form_class(self.request.GET)
+        return filter_titles(super().get_queryset(), self.filter_form) \
+            .order_by(*self.keyset_ordering)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['filter_form'] = MovieFilterForm(self.request.GET)
+        context['filter_form'] = self.filter_form
         return context
 
 
-class SeriesListView(ListView):
+class SeriesListView(MovieListView):
     """Отображение списка сериалов."""
     model = Series
     template_name = 'Movie_app/series_list.html'
     context_object_name = 'series'
-    paginate_by = 20
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        queryset = queryset.order_by('-rating')
-        form = SeriesFilterForm(self.request.GET)
-        if form.is_valid():
-            genres = form.cleaned_data.get('genres')
-            actors = form.cleaned_data.get('actors')
-            countries = form.cleaned_data.get('countries')
-            if genres:
-                queryset = queryset.filter(genres__in=genres)
-            if actors:
-                queryset = queryset.filter(actors__in=actors)
-            if countries:
-                queryset = queryset.filter(created_in__in=countries)
-        return queryset.distinct()
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['filter_form'] = SeriesFilterForm(self.request.GET)
-        return context
+    filter_form_class = SeriesFilterForm
 
 
+@conditional_page(etag_func=content_etag, last_modified_func=content_last_modified)
+@cache_response()
 def content_detail(request, tmdb_id):
     """Отображение деталей контента по tmdb_id."""
     content = get_object_or_404(Content, tmdb_id=tmdb_id)
@@ -258,36 +327,75 @@ def content_detail(request, tmdb_id):
     return render(request, 'Movie_app/content_detail.html', context)
 
 
+@conditional_page()
+@cache_response()
 def content_search(request):
     """
     Функция для поиска фильмов и сериалов по
     названию, описанию, жанрам, режиссерам, актерам и странам.
+    Бэкенд поиска выбирается настройкой CONTENT_SEARCH_BACKEND: полнотекстовый
+    поиск PostgreSQL или индекс BM25 с ранжированием и постраничным выводом,
+    либо поиск через icontains.
     """
     form = SearchForm(request.GET)
     results = []
     query = ""
+    page_obj = None
 
     if form.is_valid():
         query = form.cleaned_data["query"]
-        if query:
-            movies = Movie.objects.filter(
-                Q(title__icontains=query) | Q(description__icontains=query) |
-                Q(genres__name__icontains=query) | Q(director__name__icontains=query) |
-                Q(actors__name__icontains=query) | Q(created_in__name__icontains=query)
-            ).distinct().order_by("-rating")
-
-            series = Series.objects.filter(
-                Q(title__icontains=query) | Q(description__icontains=query) |
-                Q(genres__name__icontains=query) | Q(actors__name__icontains=query) |
-                Q(created_in__name__icontains=query)
-            ).distinct().order_by("-rating")
-
-            results = list(movies) + list(series)
-            results.sort(key=lambda x: x.rating, reverse=True)
+        pks = ranked_pks(query) if query else None
+        if pks is not None:
+            page_obj = Paginator(pks, RESULTS_PER_PAGE).get_page(request.GET.get('page'))
+            results = load_results(list(page_obj.object_list))
+        elif query:
+            results = search_like(query)
 
     context = {
         "form": form,
         "query": query,
         "results": results,
+        "page_obj": page_obj,
+        "paginator": page_obj.paginator if page_obj else None,
+        "is_paginated": bool(page_obj and page_obj.has_other_pages()),
+        "next_page_url": None,
+        "previous_page_url": None,
     }
+    if page_obj is not None:
+        params = request.GET.copy()
+        if page_obj.has_next():
+            params['page'] = page_obj.next_page_number()
+            context["next_page_url"] = f"?{params.urlencode()}"
+        if page_obj.has_previous():
+            params['page'] = page_obj.previous_page_number()
+            context["previous_page_url"] = f"?{params.urlencode()}"
     return render(request, "Movie_app/search_results.html", context)
+
+
+def autocomplete(request):
+    """
+    Функция для подсказок при вводе: возвращает в JSON фильмы и сериалы,
+    актёров, режиссёров и жанры, названия которых начинаются с ?q=.
+    Параметр ?kind= (через запятую) ограничивает виды подсказок, ?limit= — их число.
+    """
+    query = request.GET.get('q', '')
+    kinds = [kind for kind in request.GET.get('kind', '').split(',') if kind in KINDS] or KINDS
+    try:
+        limit = max(1, min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return JsonResponse({'query': query, 'results': suggest(query, kinds, limit)})
+
+
+def lookup(request, kind):
+    """
+    Функция для полей выбора с загрузкой вариантов с сервера: возвращает в JSON
+    страницу ?page= актёров, режиссёров, жанров или стран, подходящих под ?q=.
+    """
+    if kind not in LOOKUP_MODELS:
+        raise Http404(f"Неизвестный вид справочника: {kind}")
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    return JsonResponse(lookup_page(kind, request.GET.get('q', ''), page))
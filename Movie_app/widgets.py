@@ -0,0 +1,46 @@
+"""
+Этот модуль отвечает за виджеты полей выбора с загрузкой вариантов с сервера.
+В HTML выводятся только выбранные значения, остальные варианты
+запрашиваются у представления lookup по мере ввода (static/js/lookups.js).
+"""
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class LookupWidgetMixin:
+    """Общая часть виджетов: адрес поиска вариантов и вывод только выбранных значений."""
+
+    def __init__(self, lookup, attrs=None):
+        self.lookup = lookup
+        super().__init__(attrs)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-lookup-url'] = reverse('Movie_app:lookup', args=[self.lookup])
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """Строит варианты одним запросом только для выбранных значений."""
+        selected = [item for item in value if item]
+        objects = []
+        if selected:
+            try:
+                objects = list(self.choices.queryset.filter(pk__in=selected))
+            except (ValueError, ValidationError):
+                objects = []
+        options = [(obj.pk, str(obj), True) for obj in objects]
+        field = getattr(self.choices, 'field', None)
+        if not self.allow_multiple_selected and field is not None \
+                and field.empty_label is not None:
+            options.insert(0, ('', field.empty_label, not objects))
+        return [(None, [self.create_option(name, option_value, label, is_selected, index)], index)
+                for index, (option_value, label, is_selected) in enumerate(options)]
+
+
+class LookupSelect(LookupWidgetMixin, forms.Select):
+    pass
+
+
+class LookupSelectMultiple(LookupWidgetMixin, forms.SelectMultiple):
+    pass
@@ -26,7 +26,9 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'polymorphic',
+    'rest_framework',
     'user.apps.UserConfig',
     'Movie_app.apps.MovieAppConfig',
     'recommendations.apps.RecommendationsConfig',
@@ -128,3 +130,80 @@ LOGIN_URL = "user:login"
 LOGOUT_URL = "logout"
 
 TMDB_API_KEY= os.environ.get("TMDB_API_KEY")
+
+TMDB_BASE_URL = os.environ.get("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+
+TMDB_SYNC_FRESHNESS_HOURS = int(os.environ.get("TMDB_SYNC_FRESHNESS_HOURS", 24))
+
+TMDB_CACHE_ENABLED = os.environ.get("TMDB_CACHE_ENABLED", "False") == "True"
+TMDB_CACHE_DIR = os.path.join(MEDIA_ROOT, 'cache', 'tmdb')
+TMDB_CACHE_TTL = int(os.environ.get("TMDB_CACHE_TTL", 24 * 60 * 60))
+TMDB_CACHE_MAX_BYTES = int(os.environ.get("TMDB_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+HOME_SHELVES_TIMEOUT = int(os.environ.get("HOME_SHELVES_TIMEOUT", 60 * 60))
+
+SEARCH_CONFIG = os.environ.get("SEARCH_CONFIG", "russian")
+# postgres | bm25 | icontains
+CONTENT_SEARCH_BACKEND = os.environ.get("CONTENT_SEARCH_BACKEND", "postgres")
+AUTOCOMPLETE_REFRESH_INTERVAL = int(os.environ.get("AUTOCOMPLETE_REFRESH_INTERVAL", 15 * 60))
+AUTOCOMPLETE_BUILD_IN_BACKGROUND = \
+    os.environ.get("AUTOCOMPLETE_BUILD_IN_BACKGROUND", "True") == "True"
+FACETS_REFRESH_INTERVAL = int(os.environ.get("FACETS_REFRESH_INTERVAL", 15 * 60))
+FACETS_SYNC_INTERVAL = int(os.environ.get("FACETS_SYNC_INTERVAL", 5))
+FACETS_BUILD_IN_BACKGROUND = os.environ.get("FACETS_BUILD_IN_BACKGROUND", "True") == "True"
+SEARCH_INDEX_PATH = os.environ.get("SEARCH_INDEX_PATH", os.path.join(BASE_DIR, 'search_index'))
+
+# file | redis | locmem
+# Версия каталога, метрики и ответы должны быть общими для всех воркеров gunicorn
+# и команд загрузки, поэтому locmem (отдельный кэш в каждом процессе) годится только для тестов.
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "file")
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(MEDIA_ROOT, 'cache', 'responses'),
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get("RESPONSE_CACHE_REDIS_URL", "redis://127.0.0.1:6379/1"),
+    },
+}
+# Фрагменты хранятся отдельно от ответов: очистка и вытеснение ответов их не затрагивают.
+FRAGMENT_CACHE_LOCATIONS = {
+    'locmem': 'fragments',
+    'file': os.path.join(MEDIA_ROOT, 'cache', 'fragments'),
+    'redis': os.environ.get("FRAGMENT_CACHE_REDIS_URL", "redis://127.0.0.1:6379/2"),
+}
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'responses': RESPONSE_CACHE_BACKENDS[RESPONSE_CACHE_BACKEND],
+    'template_fragments': {**RESPONSE_CACHE_BACKENDS[RESPONSE_CACHE_BACKEND],
+                           'LOCATION': FRAGMENT_CACHE_LOCATIONS[RESPONSE_CACHE_BACKEND],
+                           'KEY_PREFIX': 'fragments'},
+}
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get("FRAGMENT_CACHE_TIMEOUT", 24 * 60 * 60))
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "True") == "True"
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 5 * 60))
+RESPONSE_CACHE_TIMEOUTS = {
+    'home': 10 * 60,
+    'content_search': 60,
+}
+# Сколько секунд nginx (общий кэш) хранит страницы анонимных посетителей до повторной проверки.
+PROXY_CACHE_MAX_AGE = int(os.environ.get("PROXY_CACHE_MAX_AGE", 30))
+# Счётчики попаданий копятся в памяти воркера и переносятся в хранилище раз в столько секунд.
+RESPONSE_CACHE_STATS_FLUSH_INTERVAL = int(os.environ.get("RESPONSE_CACHE_STATS_FLUSH_INTERVAL", 10))
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
+}
+
+POSTER_CACHE_DIR = os.path.join(MEDIA_ROOT, 'posters')
+POSTER_IMAGE_BASE_URL = os.environ.get("POSTER_IMAGE_BASE_URL", "https://image.tmdb.org/t/p")
+POSTER_CACHE_MAX_BYTES = int(os.environ.get("POSTER_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
@@ -14,6 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from Movie_app.views import HomeView
@@ -24,4 +26,8 @@ urlpatterns = [
     path('user/', include('user.urls', namespace='user')),
     path('Movie_app/', include('Movie_app.urls', namespace='Movie_app')),
     path('recommendations/', include('recommendations.urls', namespace='recommendations')),
+    path('api/', include('Movie_app.api_urls', namespace='api')),
 ]
+
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
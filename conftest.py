@@ -1,8 +1,40 @@
 import os
 import django
+import pytest
 from django.conf import settings
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 if not settings.configured:
     django.setup()
+
+# Тесты держат кэш ответов и фрагментов в памяти процесса (locmem)
+# и строят и обновляют индексы подсказок и фасетов сразу, а не в фоновом потоке.
+settings.CACHES = {**settings.CACHES, 'responses': settings.RESPONSE_CACHE_BACKENDS['locmem'],
+                   'template_fragments': {**settings.RESPONSE_CACHE_BACKENDS['locmem'],
+                                          'LOCATION': 'fragments', 'KEY_PREFIX': 'fragments'}}
+settings.AUTOCOMPLETE_BUILD_IN_BACKGROUND = False
+settings.FACETS_BUILD_IN_BACKGROUND = False
+settings.FACETS_SYNC_INTERVAL = 0
+
+
+@pytest.fixture(autouse=True)
+def reset_in_memory_indexes():
+    """
+    Индексы подсказок и фасетов, кэш ответов и очереди пересчёта карточек
+    и агрегатов живут вне базы данных и не переходят между тестами.
+    """
+    from Movie_app.autocomplete import reset_autocomplete
+    from Movie_app.content_changes import clear_pending_changes
+    from Movie_app.entity_stats import clear_pending_stats
+    from Movie_app.facets import reset_facet_index
+    from Movie_app.fragments import fragment_cache
+    from Movie_app.response_cache import clear_response_cache
+    from Movie_app.summaries import clear_pending_summaries
+    reset_autocomplete()
+    reset_facet_index()
+    clear_response_cache()
+    fragment_cache().clear()
+    clear_pending_summaries()
+    clear_pending_stats()
+    clear_pending_changes()
@@ -3,9 +3,18 @@
 в приложении recommendations.
 """
 from django import forms
+from django.urls import reverse_lazy
 from Movie_app.models import Genre, Actor, Director
+from Movie_app.widgets import LookupSelectMultiple
 from .models import UserPreference, Recommendation, UserInteraction
 
+TITLE_AUTOCOMPLETE_ATTRS = {
+    'autocomplete': 'off',
+    'data-autocomplete-url': reverse_lazy('Movie_app:autocomplete'),
+    'data-autocomplete-kind': 'content',
+    'data-autocomplete-multiple': True,
+}
+
 
 class UserPreferenceForm(forms.ModelForm):
     class Meta:
@@ -55,25 +64,27 @@ class RecommendationInputForm(forms.Form):
     actors = forms.ModelMultipleChoiceField(
         queryset=Actor.objects.all(),
         required=False,
-        widget=forms.SelectMultiple(attrs={'class': 'select2'}),
+        widget=LookupSelectMultiple('actor', attrs={'class': 'select2'}),
         label="Любимые актёры"
     )
     directors = forms.ModelMultipleChoiceField(
         queryset=Director.objects.all(),
         required=False,
-        widget=forms.SelectMultiple(attrs={'class': 'select2'}),
+        widget=LookupSelectMultiple('director', attrs={'class': 'select2'}),
         label="Любимые режиссёры"
     )
     favorite_content = forms.CharField(
         required=False,
         widget=forms.Textarea(attrs={'rows': 3, 'placeholder': 'Введите названия '
-                                                'фильмов и сериалов через запятую...'}),
+                                                'фильмов и сериалов через запятую...',
+                                     **TITLE_AUTOCOMPLETE_ATTRS}),
         label="Любимые фильмы/сериалы"
     )
     disliked_content = forms.CharField(
         required=False,
         widget=forms.Textarea(attrs={'rows': 3,
                                      'placeholder': 'Введите названия нелюбимых '
-                                                    'фильмов и сериалов через запятую...'}),
+                                                    'фильмов и сериалов через запятую...',
+                                     **TITLE_AUTOCOMPLETE_ATTRS}),
         label="Нелюбимые фильмы/сериалы"
     )
@@ -6,7 +6,7 @@ from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.dispatch import receiver
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from Movie_app.models import Genre, Content
 
 
@@ -178,3 +178,43 @@ def clear_content_cache_on_delete(sender, instance, **kwargs):
     from .ml_utils import ContentBasedRecommender
     recommender = ContentBasedRecommender()
     recommender.clear_cache()
+
+
+PERSONAL_FIELDS = ('favorite_content', 'disliked_content', 'favorite_genres', 'disliked_genres')
+
+
+@receiver(post_save, sender=Recommendation)
+@receiver(post_delete, sender=Recommendation)
+def invalidate_recommendation_pages(sender, instance, **kwargs):
+    """Увеличивает версию данных пользователя при изменении его рекомендаций."""
+    from Movie_app.conditional import bump_user_version
+    bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=UserPreference.favorite_content.through)
+@receiver(m2m_changed, sender=UserPreference.disliked_content.through)
+@receiver(m2m_changed, sender=UserPreference.favorite_genres.through)
+@receiver(m2m_changed, sender=UserPreference.disliked_genres.through)
+def invalidate_preference_pages(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Увеличивает версию данных пользователя при изменении избранного и нелюбимого,
+    чтобы ETag его страниц перестали совпадать. При очистке связи со стороны
+    контента или жанра пользователи запоминаются до удаления строк (pre_clear).
+    """
+    from Movie_app.conditional import bump_user_version
+    if reverse and action == 'pre_clear':
+        field = next(name for name in PERSONAL_FIELDS
+                     if getattr(UserPreference, name).through is sender)
+        instance._cleared_preference_users = set(
+            UserPreference.objects.filter(**{field: instance}).values_list('user_id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        user_ids = {instance.user_id}
+    elif action == 'post_clear':
+        user_ids = getattr(instance, '_cleared_preference_users', set())
+    else:
+        user_ids = UserPreference.objects.filter(pk__in=pk_set or ()) \
+            .values_list('user_id', flat=True)
+    for user_id in user_ids:
+        bump_user_version(user_id)
@@ -63,6 +63,19 @@ class TestRecommendationsViews:
         assert response.status_code in [200, 302]
         assert any("Любимый контент" in str(msg) for msg in response.wsgi_request._messages)
 
+    def test_generate_recommendations_matches_titles_by_prefix(self, client, user, content,
+                                                               mocker):
+        """Тест на поиск любимого контента по началу названия"""
+        client.login(username='test_my_user', password='121212')
+        recommender = mocker.patch('recommendations.views.ContentBasedRecommender')
+        recommender.return_value.recommend.return_value = []
+
+        client.post(reverse('recommendations:generate_recommendations'),
+                    data={'favorite_content': 'star', 'disliked_content': ''})
+
+        user_input = recommender.return_value.recommend.call_args[0][0]
+        assert user_input['favorite_content'] == [content.tmdb_id]
+
     def test_random_recommendation_view(self, client, user):
         """Тест на отображение генерации случайной рекомендаций"""
         client.login(username='test_my_user', password='121212')
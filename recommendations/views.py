@@ -7,6 +7,8 @@ from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
+from Movie_app.autocomplete import match_title
+from Movie_app.conditional import conditional_page
 from Movie_app.models import Content
 from .models import UserPreference, UserInteraction, Recommendation
 from .forms import RecommendationInputForm
@@ -79,6 +81,7 @@ def remove_from_favorites_view(request, tmdb_id):
 
 
 @login_required
+@conditional_page()
 def get_favorites_view(request):
     """Отображение списка избранного контента пользователя."""
     user_preference, created = UserPreference.objects.get_or_create(user=request.user)
@@ -90,6 +93,7 @@ def get_favorites_view(request):
 
 
 @login_required
+@conditional_page()
 def generate_recommendations_view(request):
     """Отображение для ввода предпочтений и генерации рекомендаций."""
     if request.method == 'POST':
@@ -109,9 +113,9 @@ def generate_recommendations_view(request):
             for name in favorite_names:
                 name = name.strip()
                 if name:
-                    contents = Content.objects.filter(title__icontains=name)
-                    if contents.exists():
-                        user_input['favorite_content'].append(contents.first().tmdb_id)
+                    tmdb_id = match_title(name)
+                    if tmdb_id is not None:
+                        user_input['favorite_content'].append(tmdb_id)
                     else:
                         messages.warning(request, f"Любимый контент '{name}'"
                                                   f" не найден в базе данных.")
@@ -120,9 +124,9 @@ def generate_recommendations_view(request):
             for name in disliked_names:
                 name = name.strip()
                 if name:
-                    contents = Content.objects.filter(title__icontains=name)
-                    if contents.exists():
-                        user_input['disliked_content'].append(contents.first().tmdb_id)
+                    tmdb_id = match_title(name)
+                    if tmdb_id is not None:
+                        user_input['disliked_content'].append(tmdb_id)
                     else:
                         messages.warning(request, f"Нелюбимый контент '{name}'"
                                                   f" не найден в базе данных.")
@@ -166,6 +170,7 @@ def random_recommendation_view(request):
 
 
 @login_required
+@conditional_page()
 def view_recommendations_view(request):
     """Отображение рекомендаций пользователя."""
     recommendations = Recommendation.objects.filter(user=request.user).order_by('-score')
@@ -0,0 +1,72 @@
+// Подсказки при вводе для полей с атрибутом data-autocomplete-url.
+// data-autocomplete-kind ограничивает виды подсказок, а data-autocomplete-multiple
+// включает подсказки для последнего из значений, введённых через запятую.
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-autocomplete-url]').forEach(function (field) {
+        var multiple = field.hasAttribute('data-autocomplete-multiple');
+        var menu = document.createElement('div');
+        var timer = null;
+        menu.className = 'dropdown-menu';
+        field.parentNode.style.position = 'relative';
+        field.insertAdjacentElement('afterend', menu);
+
+        function currentTerm() {
+            return multiple ? field.value.split(',').pop().trim() : field.value.trim();
+        }
+
+        function choose(label) {
+            if (multiple) {
+                var parts = field.value.split(',');
+                parts[parts.length - 1] = ' ' + label;
+                field.value = parts.join(',').replace(/^\s+/, '') + ', ';
+            } else {
+                field.value = label;
+            }
+            menu.classList.remove('show');
+            field.focus();
+        }
+
+        function render(results) {
+            menu.innerHTML = '';
+            results.forEach(function (item) {
+                var link = document.createElement('a');
+                link.className = 'dropdown-item';
+                link.href = item.url;
+                link.textContent = item.label;
+                link.addEventListener('mousedown', function (event) {
+                    if (multiple) {
+                        event.preventDefault();
+                        choose(item.label);
+                    }
+                });
+                menu.appendChild(link);
+            });
+            menu.classList.toggle('show', results.length > 0);
+        }
+
+        field.addEventListener('input', function () {
+            clearTimeout(timer);
+            var term = currentTerm();
+            if (!term) {
+                render([]);
+                return;
+            }
+            timer = setTimeout(function () {
+                var params = new URLSearchParams({q: term});
+                if (field.dataset.autocompleteKind) {
+                    params.set('kind', field.dataset.autocompleteKind);
+                }
+                fetch(field.dataset.autocompleteUrl + '?' + params)
+                    .then(function (response) { return response.json(); })
+                    .then(function (data) {
+                        if (data.query === currentTerm()) {
+                            render(data.results);
+                        }
+                    });
+            }, 150);
+        });
+        field.addEventListener('blur', function () {
+            setTimeout(function () { menu.classList.remove('show'); }, 150);
+        });
+    });
+});
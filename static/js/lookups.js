@@ -0,0 +1,20 @@
+// Поля выбора с атрибутом data-lookup-url: варианты загружаются постранично
+// по мере ввода, в HTML страницы выводятся только выбранные значения.
+$(function () {
+    $('select[data-lookup-url]').each(function () {
+        var select = $(this);
+        select.select2({
+            width: '100%',
+            allowClear: !select.prop('multiple'),
+            placeholder: select.find('option[value=""]').text() || '',
+            ajax: {
+                url: select.data('lookup-url'),
+                dataType: 'json',
+                delay: 250,
+                data: function (params) {
+                    return {q: params.term || '', page: params.page || 1};
+                }
+            }
+        });
+    });
+});